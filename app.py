@@ -1,4 +1,7 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from anyio import to_thread
+from fastapi import FastAPI, Request
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html, get_swagger_ui_oauth2_redirect_html
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from config.basemodel import Base
@@ -51,28 +54,96 @@ for logger_name in app_loggers:
 
 app_logger = logging.getLogger('app')
 
+# Los avisos de monitoreo (consultas lentas, bloqueos del event loop) se mantienen
+# visibles pese al silenciado general
+monitoring_logger = logging.getLogger('monitoring')
+monitoring_logger.setLevel(logging.WARNING)
+monitoring_logger.propagate = False
+monitoring_handler = logging.StreamHandler()
+monitoring_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+monitoring_logger.addHandler(monitoring_handler)
+
 # Importar todos los modelos para asegurar que se registren en Base.metadata
 from roles.model import Rol
 from permisos.model import Permiso
 from users.model import User
 from tasks.model import Task
-from config.associations import rol_permiso_association, user_task_association
+from config.associations import rol_permiso_association, user_task_association, user_rol_association
+from cache.model import CacheVersion
 
 # Crear todas las tablas
 Base.metadata.create_all(bind=engine)
 
+# create_all no agrega índices nuevos a tablas existentes
+for table in (Task.__table__, user_task_association, user_rol_association):
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+# Ni columnas nuevas: herencia de roles en bases creadas antes de rol_padre_id
+from sqlalchemy import inspect, text
+if 'rol_padre_id' not in {column['name'] for column in inspect(engine).get_columns('roles')}:
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE roles ADD COLUMN rol_padre_id INTEGER REFERENCES roles(rol_id)"))
+
+# Inicializar los contadores de tareas en bases creadas antes de task_stats
+# y las filas de cache_versions y task_change_counter
+from config.cnx import SessionLocal
+from tasks.stats import ensure_task_counters
+from tasks.changes import ensure_change_counter
+from cache.versions import ensure_cache_versions
+_db = SessionLocal()
+try:
+    ensure_task_counters(_db)
+    ensure_cache_versions(_db)
+    ensure_change_counter(_db)
+    _db.commit()
+finally:
+    _db.close()
+
 # Importamos las rutas de los diferentes modelos 
 from default.routes import default
+from default.static import StaticPayload, encode_json
 from middlewares.auth import AuthMiddleware
+from middlewares.metrics import MetricsMiddleware
+from middlewares.request_context import RequestContextMiddleware
+from middlewares.profiling import ProfilingMiddleware
+from config import METRICS_ENABLED, PROFILING_ENABLED, THREADPOOL_LIMIT, LOOP_MONITOR_ENABLED, CACHE_VERSION_POLL_SECONDS
 from roles.routes import roles
 from users.routes import users
 from tasks.routes import tasks
 from permisos.routes import router as permisos_router
+from monitoring.routes import monitoring
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Los endpoints sincrónicos comparten el limitador por defecto de AnyIO
+    to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_LIMIT
+    loop_monitor = None
+    if LOOP_MONITOR_ENABLED:
+        from monitoring.event_loop import monitor as loop_monitor
+        loop_monitor.start()
+    # Esquema OpenAPI y páginas de documentación, una sola vez por worker
+    build_docs()
+    # Invalidación de cachés entre workers (tabla cache_versions)
+    version_watcher = None
+    if CACHE_VERSION_POLL_SECONDS > 0:
+        from cache.versions import watcher as version_watcher
+        version_watcher.start(CACHE_VERSION_POLL_SECONDS)
+    yield
+    if version_watcher is not None:
+        version_watcher.stop()
+    if loop_monitor is not None:
+        loop_monitor.stop()
 
 app = FastAPI(
     title="ToDo System API",
     description="API REST para gestión de usuarios y tareas con autenticación JWT y permisos granulares",
-    version="1.0"
+    version="1.0",
+    lifespan=lifespan,
+    # El esquema y las páginas de documentación se sirven precalculados (ver abajo)
+    openapi_url=None,
+    docs_url=None,
+    redoc_url=None
 )
 
 # Asignamos los Middleware para los CORS
@@ -83,11 +154,20 @@ app.add_middleware(
     allow_headers=["*"],  # Permitir todos los headers incluyendo Authorization
     allow_credentials=True,
 )
+# Perfilado bajo demanda: va dentro de AuthMiddleware para conocer el usuario del token
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 # Agregamos el middleware de autenticación
 app.add_middleware(AuthMiddleware)
+# Contexto de diagnóstico: envuelve a AuthMiddleware para contar también sus consultas
+app.add_middleware(RequestContextMiddleware)
+# Métricas por ruta: se agrega último para que envuelva a los demás y mida el tiempo total
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 #Routas de la API
 app.include_router(default, prefix='', tags=['Rutas por Default'])
+app.include_router(monitoring, prefix='', tags=['Monitoreo'])
 
 app.include_router(roles, prefix="/roles", tags=["Roles"])
 app.include_router(users, prefix="/users", tags=["Users"])
@@ -157,6 +237,48 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 
+# Documentación precalculada: se arma una vez por root_path (al iniciar para la
+# raíz, o en el primer request detrás de un proxy con prefijo) y se sirve en
+# bytes con ETag. El root_path lo fija el servidor (uvicorn --root-path), así
+# que hay una sola entrada por despliegue.
+_docs = {}
+
+def build_docs(root_path: str = ''):
+    root_path = root_path.rstrip('/')
+    docs = _docs.get(root_path)
+    if docs is not None:
+        return docs
+    revalidate = 'no-cache'
+    schema = app.openapi()
+    # Igual que el /openapi.json de FastAPI: con prefijo, se anuncia como servidor
+    if root_path and app.root_path_in_servers and 'servers' not in schema:
+        schema = {**schema, 'servers': [{'url': root_path}]}
+    openapi_url = f"{root_path}/openapi.json"
+    docs = {
+        '/openapi.json': StaticPayload(encode_json(schema), 'application/json', revalidate),
+        '/docs': StaticPayload(get_swagger_ui_html(
+            openapi_url=openapi_url,
+            title=f"{app.title} - Swagger UI",
+            oauth2_redirect_url=f"{root_path}/docs/oauth2-redirect"
+        ).body, 'text/html; charset=utf-8', revalidate),
+        '/docs/oauth2-redirect': StaticPayload(
+            get_swagger_ui_oauth2_redirect_html().body, 'text/html; charset=utf-8', revalidate
+        ),
+        '/redoc': StaticPayload(
+            get_redoc_html(openapi_url=openapi_url, title=f"{app.title} - ReDoc").body,
+            'text/html; charset=utf-8', revalidate
+        ),
+    }
+    _docs[root_path] = docs
+    return docs
+
+async def _serve_docs(request: Request):
+    # La ruta sin el prefijo: request.url.path incluye el root_path
+    return build_docs(request.scope.get('root_path', ''))[request.scope['route'].path].response(request)
+
+for _path in ('/openapi.json', '/docs', '/docs/oauth2-redirect', '/redoc'):
+    app.add_api_route(_path, _serve_docs, methods=['GET'], include_in_schema=False)
+
 if __name__ == "__main__":
     import uvicorn
     import os
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks de las primitivas de autenticación que corren en cada request
+
+Primitivas:
+    is_public_route, should_check_permissions, normalize_path_for_permissions
+    (AuthMiddleware), verify_jwt_token, create_access_token, hash_password,
+    compare_password y PermisoService.user_has_permission contra una base
+    SQLite generada (la misma que usa benchmarks/load_test.py).
+
+Cada primitiva se mide con timeit: se calibra la cantidad de llamadas para que
+cada repetición dure al menos --min-time segundos y se toma la mejor de
+--repeat repeticiones (la menos afectada por ruido). El resultado se compara
+con la línea base guardada; si alguna primitiva es más lenta que la base por
+más de --tolerance (proporción) y además tarda más de --floor-us
+microsegundos por llamada, el comando termina con código 1.
+
+USO:
+    python benchmarks/auth_primitives.py                 # medir y comparar con la base
+    python benchmarks/auth_primitives.py --save          # guardar una nueva base
+    python benchmarks/auth_primitives.py --only verify_jwt_token,normalize_path_for_permissions
+    python benchmarks/auth_primitives.py --tolerance 0.5 --output results.json
+
+La línea base depende de la máquina: conviene regenerarla con --save en el
+equipo donde se comparan las corridas. Las primitivas de menos de un
+microsegundo varían hasta un 70% entre corridas en una máquina ocupada: por
+debajo de --floor-us (1 µs) no se cuentan como regresión, así el control queda
+en las que importan (JWT, bcrypt) y en las que pasen a tardar más de 1 µs.
+"""
+import sys
+import os
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCHMARKS_DIR))
+sys.path.append(BENCHMARKS_DIR)
+
+import argparse
+import json
+import platform
+import tempfile
+import timeit
+from datetime import datetime, timezone
+
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, 'baselines', 'auth_primitives.json')
+
+# Rutas representativas: públicas, con IDs a normalizar y de sistema
+SAMPLE_PATHS = [
+    ("/", "GET"),
+    ("/users/login", "POST"),
+    ("/users", "GET"),
+    ("/users/3f2b8c1e-9d4a-4c7b-8e21-6a5f0d9c1b2a", "PUT"),
+    ("/tasks/1234/assign", "POST"),
+    ("/tasks/board/pending", "GET"),
+    ("/permisos/ruta/users/metodo/GET", "GET"),
+    ("/metrics", "GET"),
+]
+
+
+def build_primitives(db_path):
+    """Preparar las funciones a medir (cada una recorre sus entradas de ejemplo)"""
+    from load_test import prepare_database, BENCHMARK_PASSWORD
+    if not os.path.exists(db_path):
+        prepare_database(users=20, tasks=100, seed=42)
+
+    from config.cnx import SessionLocal
+    from middlewares.auth import (
+        AuthMiddleware, verify_jwt_token, create_access_token, hash_password, compare_password
+    )
+    from permisos.services import PermisoService
+    from roles.model import Rol
+
+    middleware = AuthMiddleware(app=None)
+    paths = [path for path, _ in SAMPLE_PATHS]
+    payload = {"sub": "user0@scale.local", "user_id": "00000000-0000-4000-8000-000000000000",
+               "roles": ["Administrador"]}
+    token = create_access_token(payload)
+    password_hash = hash_password(BENCHMARK_PASSWORD)
+
+    db = SessionLocal()
+    admin_rol_id = db.query(Rol.rol_id).filter(Rol.rol_nombre == 'Administrador').scalar()
+    service = PermisoService(db)
+    permission_checks = [
+        (admin_rol_id, "/users", "GET"),
+        (admin_rol_id, "/tasks/{id}", "PATCH"),
+        (admin_rol_id, "/roles/{id}", "DELETE"),
+        (admin_rol_id, "/no/existe", "GET"),
+    ]
+
+    def is_public_route():
+        for path, method in SAMPLE_PATHS:
+            middleware.is_public_route(path, method)
+
+    def should_check_permissions():
+        for path in paths:
+            middleware.should_check_permissions(path)
+
+    def normalize_path_for_permissions():
+        for path in paths:
+            middleware.normalize_path_for_permissions(path)
+
+    def user_has_permission():
+        for rol_id, ruta, metodo in permission_checks:
+            service.user_has_permission(rol_id, ruta, metodo)
+
+    primitives = {
+        "is_public_route": (is_public_route, len(SAMPLE_PATHS)),
+        "should_check_permissions": (should_check_permissions, len(paths)),
+        "normalize_path_for_permissions": (normalize_path_for_permissions, len(paths)),
+        "verify_jwt_token": (lambda: verify_jwt_token(token), 1),
+        "create_access_token": (lambda: create_access_token(payload), 1),
+        "hash_password": (lambda: hash_password(BENCHMARK_PASSWORD), 1),
+        "compare_password": (lambda: compare_password(BENCHMARK_PASSWORD, password_hash), 1),
+        "user_has_permission": (user_has_permission, len(permission_checks)),
+    }
+    return primitives, db
+
+
+def measure(function, calls_per_run, repeat, min_time):
+    """Mejor tiempo por llamada en microsegundos"""
+    timer = timeit.Timer(function)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time:
+            break
+        number *= 2
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number / calls_per_run * 1e6, number
+
+
+def compare(results, baseline, tolerance, floor_us):
+    """Comparar con la base: {primitiva: {...}} y lista de regresiones"""
+    comparison = {}
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("primitives", {}).get(name)
+        if base is None:
+            comparison[name] = {**result, "baseline_us": None, "ratio": None, "status": "new"}
+            continue
+        ratio = result["per_call_us"] / base["per_call_us"]
+        if ratio <= 1 + tolerance:
+            status = "ok"
+        elif result["per_call_us"] < floor_us:
+            # Demasiado rápida para distinguir una regresión del ruido
+            status = "below_floor"
+        else:
+            status = "regression"
+        if status == "regression":
+            regressions.append(name)
+        comparison[name] = {**result, "baseline_us": base["per_call_us"], "ratio": round(ratio, 3), "status": status}
+    return comparison, regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmarks de las primitivas de autenticación")
+    parser.add_argument("--save", action="store_true", help="Guardar el resultado como nueva línea base")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Archivo de línea base")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Proporción de lentitud tolerada respecto de la base (0.5 = 50%%)")
+    parser.add_argument("--floor-us", type=float, default=1.0,
+                        help="Microsegundos por llamada por debajo de los cuales no se marca regresión")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Segundos mínimos por repetición")
+    parser.add_argument("--only", help="Primitivas separadas por coma")
+    parser.add_argument("--db", help="Archivo SQLite (por defecto uno temporal, generado)")
+    parser.add_argument("--output", help="Archivo JSON para guardar el resultado")
+    args = parser.parse_args()
+
+    db_path = os.path.abspath(args.db) if args.db else os.path.join(tempfile.mkdtemp(), 'auth_primitives.db')
+    os.environ['ENVIROMENT'] = 'dev'
+    os.environ['STRCNX'] = f'sqlite:///{db_path}'
+
+    primitives, db = build_primitives(db_path)
+    names = list(primitives)
+    if args.only:
+        names = [name.strip() for name in args.only.split(',') if name.strip()]
+        unknown = set(names) - set(primitives)
+        if unknown:
+            parser.error(f"Primitivas desconocidas: {', '.join(sorted(unknown))}")
+
+    results = {}
+    try:
+        for name in names:
+            function, calls_per_run = primitives[name]
+            per_call_us, number = measure(function, calls_per_run, args.repeat, args.min_time)
+            results[name] = {"per_call_us": round(per_call_us, 3), "calls_per_repeat": number * calls_per_run}
+    finally:
+        db.close()
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "primitives": results,
+    }
+
+    if args.save:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+        # Con --only se actualizan solo las primitivas medidas
+        report["primitives"] = {**baseline.get("primitives", {}), **results}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+            baseline_file.write('\n')
+        print(json.dumps(report, indent=2))
+        print(f"✓ Línea base guardada en {args.baseline}", file=sys.stderr)
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(json.dumps(report, indent=2))
+        print(f"⚠ No existe la línea base {args.baseline}; genere una con --save", file=sys.stderr)
+        sys.exit(0)
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    report["primitives"], regressions = compare(results, baseline, args.tolerance, args.floor_us)
+    report["tolerance"] = args.tolerance
+    report["floor_us"] = args.floor_us
+    report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    print(output)
+
+    if regressions:
+        print(f"✗ Regresiones (> {args.tolerance:.0%} sobre la base): {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+    print("✓ Sin regresiones respecto de la línea base", file=sys.stderr)
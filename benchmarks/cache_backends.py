@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Verificación y benchmark de los backends de caché (cache/)
+
+Para cada backend (memory y fakeredis; redis real con --redis-url):
+
+1. Contrato: get/set, lotes con claves faltantes, TTL, invalidación de
+   namespaces por versión y de entradas sueltas y, en memory, desalojo LRU. Si algo falla, el comando
+   termina con código 1.
+2. Tasa de aciertos con varios workers: --workers instancias leen las mismas
+   --keys claves de catálogo en orden aleatorio, cargando de la "base" en cada
+   fallo. Con memory cada worker tiene su caché y todos pagan el primer fallo;
+   con Redis la caché es una sola y la tasa es la misma para todos.
+3. Tiempo por operación de get_many/set_many de --batch claves.
+
+USO:
+    python benchmarks/cache_backends.py
+    python benchmarks/cache_backends.py --workers 8 --keys 500 --output results.json
+    python benchmarks/cache_backends.py --redis-url redis://localhost:6379/15
+"""
+import sys
+import os
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCHMARKS_DIR))
+
+import argparse
+import json
+import platform
+import random
+import time
+import timeit
+from datetime import datetime, timezone
+
+from cache import CacheNamespace
+from cache.backends import MemoryCache, RedisCache
+
+
+def make_backend(kind, redis_url=None):
+    if kind == 'memory':
+        return MemoryCache(max_entries=100000)
+    return RedisCache(redis_url if kind == 'redis' else 'fakeredis://', prefix='bench')
+
+
+def check_contract(backend):
+    """Lista de fallos del contrato común de los backends"""
+    failures = []
+
+    def expect(condition, message):
+        if not condition:
+            failures.append(message)
+
+    backend.clear()
+    namespace = CacheNamespace('contrato', ttl=60, backend=backend)
+    namespace.set('a', {"id": 1, "nombre": "uno"})
+    expect(namespace.get('a') == {"id": 1, "nombre": "uno"}, "get después de set")
+    expect(namespace.get('falta') is None, "get de una clave inexistente")
+
+    namespace.set_many({'b': [1, 2], 'c': "tres"})
+    expect(namespace.get_many(['a', 'b', 'c', 'falta']) == {'a': {"id": 1, "nombre": "uno"}, 'b': [1, 2], 'c': "tres"},
+           "get_many con claves faltantes")
+
+    version = namespace.version()
+    namespace.invalidate()
+    expect(namespace.version() == version + 1, "invalidate incrementa la versión")
+    expect(namespace.get_many(['a', 'b', 'c']) == {}, "invalidate descarta las entradas")
+
+    loads = []
+    namespace.get_or_load('d', lambda: loads.append(1) or "cargado")
+    expect(namespace.get_or_load('d', lambda: loads.append(1) or "otro") == "cargado" and len(loads) == 1,
+           "get_or_load carga una sola vez")
+
+    # Lo cargado con una versión anterior no aparece en la vigente
+    stale_version = namespace.version()
+    namespace.invalidate()
+    namespace.set('e', "viejo", version=stale_version)
+    expect(namespace.get('e') is None, "set con versión vieja no es visible")
+
+    namespace.get_or_load_item('perfil:1', lambda: "uno")
+    namespace.get_or_load_item('perfil:2', lambda: "dos")
+    namespace.invalidate_items(['perfil:1'])
+    expect(namespace.get_or_load_item('perfil:1', lambda: "uno nuevo") == "uno nuevo"
+           and namespace.get_or_load_item('perfil:2', lambda: "otro") == "dos",
+           "invalidate_items descarta solo las entradas indicadas")
+
+    namespace.set('ttl', "vence", ttl=1)
+    expect(namespace.get('ttl') == "vence", "valor con TTL antes de vencer")
+    time.sleep(1.1)
+    expect(namespace.get('ttl') is None, "valor con TTL vencido")
+
+    if isinstance(backend, MemoryCache):
+        small = MemoryCache(max_entries=3)
+        small.set_many({'k1': 1, 'k2': 2, 'k3': 3})
+        small.get_many(['k1'])
+        small.set_many({'k4': 4})
+        expect(set(small.get_many(['k1', 'k2', 'k3', 'k4'])) == {'k1', 'k3', 'k4'}, "desalojo LRU")
+        small.incr('version')
+        small.set_many({f"x{i}": i for i in range(10)})
+        expect(small.get_counters(['version']) == {'version': 1}, "los contadores no se desalojan")
+
+    backend.clear()
+    return failures
+
+
+def shared_hit_rate(kind, workers, keys, reads, redis_url=None, seed=42):
+    """Aciertos por worker leyendo el mismo catálogo"""
+    rng = random.Random(seed)
+    shared = make_backend(kind, redis_url)
+    shared.clear()
+    backends = [shared if kind != 'memory' else make_backend(kind) for _ in range(workers)]
+    namespaces = [CacheNamespace('catalogo', ttl=300, backend=backend) for backend in backends]
+    loads = [0] * workers
+    for _ in range(reads):
+        worker = rng.randrange(workers)
+        key = f"rol:{rng.randrange(keys)}"
+
+        def load(worker=worker, key=key):
+            loads[worker] += 1
+            return {"clave": key}
+
+        namespaces[worker].get_or_load(key, load)
+    per_worker = reads / workers
+    shared.clear()
+    return {
+        "database_loads": sum(loads),
+        "hit_rate": round(1 - sum(loads) / reads, 4),
+        "hit_rate_per_worker": [round(1 - count / per_worker, 4) for count in loads],
+    }
+
+
+def measure_batch(kind, batch, repeat, redis_url=None):
+    backend = make_backend(kind, redis_url)
+    namespace = CacheNamespace('lotes', ttl=300, backend=backend)
+    values = {f"rol:{i}": {"rol_id": i, "rol_nombre": f"Rol {i}", "rol_permisos": None} for i in range(batch)}
+    keys = list(values)
+    timings = {}
+    for name, function in (("set_many", lambda: namespace.set_many(values)),
+                           ("get_many", lambda: namespace.get_many(keys))):
+        timer = timeit.Timer(function)
+        number = max(1, timer.autorange()[0])
+        timings[f"{name}_us"] = round(min(timer.repeat(repeat=repeat, number=number)) / number * 1e6, 1)
+    backend.clear()
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verificación y benchmark de los backends de caché")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--keys", type=int, default=200, help="Claves distintas del catálogo")
+    parser.add_argument("--reads", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=100, help="Claves por get_many/set_many")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--redis-url", help="Probar también un Redis real (se borran las claves bench:*)")
+    parser.add_argument("--output", help="Archivo JSON para guardar el resultado")
+    args = parser.parse_args()
+
+    kinds = ['memory', 'fakeredis'] + (['redis'] if args.redis_url else [])
+    results = {}
+    failures = []
+    for kind in kinds:
+        contract = check_contract(make_backend(kind, args.redis_url))
+        failures.extend(f"{kind}: {failure}" for failure in contract)
+        results[kind] = {
+            "contract": "ok" if not contract else contract,
+            "workers": shared_hit_rate(kind, args.workers, args.keys, args.reads, args.redis_url),
+            "batch": measure_batch(kind, args.batch, args.repeat, args.redis_url),
+        }
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "workers": args.workers,
+        "keys": args.keys,
+        "reads": args.reads,
+        "batch": args.batch,
+        "results": results,
+        "failures": failures,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    print(output)
+
+    if failures:
+        print(f"✗ Fallos del contrato: {'; '.join(failures)}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✓ Contrato verificado en {', '.join(kinds)}", file=sys.stderr)
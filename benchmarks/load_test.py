@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de la API con perfiles de escenario
+
+Escenarios:
+    login   Tormenta de logins (POST /users/login, bcrypt en cada request)
+    reads   Lecturas de listados (GET /users, GET /tasks)
+    crud    Alta, cambio de estado, asignación/desasignación y baja de tareas
+    admin   Tráfico administrativo con verificación de permisos en cada request
+            (token con rol_id: roles, usuarios y estadísticas)
+
+Por defecto la app corre en proceso (httpx + ASGITransport) contra una base
+SQLite generada en un directorio temporal, sin red. Con --url se usa un
+uvicorn local, que debe apuntar a una base preparada con --prepare-only y
+compartir SECRET_KEY (los tokens se firman en este proceso).
+
+El resultado (throughput, percentiles de latencia por escenario y por
+endpoint, códigos de estado) se imprime en JSON o se guarda con --output para
+comparar corridas entre commits.
+
+USO:
+    python benchmarks/load_test.py --scenarios reads,crud --concurrency 20 --duration 10
+    python benchmarks/load_test.py --output results.json --users 500 --tasks 5000
+    python benchmarks/load_test.py --db /tmp/bench.db --prepare-only
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --db /tmp/bench.db
+"""
+import sys
+import os
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, 'seeders'))
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+SCENARIOS = ('login', 'reads', 'crud', 'admin')
+TASK_STATES = ('pending', 'in-progress', 'completed')
+# Contraseña de los usuarios generados por seeders/seed_scale.py
+BENCHMARK_PASSWORD = 'scale123'
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def latency_summary(latencies):
+    if not latencies:
+        return {}
+    return {
+        "mean": round(statistics.mean(latencies), 3),
+        "p50": round(percentile(latencies, 0.50), 3),
+        "p90": round(percentile(latencies, 0.90), 3),
+        "p95": round(percentile(latencies, 0.95), 3),
+        "p99": round(percentile(latencies, 0.99), 3),
+        "max": round(max(latencies), 3),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# === Base de datos de prueba ===
+
+def prepare_database(users: int, tasks: int, seed: int):
+    """Cargar roles y permisos con los seeders y generar los datos con seed_scale
+
+    seed_scale genera una cantidad fija de tareas por usuario, por lo que se
+    generan aproximadamente `tasks` tareas (al menos una por usuario).
+    """
+    import app  # Crea las tablas
+    from seed_roles import seed_roles
+    from seed_permisos import seed_permisos
+    from seed_rol_permisos import seed_rol_permisos
+    from seed_scale import seed_scale
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        seed_roles()
+        seed_permisos()
+        seed_rol_permisos()
+        return seed_scale(users, tasks_per_user=max(1, tasks // users), seed=seed)
+
+
+def load_fixture():
+    """Leer de la base los datos que necesitan los escenarios"""
+    import app  # Registra todos los modelos
+    from config.cnx import SessionLocal
+    from roles.model import Rol
+    from users.model import User
+    from seed_scale import SCALE_EMAIL_DOMAIN
+
+    db = SessionLocal()
+    try:
+        admin = db.query(Rol).filter(Rol.rol_nombre == 'Administrador').first()
+        users = db.query(User.id, User.emails).filter(User.emails.like(f'%@{SCALE_EMAIL_DOMAIN}')).all()
+        return {
+            "admin_rol_id": admin.rol_id,
+            "users": [{"id": user_id, "email": email} for user_id, email in users],
+        }
+    finally:
+        db.close()
+
+
+# === Escenarios ===
+
+class Recorder:
+    """Latencias y códigos de estado de un escenario"""
+
+    def __init__(self):
+        self.latencies = []
+        self.by_endpoint = {}
+        self.endpoint_errors = {}
+        self.status = {}
+        self.errors = 0
+
+    async def request(self, client, name, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            self.errors += 1
+            self.endpoint_errors[name] = self.endpoint_errors.get(name, 0) + 1
+            return None
+        elapsed = (time.perf_counter() - start) * 1000
+        self.latencies.append(elapsed)
+        self.by_endpoint.setdefault(name, []).append(elapsed)
+        self.status[response.status_code] = self.status.get(response.status_code, 0) + 1
+        if response.status_code >= 400:
+            self.errors += 1
+            self.endpoint_errors[name] = self.endpoint_errors.get(name, 0) + 1
+        return response
+
+
+async def step_login(client, recorder, fixture, rng):
+    user = rng.choice(fixture["users"])
+    await recorder.request(client, 'POST /users/login', 'POST', '/users/login',
+                           json={"emails": user["email"], "password": BENCHMARK_PASSWORD})
+
+
+async def step_reads(client, recorder, fixture, rng):
+    headers = fixture["user_headers"]
+    await recorder.request(client, 'GET /users', 'GET', '/users', headers=headers)
+    await recorder.request(client, 'GET /tasks', 'GET', '/tasks', headers=headers)
+
+
+async def step_crud(client, recorder, fixture, rng):
+    headers = fixture["user_headers"]
+    owner, other = rng.sample(fixture["users"], 2)
+    response = await recorder.request(client, 'POST /tasks', 'POST', '/tasks', headers=headers, json={
+        "title": f"Carga {rng.random():.6f}", "description": "crud", "user_id": owner["id"]
+    })
+    if response is None or response.status_code != 201:
+        return
+    task_id = response.json()["id"]
+    await recorder.request(client, 'PATCH /tasks/{task_id}', 'PATCH', f'/tasks/{task_id}',
+                           headers=headers, json={"state": rng.choice(TASK_STATES)})
+    await recorder.request(client, 'POST /tasks/{task_id}/assign', 'POST', f'/tasks/{task_id}/assign',
+                           headers=headers, json={"user_id": other["id"]})
+    await recorder.request(client, 'DELETE /tasks/{task_id}/assign/{user_id}', 'DELETE',
+                           f'/tasks/{task_id}/assign/{other["id"]}', headers=headers)
+    await recorder.request(client, 'DELETE /tasks/{task_id}', 'DELETE', f'/tasks/{task_id}', headers=headers)
+
+
+async def step_admin(client, recorder, fixture, rng):
+    headers = fixture["admin_headers"]
+    user = rng.choice(fixture["users"])
+    await recorder.request(client, 'GET /roles', 'GET', '/roles', headers=headers)
+    await recorder.request(client, 'GET /roles/{rol_id}', 'GET', f'/roles/{fixture["admin_rol_id"]}', headers=headers)
+    await recorder.request(client, 'GET /users/{user_id}', 'GET', f'/users/{user["id"]}', headers=headers)
+    await recorder.request(client, 'GET /users/deleted', 'GET', '/users/deleted', headers=headers)
+    await recorder.request(client, 'GET /tasks/stats', 'GET', '/tasks/stats', headers=headers)
+
+
+STEPS = {"login": step_login, "reads": step_reads, "crud": step_crud, "admin": step_admin}
+
+
+async def run_scenario(client, name, fixture, concurrency, duration, warmup, seed):
+    step = STEPS[name]
+
+    async def worker(recorder, deadline, worker_seed):
+        rng = random.Random(worker_seed)
+        while time.perf_counter() < deadline:
+            await step(client, recorder, fixture, rng)
+
+    if warmup > 0:
+        deadline = time.perf_counter() + warmup
+        await asyncio.gather(*(worker(Recorder(), deadline, seed + i) for i in range(concurrency)))
+
+    recorder = Recorder()
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(worker(recorder, deadline, seed + i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(recorder.latencies),
+        "errors": recorder.errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(recorder.latencies) / elapsed, 2),
+        "latency_ms": latency_summary(recorder.latencies),
+        "by_endpoint": {
+            endpoint: {
+                "requests": len(values),
+                "errors": recorder.endpoint_errors.get(endpoint, 0),
+                **latency_summary(values)
+            }
+            for endpoint, values in sorted(
+                (name, recorder.by_endpoint.get(name, []))
+                for name in set(recorder.by_endpoint) | set(recorder.endpoint_errors)
+            )
+        },
+        "status": {str(code): count for code, count in sorted(recorder.status.items())},
+    }
+
+
+async def run(args, fixture):
+    import httpx
+    from middlewares.auth import create_access_token
+
+    admin = fixture["users"][0]
+    member = fixture["users"][1]
+    fixture["admin_headers"] = {"Authorization": "Bearer " + create_access_token({
+        "sub": admin["email"], "user_id": admin["id"], "roles": ["Administrador"],
+        "rol_id": fixture["admin_rol_id"],
+    })}
+    fixture["user_headers"] = {"Authorization": "Bearer " + create_access_token({
+        "sub": member["email"], "user_id": member["id"], "roles": ["Empleado"],
+    })}
+
+    results = {}
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+            for name in args.scenarios:
+                results[name] = await run_scenario(client, name, fixture, args.concurrency,
+                                                   args.duration, args.warmup, args.seed)
+    else:
+        from app import app
+        transport = httpx.ASGITransport(app=app)
+        # ASGITransport no ejecuta el lifespan (límite del threadpool, monitor del loop)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+                for name in args.scenarios:
+                    results[name] = await run_scenario(client, name, fixture, args.concurrency,
+                                                       args.duration, args.warmup, args.seed)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API con perfiles de escenario")
+    parser.add_argument("--scenarios", default=','.join(SCENARIOS),
+                        help=f"Escenarios separados por coma ({', '.join(SCENARIOS)})")
+    parser.add_argument("--concurrency", type=int, default=10, help="Clientes concurrentes por escenario")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos medidos por escenario")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Segundos de calentamiento no medidos")
+    parser.add_argument("--users", type=int, default=200, help="Usuarios a generar")
+    parser.add_argument("--tasks", type=int, default=2000, help="Tareas a generar")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla para datos y tráfico reproducibles")
+    parser.add_argument("--db", help="Archivo SQLite (por defecto uno temporal, generado)")
+    parser.add_argument("--prepare-only", action="store_true", help="Solo generar la base en --db")
+    parser.add_argument("--url", help="URL de un uvicorn local en lugar de la app en proceso")
+    parser.add_argument("--output", help="Archivo JSON para guardar el resultado")
+    args = parser.parse_args()
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Escenarios desconocidos: {', '.join(sorted(unknown))}")
+    if args.prepare_only and not args.db:
+        parser.error("--prepare-only requiere --db")
+
+    db_path = os.path.abspath(args.db) if args.db else os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+    generate = not os.path.exists(db_path)
+    if args.url and generate:
+        parser.error("Con --url, --db debe ser la base ya preparada que usa el servidor")
+
+    # La configuración se lee al importar los módulos del proyecto
+    os.environ['ENVIROMENT'] = 'dev'
+    os.environ['STRCNX'] = f'sqlite:///{db_path}'
+
+    prepare_seconds = None
+    if generate:
+        start = time.perf_counter()
+        prepare_database(args.users, args.tasks, args.seed)
+        prepare_seconds = round(time.perf_counter() - start, 2)
+    if args.prepare_only:
+        print(json.dumps({"db": db_path, "prepare_seconds": prepare_seconds}, indent=2))
+        sys.exit(0)
+
+    fixture = load_fixture()
+    if len(fixture["users"]) < 2:
+        sys.exit("La base no tiene usuarios generados a escala (*@scale.local)")
+
+    result = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "target": args.url or "in-process",
+        "db": db_path,
+        "prepare_seconds": prepare_seconds,
+        "parameters": {
+            "concurrency": args.concurrency, "duration": args.duration, "warmup": args.warmup,
+            "users": len(fixture["users"]), "seed": args.seed,
+        },
+        "scenarios": asyncio.run(run(args, fixture)),
+    }
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    print(output)
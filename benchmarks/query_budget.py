@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Presupuesto de consultas SQL y planes de ejecución por endpoint
+
+Recorre todas las rutas de users, tasks, roles y permisos contra una base
+generada con seeders/seed_scale.py y, para cada llamada, verifica:
+
+- Cantidad de consultas: el header X-DB-Queries (monitoring.queries, contado
+  en el RequestContext del request) no puede superar el máximo del caso. Los
+  máximos no dependen de la cantidad de filas, así que un N+1 falla enseguida.
+- Planes: cada SELECT / UPDATE / DELETE ejecutado se pasa por EXPLAIN QUERY
+  PLAN; un SCAN (recorrido completo de tabla o de índice) solo se acepta sobre
+  las tablas declaradas en el caso o sobre los catálogos chicos.
+
+GET /tasks/events (stream SSE sin fin) queda afuera.
+
+Los requests usan un token sin rol_id (como el del login), así que no incluyen
+la verificación de permisos de AuthMiddleware: se mide solo el endpoint.
+
+Los casos marcados con known_issue se informan pero no hacen fallar la
+corrida; al corregir el problema se quita la marca.
+
+USO:
+    python benchmarks/query_budget.py                       # base temporal de 200 usuarios
+    python benchmarks/query_budget.py --users 2000 --tasks 20000
+    python benchmarks/query_budget.py --db /tmp/scale.db    # copia de una base ya generada
+    python benchmarks/query_budget.py --only "GET /tasks,GET /users/me" --verbose
+
+GET /users y GET /tasks devuelven la tabla completa: con millones de filas
+esos dos casos tardan minutos (los conteos son los mismos con 200 usuarios
+que con 5.000 usuarios y 100.000 tareas).
+"""
+import sys
+import os
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCHMARKS_DIR))
+sys.path.append(BENCHMARKS_DIR)
+
+import argparse
+import json
+import re
+import shutil
+import tempfile
+
+# Tablas de catálogo: pocas filas, se pueden recorrer completas en cualquier caso
+CATALOG_TABLES = {'roles', 'permisos', 'rol_permiso', 'cache_versions'}
+
+# Estados HTTP esperados si el caso no indica otro
+OK_STATUSES = range(200, 300)
+
+_SCAN_PATTERN = re.compile(r'^SCAN (\w+)')
+_EXPLAINED_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+
+
+def case(method, path, max_queries, scans=(), json_body=None, params=None, capture=None,
+         status=None, known_issue=None):
+    """Un llamado a medir.
+
+    path, json_body y params admiten campos {nombre} que se completan con los
+    valores capturados de respuestas anteriores (capture={"nombre": "campo"}).
+    Sin status, se espera cualquier estado 2xx.
+    """
+    return {
+        "name": f"{method} {path}",
+        "method": method,
+        "path": path,
+        "max_queries": max_queries,
+        "scans": set(scans),
+        "json": json_body,
+        "params": params,
+        "capture": capture or {},
+        "status": status,
+        "known_issue": known_issue,
+    }
+
+
+# Orden de ejecución: los altas capturan los ids que usan los casos siguientes
+CASES = [
+    # === Users ===
+    case("GET", "/users", 1, scans={'users', 'tasks', 'user_task_association', 'user_rol_association'}),
+    case("GET", "/users/simple", 1, scans={'users', 'user_rol_association'}),
+    case("GET", "/users/deleted", 1, scans={'users', 'tasks', 'user_task_association', 'user_rol_association'}),
+    case("GET", "/users/me", 3),
+    # Segunda lectura: el perfil sale de la caché (users/cache.py)
+    case("GET", "/users/me", 0),
+    case("GET", "/users/{user_id}", 3),
+    case("POST", "/users", 3, json_body={
+        "firstName": "Presupuesto", "lastName": "Consultas", "emails": "budget@scale.local",
+        "password": "budget123", "ages": 30,
+    }, capture={"new_user_id": "id"}),
+    case("POST", "/users/login", 2, json_body={"emails": "budget@scale.local", "password": "budget123"}),
+    case("PUT", "/users/{new_user_id}", 10, json_body={
+        "firstName": "Presupuesto", "lastName": "Editado", "emails": "budget@scale.local", "ages": 31,
+    }),
+    case("POST", "/users/{new_user_id}/roles", 7, json_body={"role_name": "Gerente"}),
+    case("DELETE", "/users/{new_user_id}/roles/Gerente", 7),
+    case("DELETE", "/users/{new_user_id}", 3),
+    case("POST", "/users/{new_user_id}/restore", 8),
+
+    # === Tasks ===
+    case("GET", "/tasks", 1, scans={'tasks', 'user_task_association', 'users'}),
+    # Segunda lectura: el cuerpo ya serializado sale de cache/responses.py
+    case("GET", "/tasks", 0),
+    case("GET", "/tasks/stats", 1, scans={'task_stats'}),
+    case("GET", "/tasks/changes", 1, params={"since": 0, "limit": 100}),
+    case("GET", "/tasks/board", 3),
+    case("GET", "/tasks/board/pending", 3),
+    case("GET", "/tasks/user/{user_id}", 3),
+    case("POST", "/tasks", 15, json_body={
+        "title": "Presupuesto de consultas", "description": "Tarea de query_budget", "state": "pending",
+        "user_id": "{user_id}",
+    }, capture={"task_id": "id"}),
+    case("GET", "/tasks/{task_id}", 2),
+    case("PUT", "/tasks/{task_id}", 12, json_body={"title": "Presupuesto editado", "state": "in-progress"}),
+    case("PATCH", "/tasks/{task_id}", 12, json_body={"state": "completed"}),
+    case("PATCH", "/tasks/{task_id}/move", 8, json_body={"user_id": "{user_id}"}),
+    case("POST", "/tasks/{task_id}/assign", 14, json_body={"user_id": "{new_user_id}"}),
+    case("DELETE", "/tasks/{task_id}/assign/{new_user_id}", 11),
+    case("DELETE", "/tasks/{task_id}", 9),
+
+    # === Roles ===
+    case("GET", "/roles", 1),
+    case("GET", "/roles/{admin_rol_id}", 1),
+    case("POST", "/roles", 3, json_body={"rol_nombre": "Presupuesto", "rol_permisos": ""},
+         capture={"new_rol_id": "rol_id"}),
+    case("PATCH", "/roles/{new_rol_id}", 4, json_body={"rol_permisos": "read"}),
+    case("DELETE", "/roles/{new_rol_id}", 6),
+
+    # === Permisos ===
+    case("GET", "/permisos/", 1),
+    case("POST", "/permisos/", 4, json_body={
+        "permiso_nombre": "budget.ver", "permiso_ruta": "/budget", "permiso_metodo": "GET",
+        "permiso_descripcion": "Permiso de query_budget",
+    }, capture={"permiso_id": "permiso_id"}),
+    case("GET", "/permisos/{permiso_id}", 2),
+    case("PUT", "/permisos/{permiso_id}", 4, json_body={"permiso_descripcion": "Editado"}),
+    # Las rutas guardadas empiezan con "/" y no pueden viajar en un segmento: se mide la búsqueda sin resultado
+    case("GET", "/permisos/ruta/users/metodo/GET", 1, status=404),
+    # Asignar reemplaza los permisos del rol: se usa el rol recién creado para no tocar al Administrador
+    case("POST", "/roles", 3, json_body={"rol_nombre": "Presupuesto permisos", "rol_permisos": ""},
+         capture={"permisos_rol_id": "rol_id"}),
+    case("POST", "/permisos/rol/assign", 5,
+         json_body={"rol_id": "{permisos_rol_id}", "permiso_ids": ["{permiso_id}", 1, 2, 3]}),
+    case("POST", "/permisos/rol/remove", 3, json_body={"rol_id": "{permisos_rol_id}", "permiso_ids": ["{permiso_id}"]}),
+    case("GET", "/permisos/rol/{admin_rol_id}", 1),
+    case("GET", "/permisos/usuario/{admin_rol_id}/permisos", 1),
+    # Las verificaciones usan la matriz compilada: 0 consultas, o 2 si hay que
+    # recompilarla tras un cambio de permisos o roles
+    case("POST", "/permisos/usuario/verify", 2,
+         params={"user_rol_id": "{admin_rol_id}", "ruta": "/users", "metodo": "GET"}),
+    case("POST", "/permisos/usuario/verify/batch", 2,
+         json_body={"user_rol_id": "{admin_rol_id}", "checks": [
+             {"ruta": "/users", "metodo": "GET"}, {"ruta": "/users", "metodo": "POST"},
+             {"ruta": "/tasks/{{id}}", "metodo": "PATCH"}, {"ruta": "/roles/{{id}}", "metodo": "DELETE"},
+         ]}),
+    case("DELETE", "/permisos/{permiso_id}", 4),
+]
+
+
+def _fill(value, values):
+    """Completar los {campos} de rutas, cuerpos y parámetros con los valores capturados"""
+    if isinstance(value, str):
+        match = re.fullmatch(r'\{(\w+)\}', value)
+        if match:
+            return values[match.group(1)]
+        return value.format(**values)
+    if isinstance(value, list):
+        return [_fill(item, values) for item in value]
+    if isinstance(value, dict):
+        return {key: _fill(item, values) for key, item in value.items()}
+    return value
+
+
+def scanned_tables(connection, statement, parameters, known_tables):
+    """Tablas del modelo recorridas completas según EXPLAIN QUERY PLAN.
+
+    Los SCAN de subconsultas (anon_1) y de joins materializados no son tablas;
+    lo que se materializó se ve en el SCAN de la tabla real dentro del MATERIALIZE.
+    """
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    tables = set()
+    for row in rows:
+        match = _SCAN_PATTERN.match(row[-1])
+        if match:
+            # Los alias anónimos de SQLAlchemy terminan en _1, _2, ...
+            table = re.sub(r'_\d+$', '', match.group(1))
+            if table in known_tables:
+                tables.add(table)
+    return tables, [row[-1] for row in rows]
+
+
+def run(cases, verbose=False):
+    """Ejecutar los casos en orden y devolver el resultado de cada uno"""
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app import app
+    from config.basemodel import Base
+    from config.cnx import engine
+    from middlewares.auth import create_access_token
+    from load_test import load_fixture
+
+    fixture = load_fixture()
+    user = fixture["users"][0]
+    token = create_access_token({"sub": user["email"], "user_id": user["id"], "roles": ["Administrador"]})
+    headers = {"Authorization": f"Bearer {token}"}
+    values = {"user_id": user["id"], "admin_rol_id": fixture["admin_rol_id"]}
+
+    known_tables = set(Base.metadata.tables)
+    statements = []
+
+    def capture_statement(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', capture_statement)
+    results = []
+    try:
+        with TestClient(app, raise_server_exceptions=False) as client, engine.connect() as explain_connection:
+            for current in cases:
+                statements.clear()
+                path = _fill(current["path"], values)
+                response = client.request(
+                    current["method"], path, headers=headers,
+                    json=_fill(current["json"], values), params=_fill(current["params"], values),
+                )
+                captured = list(statements)
+                query_count = int(response.headers.get("X-DB-Queries", len(captured)))
+
+                problems = []
+                expected_status = [current["status"]] if current["status"] else OK_STATUSES
+                if response.status_code not in expected_status:
+                    problems.append(f"estado {response.status_code}")
+                if query_count > current["max_queries"]:
+                    problems.append(f"{query_count} consultas (máximo {current['max_queries']})")
+
+                plans = []
+                allowed_scans = current["scans"] | CATALOG_TABLES
+                for statement, parameters in captured:
+                    if not statement.lstrip().upper().startswith(_EXPLAINED_STATEMENTS):
+                        continue
+                    try:
+                        tables, plan = scanned_tables(explain_connection, statement, parameters, known_tables)
+                    except Exception as e:
+                        # La consulta falló también en el request (por ejemplo, tabla inexistente)
+                        explain_connection.rollback()
+                        tables, plan = set(), [f"sin plan: {str(e).splitlines()[0]}"]
+                    plans.append({"sql": ' '.join(statement.split()), "plan": plan})
+                    for table in sorted(tables - allowed_scans):
+                        problems.append(f"SCAN de {table}: {' '.join(statement.split())[:120]}")
+
+                if response.status_code in OK_STATUSES:
+                    for value_name, field in current["capture"].items():
+                        values[value_name] = response.json()[field]
+
+                status = "ok" if not problems else ("known" if current["known_issue"] else "fail")
+                result = {
+                    "endpoint": current["name"],
+                    "status": status,
+                    "http_status": response.status_code,
+                    "queries": query_count,
+                    "max_queries": current["max_queries"],
+                    "problems": problems,
+                }
+                if current["known_issue"] and problems:
+                    result["known_issue"] = current["known_issue"]
+                if verbose:
+                    result["statements"] = plans
+                results.append(result)
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture_statement)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Presupuesto de consultas SQL y planes por endpoint")
+    parser.add_argument("--users", type=int, default=200, help="Usuarios a generar")
+    parser.add_argument("--tasks", type=int, default=2000, help="Tareas a generar")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de los datos generados")
+    parser.add_argument("--db", help="Base SQLite ya generada con seed_main.py --scale (se usa una copia)")
+    parser.add_argument("--only", help="Casos separados por coma, por ejemplo 'GET /tasks,GET /roles'")
+    parser.add_argument("--verbose", action="store_true", help="Incluir consultas y planes en el resultado")
+    parser.add_argument("--output", help="Archivo JSON para guardar el resultado")
+    args = parser.parse_args()
+
+    # Los casos modifican datos: siempre se trabaja sobre una base temporal
+    db_path = os.path.join(tempfile.mkdtemp(), 'query_budget.db')
+    if args.db:
+        shutil.copyfile(args.db, db_path)
+    os.environ['ENVIROMENT'] = 'dev'
+    os.environ['STRCNX'] = f'sqlite:///{db_path}'
+    os.environ['DB_DEBUG_HEADERS'] = 'true'
+    # La consulta periódica de cache_versions corre fuera de los requests y
+    # ensuciaría las consultas capturadas para los planes
+    os.environ['CACHE_VERSION_POLL_SECONDS'] = '0'
+
+    if not args.db:
+        from load_test import prepare_database
+        prepare_database(args.users, args.tasks, args.seed)
+
+    selected = CASES
+    if args.only:
+        names = [name.strip() for name in args.only.split(',') if name.strip()]
+        unknown = set(names) - {current["name"] for current in CASES}
+        if unknown:
+            parser.error(f"Casos desconocidos: {', '.join(sorted(unknown))}")
+        selected = [current for current in CASES if current["name"] in names]
+
+    results = run(selected, verbose=args.verbose)
+    failures = [result["endpoint"] for result in results if result["status"] == "fail"]
+    report = {
+        "db": args.db or f"generada ({args.users} usuarios, {args.tasks} tareas)",
+        "results": results,
+        "failures": failures,
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    print(output)
+
+    known = sum(1 for result in results if result["status"] == "known")
+    if failures:
+        print(f"✗ {len(failures)} endpoints fuera de presupuesto: {', '.join(failures)}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✓ {len(results)} endpoints dentro del presupuesto ({known} con problemas conocidos)", file=sys.stderr)
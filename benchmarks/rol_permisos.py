@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la lectura de permisos de roles con cientos de permisos
+
+Para cada tamaño de --permissions crea un rol con esa cantidad de permisos
+activos y mide PermisoService.get_rol_permisos (GET /permisos/rol/{id}) y
+PermisoService.get_user_permissions (GET /permisos/usuario/{id}/permisos):
+tiempo por llamada (mejor de --repeat repeticiones, con timeit) y consultas
+SQL por llamada, contadas por monitoring.queries en un RequestContext.
+
+También mide PermisoService.assign_permisos_to_rol (POST /permisos/rol/assign)
+alternando el rol entre dos conjuntos que difieren en un 10% de los permisos:
+solo se aplican esas diferencias, con un DELETE y un INSERT executemany.
+
+Las lecturas deben costar una sola consulta y la asignación a lo sumo
+MAX_ASSIGN_QUERIES, sin importar la cantidad de permisos; si no, el comando
+termina con código 1.
+
+USO:
+    python benchmarks/rol_permisos.py
+    python benchmarks/rol_permisos.py --permissions 100,500,2000 --output results.json
+"""
+import sys
+import os
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCHMARKS_DIR))
+sys.path.append(BENCHMARKS_DIR)
+
+import argparse
+import json
+import platform
+import tempfile
+import timeit
+from datetime import datetime, timezone
+
+METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+MAX_QUERIES_PER_CALL = 1
+# Rol, validación de permisos, asignaciones actuales, DELETE, INSERT y versión de caché
+MAX_ASSIGN_QUERIES = 6
+
+
+def create_role(db, size, spare=0):
+    """Crear un rol con `size` permisos activos más `spare` permisos sin asignar.
+
+    Devuelve el id del rol, los ids asignados y los ids libres.
+    """
+    from sqlalchemy import insert
+    from config.associations import rol_permiso_association
+    from permisos.model import Permiso
+    from roles.model import Rol
+
+    now = datetime.now()
+    rol = Rol(rol_nombre=f"Benchmark {size} permisos", rol_permisos="", created_at=now, updated_at=now)
+    db.add(rol)
+    db.flush()
+    first_id = (db.query(Permiso.permiso_id).order_by(Permiso.permiso_id.desc()).limit(1).scalar() or 0) + 1
+    db.execute(insert(Permiso.__table__), [
+        {
+            "permiso_id": first_id + i,
+            "permiso_nombre": f"bench.{size}.{i}",
+            "permiso_ruta": f"/bench/{size}/{i // len(METHODS)}",
+            "permiso_metodo": METHODS[i % len(METHODS)],
+            "permiso_descripcion": "Permiso generado para el benchmark",
+            "permiso_activo": True,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(size + spare)
+    ])
+    db.execute(insert(rol_permiso_association), [
+        {"rol_id": rol.rol_id, "permiso_id": first_id + i, "created_at": now} for i in range(size)
+    ])
+    db.commit()
+    ids = list(range(first_id, first_id + size + spare))
+    return rol.rol_id, ids[:size], ids[size:]
+
+
+def count_queries(function):
+    """Consultas SQL que hace una llamada, contadas como en un request"""
+    from monitoring.request_context import RequestContext, current_request
+
+    request = RequestContext({"type": "http", "method": "GET", "path": "/benchmark"})
+    token = current_request.set(request)
+    try:
+        function()
+    finally:
+        current_request.reset(token)
+    return request.query_count
+
+
+def measure(function, repeat, min_time):
+    """Mejor tiempo por llamada en milisegundos"""
+    timer = timeit.Timer(function)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lectura de permisos de roles con muchos permisos")
+    parser.add_argument("--permissions", default="10,100,500,1000",
+                        help="Cantidades de permisos por rol, separadas por coma")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Segundos mínimos por repetición")
+    parser.add_argument("--output", help="Archivo JSON para guardar el resultado")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.permissions.split(',') if size.strip()]
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'rol_permisos.db')
+    os.environ['ENVIROMENT'] = 'dev'
+    os.environ['STRCNX'] = f'sqlite:///{db_path}'
+
+    from load_test import prepare_database
+    prepare_database(users=20, tasks=100, seed=42)
+
+    from config.cnx import SessionLocal
+    from permisos.dto import RolPermisoAssign
+    from permisos.services import PermisoService
+
+    db = SessionLocal()
+    results = {}
+    failures = []
+    try:
+        service = PermisoService(db)
+        for size in sizes:
+            changed = max(1, size // 10)
+            rol_id, assigned, spare = create_role(db, size, spare=changed)
+            readers = {
+                "get_rol_permisos": lambda: service.get_rol_permisos(rol_id),
+                "get_user_permissions": lambda: service.get_user_permissions(rol_id),
+            }
+            for name, function in readers.items():
+                returned = function()
+                returned = len(returned["permisos"] if isinstance(returned, dict) else returned)
+                queries = count_queries(function)
+                # Sin objetos en la sesión, cada llamada hidrata los permisos desde cero
+                db.expunge_all()
+                results.setdefault(name, {})[size] = {
+                    "per_call_ms": round(measure(lambda: (function(), db.expunge_all()), args.repeat, args.min_time), 3),
+                    "queries": queries,
+                    "permissions": returned,
+                }
+                if queries > MAX_QUERIES_PER_CALL or returned != size:
+                    failures.append(f"{name}[{size}]")
+
+            # Alternar entre dos conjuntos: cada llamada quita y agrega `changed` permisos
+            variants = [
+                RolPermisoAssign(rol_id=rol_id, permiso_ids=assigned),
+                RolPermisoAssign(rol_id=rol_id, permiso_ids=assigned[changed:] + spare),
+            ]
+            calls = [0]
+
+            def assign():
+                calls[0] += 1
+                return service.assign_permisos_to_rol(variants[calls[0] % 2])
+
+            queries = count_queries(assign)
+            results.setdefault("assign_permisos_to_rol", {})[size] = {
+                "per_call_ms": round(measure(assign, args.repeat, args.min_time), 3),
+                "queries": queries,
+                "changed_per_call": 2 * changed,
+            }
+            if queries > MAX_ASSIGN_QUERIES:
+                failures.append(f"assign_permisos_to_rol[{size}]")
+    finally:
+        db.close()
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "max_queries_per_call": MAX_QUERIES_PER_CALL,
+        "max_assign_queries": MAX_ASSIGN_QUERIES,
+        "results": results,
+        "failures": failures,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    print(output)
+
+    if failures:
+        print(f"✗ Fuera del máximo de consultas o con permisos faltantes: {', '.join(failures)}", file=sys.stderr)
+        sys.exit(1)
+    print("✓ Consultas constantes en todos los tamaños", file=sys.stderr)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga del stream SSE de tareas con miles de suscriptores inactivos
+
+Modos:
+    hub   Suscriptores en proceso contra tasks.events.hub (no requiere servidor)
+    http  Conexiones SSE reales contra un uvicorn local
+
+USO:
+    python benchmarks/sse_idle_subscribers.py hub --subscribers 5000 --events 50
+    python benchmarks/sse_idle_subscribers.py http --url http://127.0.0.1:8000 --token <JWT> --task-id 1
+
+En modo http, el script abre las conexiones, espera a que queden inactivas y
+luego cambia el estado de --task-id para medir cuánto tarda el evento en
+llegar a todos los suscriptores.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+import tracemalloc
+from urllib.parse import urlparse
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_hub(subscribers: int, events: int):
+    """Medir memoria por suscriptor y latencia de difusión en proceso"""
+    from tasks.events import hub
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    subscriptions = [hub.subscribe(None) for _ in range(subscribers)]
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    latencies = []
+    for seq in range(1, events + 1):
+        task_event = {"seq": seq, "op": "updated", "task_id": 1, "user_id": None,
+                      "user_ids": [], "changed_at": ""}
+        start = time.perf_counter()
+        # Publicar desde otro hilo, igual que los servicios que corren en el threadpool
+        threading.Thread(target=hub.publish, args=(task_event,)).start()
+        for subscription in subscriptions:
+            await subscription.queue.get()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    for subscription in subscriptions:
+        hub.unsubscribe(subscription)
+
+    return {
+        "mode": "hub",
+        "subscribers": subscribers,
+        "events": events,
+        "memory_per_subscriber_bytes": round(memory / subscribers),
+        "fanout_ms_p50": round(statistics.median(latencies), 3),
+        "fanout_ms_p99": round(percentile(latencies, 0.99), 3),
+        "fanout_ms_max": round(max(latencies), 3),
+    }
+
+
+async def _open_stream(host: str, port: int, path: str, token: str, ready: asyncio.Event,
+                       received: list, target_seq: list):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write((
+        f"GET {path} HTTP/1.1\r\nHost: {host}\r\nAuthorization: Bearer {token}\r\n"
+        f"Accept: text/event-stream\r\n\r\n"
+    ).encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    if b" 200 " not in status_line:
+        raise RuntimeError(f"Respuesta inesperada: {status_line!r}")
+    await ready.wait()
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        if line.startswith(b"id:") and target_seq and int(line[3:]) >= target_seq[0]:
+            received.append(time.perf_counter())
+            writer.close()
+            return
+
+
+async def run_http(url: str, token: str, subscribers: int, task_id: int, idle: float):
+    """Abrir conexiones SSE reales, dejarlas inactivas y medir la entrega de un evento"""
+    import httpx
+
+    parsed = urlparse(url)
+    host, port = parsed.hostname, parsed.port or 80
+    ready = asyncio.Event()
+    received: list = []
+    target_seq: list = []
+
+    start = time.perf_counter()
+    streams = []
+    for _ in range(subscribers):
+        streams.append(asyncio.create_task(
+            _open_stream(host, port, "/tasks/events", token, ready, received, target_seq)
+        ))
+        await asyncio.sleep(0)
+    connect_seconds = time.perf_counter() - start
+
+    await asyncio.sleep(idle)
+    failed = [s for s in streams if s.done() and s.exception()]
+
+    async with httpx.AsyncClient(base_url=url, headers={"Authorization": f"Bearer {token}"}) as client:
+        changes = (await client.get("/tasks/changes", params={"since": 0, "limit": 1})).json()
+        while changes["has_more"]:
+            changes = (await client.get("/tasks/changes", params={"since": changes["next_cursor"], "limit": 500})).json()
+        target_seq.append(changes["next_cursor"] + 1)
+        ready.set()
+        published = time.perf_counter()
+        await client.patch(f"/tasks/{task_id}", json={"description": f"sse load test {time.time()}"})
+
+    await asyncio.wait(streams, timeout=30)
+    latencies = [(t - published) * 1000 for t in received]
+    for stream in streams:
+        stream.cancel()
+
+    return {
+        "mode": "http",
+        "subscribers": subscribers,
+        "failed_connections": len(failed),
+        "connect_seconds": round(connect_seconds, 2),
+        "delivered": len(latencies),
+        "delivery_ms_p50": round(statistics.median(latencies), 2) if latencies else None,
+        "delivery_ms_p99": round(percentile(latencies, 0.99), 2) if latencies else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga del stream SSE de tareas")
+    parser.add_argument("mode", choices=["hub", "http"])
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--token", help="JWT obtenido de /users/login (modo http)")
+    parser.add_argument("--task-id", type=int, default=1)
+    parser.add_argument("--idle", type=float, default=5.0, help="Segundos de inactividad antes del evento")
+    args = parser.parse_args()
+
+    if args.mode == "hub":
+        result = asyncio.run(run_hub(args.subscribers, args.events))
+    else:
+        if not args.token:
+            parser.error("--token es obligatorio en modo http")
+        result = asyncio.run(run_http(args.url, args.token, args.subscribers, args.task_id, args.idle))
+
+    print(json.dumps(result, indent=2))
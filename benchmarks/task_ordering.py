@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Verificación de las claves de orden de tareas (tasks/ordering.py)
+
+1. Fuzz: --operations inserciones en posiciones al azar (principio, final y
+   entre dos tareas) con key_between; las claves deben quedar estrictamente
+   ordenadas y ser válidas (no vacías, sin '0' final).
+2. Altas al final: --appends llamadas a key_between(última, None) sin
+   reequilibrar, para ver cuánto crece la clave.
+3. Altas al final en la base: un usuario recibe --appends tareas con
+   create_task; ninguna posición guardada puede superar MAX_KEY_LENGTH (las
+   altas reequilibran la lista cuando hace falta) y el orden de
+   GET /tasks/user/{id} debe ser el de creación.
+
+Si algo falla, el comando termina con código 1.
+
+USO:
+    python benchmarks/task_ordering.py
+    python benchmarks/task_ordering.py --appends 5000 --operations 20000 --output results.json
+"""
+import sys
+import os
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCHMARKS_DIR))
+sys.path.append(BENCHMARKS_DIR)
+
+import argparse
+import json
+import platform
+import random
+import tempfile
+from datetime import datetime, timezone
+
+from tasks.ordering import key_between, MAX_KEY_LENGTH
+
+
+def fuzz(operations, seed=42):
+    """Inserciones al azar; devuelve fallos y la longitud máxima de clave"""
+    rng = random.Random(seed)
+    keys = []
+    failures = []
+    for _ in range(operations):
+        index = rng.randint(0, len(keys))
+        before = keys[index - 1] if index > 0 else None
+        after = keys[index] if index < len(keys) else None
+        key = key_between(before, after)
+        if not key or key.endswith('0') or (before is not None and key <= before) or (after is not None and key >= after):
+            failures.append(f"clave {key!r} entre {before!r} y {after!r}")
+            break
+        keys.insert(index, key)
+    return failures, max(len(key) for key in keys)
+
+
+def append_lengths(appends):
+    """Longitud de la clave tras cada alta al final, sin reequilibrar"""
+    key = None
+    lengths = []
+    for _ in range(appends):
+        key = key_between(key, None)
+        lengths.append(len(key))
+    return lengths
+
+
+def database_appends(appends):
+    """Altas reales con create_task para un solo usuario"""
+    from config.cnx import SessionLocal
+    from tasks.dto import TaskCreate
+    from tasks.model import TaskPosition
+    from tasks.services import create_task, get_tasks_by_user
+    from users.dto import UserCreate
+    from users.services import create_user
+
+    user = create_user(UserCreate(
+        firstName="Orden", lastName="Claves", emails="orden.claves@bench.local", password="Benchmark123!", ages=30
+    ))
+    created = [
+        create_task(TaskCreate(title=f"Alta {i}", description=None, state="pending", user_id=user["id"])).id
+        for i in range(appends)
+    ]
+    db = SessionLocal()
+    try:
+        longest = max(len(position) for (position,) in
+                      db.query(TaskPosition.position).filter(TaskPosition.user_id == user["id"]))
+    finally:
+        db.close()
+    ordered = [task.id for task in get_tasks_by_user(user["id"])]
+    return {"max_key_length": longest, "order_preserved": ordered == created}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verificación de las claves de orden de tareas")
+    parser.add_argument("--operations", type=int, default=5000, help="Inserciones al azar del fuzz")
+    parser.add_argument("--appends", type=int, default=1000, help="Altas al final de una lista")
+    parser.add_argument("--output", help="Archivo JSON para guardar el resultado")
+    args = parser.parse_args()
+
+    failures, fuzz_max = fuzz(args.operations)
+    lengths = append_lengths(args.appends)
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'task_ordering.db')
+    os.environ['ENVIROMENT'] = 'dev'
+    os.environ['STRCNX'] = f'sqlite:///{db_path}'
+    os.environ['CACHE_VERSION_POLL_SECONDS'] = '0'
+    import app  # Crea las tablas
+    stored = database_appends(args.appends)
+    if stored["max_key_length"] > MAX_KEY_LENGTH:
+        failures.append(f"posición guardada de {stored['max_key_length']} caracteres")
+    if not stored["order_preserved"]:
+        failures.append("el orden de la lista no es el de creación")
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "max_key_length": MAX_KEY_LENGTH,
+        "fuzz": {"operations": args.operations, "max_key_length": fuzz_max},
+        "appends": {
+            "count": args.appends,
+            "key_length_after": {str(n): lengths[n - 1] for n in (10, 100, 200, 1000, args.appends) if n <= args.appends},
+        },
+        "database_appends": stored,
+        "failures": failures,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    print(output)
+
+    if failures:
+        print(f"✗ Fallos: {'; '.join(failures)}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✓ Claves ordenadas y de a lo sumo {MAX_KEY_LENGTH} caracteres tras {args.appends} altas", file=sys.stderr)
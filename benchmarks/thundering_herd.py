@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark de lecturas simultáneas después de una invalidación (thundering herd)
+
+Para GET /users (get_all_users) y GET /roles (get_all_roles con el catálogo
+recién invalidado) lanza ráfagas de --concurrency hilos que llaman al
+servicio al mismo tiempo, como los requests que llegan juntos tras un deploy
+o un cambio. Compara la carga sin agrupar (cada hilo consulta la base) con la
+agrupada por cache/singleflight.py: consultas SQL y tiempo por ráfaga.
+
+Con la agrupación, cada ráfaga debe ejecutar la consulta a lo sumo
+MAX_EXECUTIONS_PER_BURST veces (un hilo que llega cuando la primera ya terminó
+inicia otra); si no, el comando termina con código 1.
+
+USO:
+    python benchmarks/thundering_herd.py
+    python benchmarks/thundering_herd.py --concurrency 64 --users 5000 --output results.json
+"""
+import sys
+import os
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCHMARKS_DIR))
+sys.path.append(BENCHMARKS_DIR)
+
+import argparse
+import json
+import platform
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+MAX_EXECUTIONS_PER_BURST = 2
+
+
+def burst(function, concurrency, before=None):
+    """Llamar a function desde `concurrency` hilos a la vez; devuelve segundos y errores"""
+    barrier = threading.Barrier(concurrency + 1)
+    errors = []
+
+    def worker():
+        barrier.wait()
+        try:
+            function()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    if before:
+        before()
+    started = time.perf_counter()
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lecturas simultáneas con y sin agrupación")
+    parser.add_argument("--concurrency", type=int, default=32, help="Hilos por ráfaga")
+    parser.add_argument("--bursts", type=int, default=3)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--tasks", type=int, default=2500)
+    parser.add_argument("--output", help="Archivo JSON para guardar el resultado")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'thundering_herd.db')
+    os.environ['ENVIROMENT'] = 'dev'
+    os.environ['STRCNX'] = f'sqlite:///{db_path}'
+
+    from load_test import prepare_database
+    prepare_database(users=args.users, tasks=args.tasks, seed=42)
+
+    from sqlalchemy import event
+    from config.cnx import engine
+    from roles import services as roles_services
+    from users import services as users_services
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(1))
+
+    endpoints = {
+        "GET /users": {
+            "grouped": users_services.get_all_users,
+            "ungrouped": users_services._load_all_users,
+            "flight": users_services.lista_usuarios,
+            "before": None,
+        },
+        "GET /roles": {
+            "grouped": roles_services.get_all_roles,
+            "ungrouped": lambda: roles_services._load_all_roles(roles_services._catalogo.version()),
+            "flight": roles_services._cargas,
+            # Cada ráfaga empieza con el catálogo recién invalidado
+            "before": roles_services._catalogo.invalidate,
+        },
+    }
+
+    results = {}
+    failures = []
+    for name, endpoint in endpoints.items():
+        result = {}
+        for mode in ("ungrouped", "grouped"):
+            flight = endpoint["flight"]
+            executed = flight.executed
+            statements.clear()
+            seconds = []
+            for _ in range(args.bursts):
+                elapsed, errors = burst(endpoint[mode], args.concurrency, endpoint["before"])
+                seconds.append(elapsed)
+                if errors:
+                    failures.append(f"{name} {mode}: {errors[0]}")
+            result[mode] = {
+                "queries_per_burst": round(len(statements) / args.bursts, 1),
+                "best_burst_ms": round(min(seconds) * 1000, 2),
+                "mean_burst_ms": round(sum(seconds) / len(seconds) * 1000, 2),
+            }
+            if mode == "grouped":
+                executions = (flight.executed - executed) / args.bursts
+                result[mode]["executions_per_burst"] = executions
+                if executions > MAX_EXECUTIONS_PER_BURST:
+                    failures.append(f"{name}: {executions} ejecuciones por ráfaga")
+        results[name] = result
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "concurrency": args.concurrency,
+        "bursts": args.bursts,
+        "users": args.users,
+        "tasks": args.tasks,
+        "max_executions_per_burst": MAX_EXECUTIONS_PER_BURST,
+        "results": results,
+        "failures": failures,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output + '\n')
+    print(output)
+
+    if failures:
+        print(f"✗ Fallos: {'; '.join(failures)}", file=sys.stderr)
+        sys.exit(1)
+    print(f"✓ Cada ráfaga de {args.concurrency} lecturas ejecutó la consulta a lo sumo "
+          f"{MAX_EXECUTIONS_PER_BURST} veces", file=sys.stderr)
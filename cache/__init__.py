@@ -0,0 +1,139 @@
+"""
+Caché de la aplicación
+
+get_cache() devuelve el backend configurado (CACHE_BACKEND): 'memory', un LRU
+por proceso, o 'redis', compartido entre todos los workers (CACHE_URL; con
+fakeredis:// se usa un reemplazo local en memoria).
+
+Los datos se agrupan en namespaces versionados: las claves llevan la versión
+vigente del namespace y invalidate() la incrementa, de modo que todas las
+entradas anteriores quedan inaccesibles de una vez (y vencen por TTL o LRU)
+sin tener que borrarlas una por una. Las entradas leídas con get_or_load_item()
+llevan además un contador propio, para invalidar solo algunas con
+invalidate_items(). Los valores devueltos pueden ser los mismos objetos que
+leen otros requests (backend 'memory'): quien los recibe no debe modificarlos.
+
+Los aciertos y fallos de cada namespace (claves encontradas y no encontradas
+en sus lecturas) se exportan en /metrics como cache_requests_total{namespace, result}.
+"""
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+from config import CACHE_BACKEND, CACHE_URL, CACHE_PREFIX, CACHE_TTL_SECONDS, CACHE_MAX_ENTRIES
+from cache.backends import MemoryCache, RedisCache
+from monitoring.metrics import registry, family
+
+_cache = None
+_lock = threading.Lock()
+_namespaces: List["CacheNamespace"] = []
+
+
+def get_cache():
+    """Backend de caché del proceso (se crea en el primer uso)"""
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                if CACHE_BACKEND == 'redis':
+                    _cache = RedisCache(CACHE_URL, prefix=CACHE_PREFIX)
+                else:
+                    _cache = MemoryCache(max_entries=CACHE_MAX_ENTRIES)
+    return _cache
+
+
+class CacheNamespace:
+    """Grupo de claves con versión y TTL comunes (backend: por defecto get_cache())"""
+
+    def __init__(self, name: str, ttl: int = CACHE_TTL_SECONDS, backend=None):
+        self.name = name
+        self.ttl = ttl
+        self._backend = backend
+        self._version_key = f"{CACHE_PREFIX}:{name}:version"
+        self.hits = 0
+        self.misses = 0
+        _namespaces.append(self)
+
+    @property
+    def backend(self):
+        return self._backend if self._backend is not None else get_cache()
+
+    def version(self) -> int:
+        return self.backend.get_counters([self._version_key])[self._version_key]
+
+    def _key(self, version: int, key: str) -> str:
+        return f"{CACHE_PREFIX}:{self.name}:v{version}:{key}"
+
+    def get_many(self, keys: Iterable[str], version: Optional[int] = None) -> Dict[str, object]:
+        version = self.version() if version is None else version
+        full_keys = {self._key(version, key): key for key in keys}
+        found = self.backend.get_many(full_keys)
+        self.hits += len(found)
+        self.misses += len(full_keys) - len(found)
+        return {full_keys[full_key]: value for full_key, value in found.items()}
+
+    def set_many(self, mapping: Dict[str, object], ttl: Optional[int] = None, version: Optional[int] = None):
+        """Guardar valores; con version (leída antes de consultar la base), lo que se
+        cargó antes de una invalidación no queda visible en la versión nueva"""
+        version = self.version() if version is None else version
+        self.backend.set_many(
+            {self._key(version, key): value for key, value in mapping.items()},
+            ttl=self.ttl if ttl is None else ttl
+        )
+
+    def get(self, key: str, version: Optional[int] = None):
+        return self.get_many([key], version=version).get(key)
+
+    def set(self, key: str, value, ttl: Optional[int] = None, version: Optional[int] = None):
+        self.set_many({key: value}, ttl=ttl, version=version)
+
+    def get_or_load(self, key: str, loader: Callable[[], object]):
+        """Valor cacheado, o el de loader() guardado para las siguientes lecturas"""
+        version = self.version()
+        return self._read_through(key, loader, version)
+
+    def _item_counter(self, key: str) -> str:
+        return f"{CACHE_PREFIX}:{self.name}:item:{key}"
+
+    def get_or_load_item(self, key: str, loader: Callable[[], object]):
+        """Como get_or_load, pero la entrada se puede descartar sola con invalidate_items().
+
+        La versión del namespace y el contador de la entrada se leen juntos antes
+        de cargar: si la entrada se invalida mientras loader() consulta la base,
+        lo cargado queda bajo el contador anterior y no se vuelve a leer.
+        """
+        counter = self._item_counter(key)
+        counters = self.backend.get_counters([self._version_key, counter])
+        return self._read_through(f"{key}:g{counters[counter]}", loader, counters[self._version_key])
+
+    def _read_through(self, key: str, loader: Callable[[], object], version: int):
+        value = self.get(key, version=version)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(key, value, version=version)
+        return value
+
+    def invalidate_items(self, keys: Iterable[str]):
+        """Descartar solo las entradas indicadas (leídas con get_or_load_item)"""
+        for key in set(keys):
+            self.backend.incr(self._item_counter(key))
+
+    def invalidate(self):
+        """Descartar todas las entradas del namespace (en todos los workers si es compartida)"""
+        self.backend.incr(self._version_key)
+
+    def invalidate_local(self):
+        """Invalidar solo si el backend es del proceso: con uno compartido, el
+        worker que hizo el cambio ya lo invalidó para todos"""
+        if not self.backend.shared:
+            self.invalidate()
+
+
+def _cache_metrics() -> dict:
+    requests = family('counter', 'Claves leídas de la caché por namespace y resultado (hit o miss)')
+    for namespace in _namespaces:
+        requests["samples"].append(['', {"namespace": namespace.name, "result": "hit"}, namespace.hits])
+        requests["samples"].append(['', {"namespace": namespace.name, "result": "miss"}, namespace.misses])
+    return {"cache_requests_total": requests}
+
+
+registry.add_collector(_cache_metrics)
@@ -0,0 +1,134 @@
+"""
+Backends de caché: LRU en memoria y protocolo Redis
+
+Ambos guardan valores serializables a JSON con TTL en segundos (0 = sin
+vencimiento) y ofrecen operaciones por lote. Los contadores (incr) se usan
+para las versiones de los namespaces y nunca se desalojan ni vencen.
+
+MemoryCache devuelve el mismo objeto que se guardó (sin copiarlo, para no
+pagar una serialización por lectura), mientras que RedisCache devuelve una
+copia decodificada: los valores leídos de la caché no se deben modificar.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+
+class MemoryCache:
+    """LRU en memoria del proceso; cada worker de uvicorn tiene la suya"""
+
+    name = 'memory'
+    shared = False
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        """Valores encontrados (las claves ausentes o vencidas no aparecen).
+
+        Son los mismos objetos guardados, compartidos entre requests: no modificarlos.
+        """
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                value, expires_at = entry
+                if expires_at and expires_at <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = value
+        return found
+
+    def set_many(self, mapping: Dict[str, object], ttl: int = 0):
+        expires_at = time.monotonic() + ttl if ttl else 0
+        with self._lock:
+            for key, value in mapping.items():
+                self._entries[key] = (value, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def get_counters(self, keys: List[str]) -> Dict[str, int]:
+        with self._lock:
+            return {key: self._counters.get(key, 0) for key in keys}
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+class RedisCache:
+    """Caché compartida entre workers sobre el protocolo Redis.
+
+    url: redis://host:puerto/db, o fakeredis:// para un servidor en memoria
+    compartido por todas las instancias del proceso (pruebas locales sin Redis).
+    Requiere el paquete redis, o fakeredis para el reemplazo local.
+    """
+
+    name = 'redis'
+    shared = True
+    _fake_server = None
+
+    def __init__(self, url: str, prefix: str = 'todo'):
+        if url.startswith('fakeredis://'):
+            import fakeredis
+            if RedisCache._fake_server is None:
+                RedisCache._fake_server = fakeredis.FakeServer()
+            self.client = fakeredis.FakeRedis(server=RedisCache._fake_server)
+        else:
+            import redis
+            self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, object]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self.client.mget(keys)
+        return {key: json.loads(value) for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, mapping: Dict[str, object], ttl: int = 0):
+        if not mapping:
+            return
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipeline.set(key, json.dumps(value, separators=(',', ':')), ex=ttl or None)
+        pipeline.execute()
+
+    def delete_many(self, keys: Iterable[str]):
+        keys = list(keys)
+        if keys:
+            self.client.delete(*keys)
+
+    def get_counters(self, keys: List[str]) -> Dict[str, int]:
+        values = self.client.mget(keys)
+        return {key: int(value) if value is not None else 0 for key, value in zip(keys, values)}
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(key)
+
+    def clear(self):
+        """Borrar solo las claves de esta aplicación (prefijo)"""
+        keys = list(self.client.scan_iter(match=f"{self.prefix}:*", count=1000))
+        if keys:
+            self.client.delete(*keys)
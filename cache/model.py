@@ -0,0 +1,17 @@
+from datetime import datetime
+from sqlalchemy import DateTime, INTEGER, String
+from sqlalchemy.orm import Mapped, mapped_column
+from config.basemodel import Base
+
+
+class CacheVersion(Base):
+    """Versión de un grupo de datos cacheados ('permisos', 'roles', 'usuarios', 'tareas').
+
+    Los servicios la incrementan en la misma transacción que modifica los
+    datos; cada worker la consulta periódicamente y descarta sus entradas en
+    caché cuando cambia (cache/versions.py).
+    """
+    __tablename__ = 'cache_versions'
+    nombre: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(INTEGER, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,122 @@
+"""
+Caché de respuestas JSON ya serializadas para los listados
+
+GET /tasks, GET /tasks/user/{id}, GET /roles y GET /permisos guardan el cuerpo
+de la respuesta en bytes: en un acierto no se consulta la base ni se valida ni
+serializa con pydantic. La clave es la ruta con sus parámetros normalizados
+(los valores ya convertidos por FastAPI, en orden alfabético) más la versión
+de cada grupo de datos del que depende el listado ('tareas', 'usuarios',
+'roles', 'permisos').
+
+Las versiones son contadores del proceso: los servicios llaman a invalidate()
+después del commit, y los cambios de otros workers llegan por cache_versions
+(cache/versions.py). Las entradas con versiones viejas ya no se leen y salen
+por LRU, que se limita por el total de bytes (RESPONSE_CACHE_MAX_BYTES).
+
+Aciertos, fallos, desalojos y bytes ocupados se exportan en /metrics.
+"""
+import threading
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, Dict, Iterable, Optional
+from urllib.parse import urlencode
+from fastapi import Response
+from pydantic import TypeAdapter
+from config import RESPONSE_CACHE_MAX_BYTES
+from cache.versions import CACHE_VERSION_NAMES, on_version_change
+from monitoring.metrics import registry, family
+
+
+class ResponseCache:
+    """LRU de cuerpos de respuesta limitada por la suma de sus tamaños"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def key(self, route: str, params: dict, depends_on: Iterable[str]) -> str:
+        """Clave de una respuesta: ruta, parámetros normalizados y versiones vigentes"""
+        query = urlencode(sorted((name, str(value)) for name, value in params.items() if value is not None))
+        with self._lock:
+            versions = '.'.join(f"{name}{self._versions.get(name, 0)}" for name in depends_on)
+        return f"{route}?{query}@{versions}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def set(self, key: str, body: bytes):
+        # Una respuesta más grande que el límite vaciaría la caché para nada
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def invalidate(self, *names: str):
+        """Cambiar la versión de estos grupos: sus respuestas dejan de leerse"""
+        with self._lock:
+            for name in names:
+                self._versions[name] = self._versions.get(name, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES)
+for _nombre in CACHE_VERSION_NAMES:
+    on_version_change(_nombre, partial(response_cache.invalidate, _nombre))
+
+
+def cached_json_response(route: str, params: dict, depends_on: Iterable[str],
+                         load: Callable[[], object], adapter: TypeAdapter) -> Response:
+    """Respuesta JSON desde la caché, o la de load() validada con adapter y guardada.
+
+    La clave se arma antes de load(): si los datos cambian mientras se consulta
+    la base, lo guardado queda bajo las versiones anteriores y no se sirve.
+    """
+    key = response_cache.key(route, params, depends_on)
+    body = response_cache.get(key)
+    if body is None:
+        body = adapter.dump_json(adapter.validate_python(load(), from_attributes=True))
+        response_cache.set(key, body)
+    return Response(body, media_type='application/json')
+
+
+def _response_cache_metrics() -> dict:
+    families = {
+        "response_cache_requests_total": family('counter', 'Lecturas de la caché de respuestas por resultado'),
+        "response_cache_evictions_total": family('counter', 'Respuestas desalojadas por el límite de bytes'),
+        "response_cache_bytes": family('gauge', 'Bytes ocupados por las respuestas cacheadas'),
+        "response_cache_entries": family('gauge', 'Respuestas cacheadas'),
+    }
+    families["response_cache_requests_total"]["samples"].append(['', {"result": "hit"}, response_cache.hits])
+    families["response_cache_requests_total"]["samples"].append(['', {"result": "miss"}, response_cache.misses])
+    families["response_cache_evictions_total"]["samples"].append(['', {}, response_cache.evictions])
+    families["response_cache_bytes"]["samples"].append(['', {}, response_cache.size])
+    families["response_cache_entries"]["samples"].append(['', {}, len(response_cache._entries)])
+    return families
+
+
+registry.add_collector(_response_cache_metrics)
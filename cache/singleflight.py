@@ -0,0 +1,87 @@
+"""
+Agrupación de lecturas concurrentes (single-flight)
+
+Cuando vence o se invalida una caché, muchos requests simultáneos hacen la
+misma consulta pesada. SingleFlight.do() deja que solo el primero de cada clave
+la ejecute: los demás esperan en su hilo del threadpool y reciben el mismo
+resultado (o la misma excepción). Los resultados se comparten sin copiarlos,
+por lo que quien los recibe no debe modificarlos.
+
+forget() hace que las llamadas siguientes ejecuten una consulta nueva en lugar
+de sumarse a una que empezó antes de un cambio en los datos.
+
+Las ejecuciones y las llamadas que esperaron una ajena se exportan en /metrics
+como singleflight_calls_total{name, result}.
+"""
+import threading
+from typing import Callable, Dict, List, Optional
+from monitoring.metrics import registry, family
+
+_flights: List["SingleFlight"] = []
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Ejecuciones en curso por clave; name identifica el grupo en las métricas"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.executed = 0
+        self.shared = 0
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        _flights.append(self)
+
+    def do(self, key: str, function: Callable[[], object]):
+        """Resultado de function(), compartido con las llamadas concurrentes de la misma clave"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                # forget() pudo haber registrado otra llamada con la misma clave
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def forget(self):
+        """Las llamadas en curso terminan igual, pero las nuevas ya no se suman a ellas"""
+        with self._lock:
+            self._calls.clear()
+
+
+def _singleflight_metrics() -> dict:
+    calls = family('counter', 'Lecturas agrupadas: consultas ejecutadas y llamadas que esperaron una en curso')
+    for flight in _flights:
+        calls["samples"].append(['', {"name": flight.name, "result": "executed"}, flight.executed])
+        calls["samples"].append(['', {"name": flight.name, "result": "shared"}, flight.shared])
+    return {"singleflight_calls_total": calls}
+
+
+registry.add_collector(_singleflight_metrics)
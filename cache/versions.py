@@ -0,0 +1,130 @@
+"""
+Invalidación de cachés entre workers con la tabla cache_versions
+
+Los servicios que modifican datos cacheados llaman a bump_cache_versions()
+antes del commit, así la versión cambia en la misma transacción que los datos.
+Cada worker consulta la tabla cada CACHE_VERSION_POLL_SECONDS (una consulta
+pequeña en una tarea de fondo, fuera de los requests) y, para cada versión que
+cambió, ejecuta los handlers registrados con on_version_change(), que
+descartan las entradas locales (matriz de permisos, namespaces en memoria).
+
+El worker que hizo el cambio ya invalidó sus cachés al momento; el resto lo
+hace como mucho CACHE_VERSION_POLL_SECONDS después, sin un broker externo.
+
+Las cachés que se invalidan por entrada (perfiles) registran con on_poll() una
+función que recibe la sesión de cada consulta y lee qué entradas descartar.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from anyio import to_thread
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from cache.model import CacheVersion
+from config.cnx import SessionLocal
+
+# Bajo 'monitoring' para que los avisos sigan visibles pese al silenciado de app.py
+logger = logging.getLogger('monitoring.cache')
+
+# Grupos versionados; sus filas se crean al iniciar la app (ensure_cache_versions)
+CACHE_VERSION_NAMES = ('permisos', 'roles', 'usuarios', 'tareas')
+
+_handlers: Dict[str, List[Callable[[], None]]] = defaultdict(list)
+_poll_hooks: List[Callable[[Session], None]] = []
+
+
+def on_version_change(nombre: str, handler: Callable[[], None]):
+    """Registrar una función a llamar cuando otro worker cambia la versión `nombre`"""
+    _handlers[nombre].append(handler)
+    return handler
+
+
+def on_poll(hook: Callable[[Session], None]):
+    """Registrar una función a llamar en cada consulta periódica, con la sesión abierta"""
+    _poll_hooks.append(hook)
+    return hook
+
+
+def bump_cache_versions(db: Session, *nombres: str):
+    """Incrementar versiones dentro de la transacción actual (antes del commit).
+
+    Todas con un solo UPDATE; las filas que falten se crean con versión 1.
+    """
+    nombres = set(nombres)
+    now = datetime.utcnow()
+    result = db.execute(
+        update(CacheVersion)
+        .where(CacheVersion.nombre.in_(nombres))
+        .values(version=CacheVersion.version + 1, updated_at=now)
+    )
+    if result.rowcount < len(nombres):
+        existing = {nombre for (nombre,) in db.query(CacheVersion.nombre).filter(CacheVersion.nombre.in_(nombres))}
+        db.add_all(CacheVersion(nombre=nombre, version=1, updated_at=now) for nombre in nombres - existing)
+        db.flush()
+
+
+def ensure_cache_versions(db: Session):
+    """Crear las filas que falten, para que cada incremento sea un solo UPDATE"""
+    existing = {nombre for (nombre,) in db.query(CacheVersion.nombre).all()}
+    missing = [nombre for nombre in CACHE_VERSION_NAMES if nombre not in existing]
+    if missing:
+        db.add_all(CacheVersion(nombre=nombre, version=0, updated_at=datetime.utcnow()) for nombre in missing)
+        db.commit()
+
+
+class VersionWatcher:
+    """Consulta periódica de cache_versions en una tarea de fondo"""
+
+    def __init__(self):
+        self.seen: Optional[Dict[str, int]] = None
+        self.polls = 0
+        self.changes = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def poll(self) -> List[str]:
+        """Leer las versiones y avisar las que cambiaron desde la lectura anterior"""
+        db = SessionLocal()
+        try:
+            current = dict(db.query(CacheVersion.nombre, CacheVersion.version).all())
+            for hook in _poll_hooks:
+                try:
+                    hook(db)
+                except Exception as e:
+                    logger.warning(f"Fallo en {hook.__name__} al consultar cambios: {e}")
+        finally:
+            db.close()
+        self.polls += 1
+        if self.seen is None:
+            # Primera lectura: solo fija el punto de partida
+            self.seen = current
+            return []
+        changed = [nombre for nombre, version in current.items() if self.seen.get(nombre) != version]
+        self.seen = current
+        for nombre in changed:
+            self.changes += 1
+            for handler in _handlers[nombre]:
+                handler()
+        return changed
+
+    def start(self, interval: float):
+        """Iniciar la consulta periódica en el loop actual"""
+        self._task = asyncio.get_running_loop().create_task(self._run(interval))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, interval: float):
+        while True:
+            try:
+                # La consulta es sincrónica: se hace en el threadpool
+                await to_thread.run_sync(self.poll)
+            except Exception as e:
+                logger.warning(f"No se pudieron leer las versiones de caché: {e}")
+            await asyncio.sleep(interval)
+
+
+watcher = VersionWatcher()
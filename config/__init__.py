@@ -20,4 +20,52 @@ elif ENVIROMENT == 'qa':
 else:
     STRCNX = f'{ENGINE}://{USERDB}:{PASSWORD}@{HOST}:{PORT}/{DATABASE}'
 
-SQLALCHEMY_DATABASE_URI=STRCNX
\ No newline at end of file
+SQLALCHEMY_DATABASE_URI=STRCNX
+
+# Configuración de métricas
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+# Directorio compartido entre workers de uvicorn para agregar las métricas de todos los procesos
+METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR')
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+# /metrics requiere autenticación salvo que se publique explícitamente; con
+# METRICS_TOKEN el scraper puede enviar "Authorization: Bearer <token>" sin JWT
+METRICS_PUBLIC = os.getenv('METRICS_PUBLIC', 'false').lower() == 'true'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Diagnóstico de consultas SQL
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '100'))
+# Headers X-DB-Queries / X-DB-Time en cada respuesta (por defecto solo en desarrollo)
+DB_DEBUG_HEADERS = os.getenv('DB_DEBUG_HEADERS', 'true' if ENVIROMENT == 'dev' else 'false').lower() == 'true'
+# Header Server-Timing con el desglose de tiempos de cada respuesta
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+
+# Perfilado bajo demanda con el header X-Profile: 1 (solo roles de PROFILING_ROLES)
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'true').lower() == 'true'
+PROFILING_ROLES = [rol.strip().lower() for rol in os.getenv('PROFILING_ROLES', 'Administrador').split(',') if rol.strip()]
+PROFILE_STORE_SIZE = int(os.getenv('PROFILE_STORE_SIZE', '20'))
+
+# Captura de requests lentos con consultas, tiempos y muestras de stack (/debug/slow)
+SLOW_REQUEST_TRACING = os.getenv('SLOW_REQUEST_TRACING', 'true').lower() == 'true'
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '500'))
+SLOW_REQUEST_BUFFER_SIZE = int(os.getenv('SLOW_REQUEST_BUFFER_SIZE', '100'))
+SLOW_REQUEST_SAMPLE_MS = float(os.getenv('SLOW_REQUEST_SAMPLE_MS', '10'))
+
+# Hilos del threadpool de AnyIO para los endpoints sincrónicos (el valor por defecto de AnyIO es 40)
+THREADPOOL_LIMIT = int(os.getenv('THREADPOOL_LIMIT', '40'))
+# Monitor de latencia del event loop y saturación del threadpool
+LOOP_MONITOR_ENABLED = os.getenv('LOOP_MONITOR_ENABLED', 'true').lower() == 'true'
+LOOP_MONITOR_INTERVAL_MS = float(os.getenv('LOOP_MONITOR_INTERVAL_MS', '100'))
+LOOP_BLOCK_WARN_MS = float(os.getenv('LOOP_BLOCK_WARN_MS', '100'))
+
+# Caché de permisos y catálogos: 'memory' (LRU por proceso) o 'redis' (compartida
+# entre workers; CACHE_URL=fakeredis:// usa un reemplazo local para pruebas)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory').lower()
+CACHE_URL = os.getenv('CACHE_URL', 'redis://localhost:6379/0')
+CACHE_PREFIX = os.getenv('CACHE_PREFIX', 'todo')
+CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL_SECONDS', '300'))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+# Cada cuántos segundos cada worker consulta cache_versions para descartar lo que
+# cambió en otro worker (0 desactiva la consulta)
+CACHE_VERSION_POLL_SECONDS = float(os.getenv('CACHE_VERSION_POLL_SECONDS', '1'))
+# Respuestas JSON ya serializadas de los listados (por proceso), limitadas por tamaño total
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
@@ -1,7 +1,7 @@
 """
 Configuración centralizada de tablas para evitar problemas de orden de importación
 """
-from sqlalchemy import Table, Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Table, Column, Integer, String, DateTime, Boolean, ForeignKey, Index
 from datetime import datetime
 from config.basemodel import Base
 from sqlalchemy.dialects.sqlite import INTEGER
@@ -20,7 +20,9 @@ user_task_association = Table(
     'user_task_association',
     Base.metadata,
     Column('user_id', String(36), ForeignKey('users.id'), primary_key=True),
-    Column('task_id', INTEGER, ForeignKey('tasks.id'), primary_key=True)
+    Column('task_id', INTEGER, ForeignKey('tasks.id'), primary_key=True),
+    # La clave primaria empieza por user_id: este índice resuelve los usuarios de una tarea
+    Index('ix_user_task_association_task_id', 'task_id')
 )
 
 # Asociación entre usuarios y roles (many-to-many)
@@ -29,5 +31,7 @@ user_rol_association = Table(
     Base.metadata,
     Column('user_id', String(36), ForeignKey('users.id'), primary_key=True),
     Column('rol_id', Integer, ForeignKey('roles.rol_id'), primary_key=True),
-    Column('assigned_at', DateTime, default=datetime.utcnow, nullable=False)
+    Column('assigned_at', DateTime, default=datetime.utcnow, nullable=False),
+    # Usuarios de un rol (la clave primaria empieza por user_id)
+    Index('ix_user_rol_association_rol_id', 'rol_id')
 )
\ No newline at end of file
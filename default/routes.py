@@ -1,79 +1,68 @@
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Request, Response
+from monitoring.timing import TimedRoute
 from uuid import uuid4
+from .static import StaticPayload, JsonTemplate, encode_json
 import os
 
-default = APIRouter()
+default = APIRouter(route_class=TimedRoute)
+
+# Respuestas armadas una sola vez al iniciar; los endpoints son async para no
+# pasar por el threadpool, ya que no hacen nada bloqueante
+_INDEX = StaticPayload(
+    encode_json({"message": "Hola FAST API", "status": "running", "version": "1.0.0"}),
+    'application/json', 'public, max-age=300'
+)
+# Los valores None se completan en cada request (timestamp, request_id)
+_TEST = JsonTemplate({
+    'firstName': 'Daniel',
+    'lastName': 'Cazabat',
+    'age': 55,
+    'city': 'San Carlos de Bolivar',
+    'timestamp': None
+})
+_HEALTH = JsonTemplate({
+    "status": "healthy",
+    "timestamp": None,
+    "request_id": None,
+    "service": "FastAPI Users & Tasks API"
+})
+_NO_STORE = {"Cache-Control": "no-store"}
+
+
+def _load_favicon(path: str = 'favicon.svg') -> StaticPayload:
+    """Favicon leído una vez; si no existe, se responde 404 sin volver a buscarlo"""
+    if os.path.exists(path):
+        with open(path, 'rb') as favicon_file:
+            return StaticPayload(favicon_file.read(), 'image/svg+xml', 'public, max-age=86400')
+    return StaticPayload(encode_json({"detail": "Favicon no encontrado"}), 'application/json',
+                         'public, max-age=300', status_code=404)
+
+
+_FAVICON = _load_favicon()
+
 
 @default.get("/")
 @default.get("/home")
-def index():
+async def index(request: Request):
     """Endpoint de inicio"""
-    try:
-        return {
-            "message": f"Hola FAST API",
-            "status": "running",
-            "version": "1.0.0"
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error inesperado en el endpoint de inicio"
-        )
+    return _INDEX.response(request)
 
 @default.get("/test")
-def test():
+async def test():
     """Endpoint de prueba"""
-    try:
-        resp = {
-            'firstName': 'Daniel',
-            'lastName': 'Cazabat',
-            'age': 55,
-            'city': 'San Carlos de Bolivar',
-            'timestamp': str(datetime.now())
-        }
-        return resp
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error inesperado en el endpoint de prueba"
-        )
+    return Response(_TEST.render(str(datetime.now())), media_type='application/json', headers=_NO_STORE)
 
 @default.get("/health")
-def health_check():
+async def health_check():
     """Endpoint de health check"""
-    try:
-        return {
-            "status": "healthy",
-            "timestamp": str(datetime.now()),
-            "request_id": str(uuid4()),
-            "service": "FastAPI Users & Tasks API"
-        }
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error en el health check"
-        )
+    return Response(
+        _HEALTH.render(str(datetime.now()), str(uuid4())),
+        media_type='application/json', headers=_NO_STORE
+    )
 
 # Ruta para servir favicon.ico y evitar error en Swagger UI
 @default.get('/favicon.ico', include_in_schema=False)
-async def favicon():
+async def favicon(request: Request):
     """Servir favicon"""
-    try:
-        favicon_path = 'favicon.svg'
-        if os.path.exists(favicon_path):
-            return FileResponse(favicon_path)
-        else:
-            # Si no existe el archivo, devolver un 404
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Favicon no encontrado"
-            )
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error al servir el favicon"
-        )
\ No newline at end of file
+    return _FAVICON.response(request)
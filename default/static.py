@@ -0,0 +1,68 @@
+"""
+Respuestas precalculadas para rutas que devuelven siempre lo mismo
+
+StaticPayload guarda el cuerpo ya codificado y su ETag: cada request solo
+compara If-None-Match (304 sin cuerpo si el cliente ya lo tiene) y arma la
+respuesta con los bytes, sin construir dicts ni serializar JSON.
+"""
+import hashlib
+import json
+from typing import List, Optional
+from fastapi import Request, Response
+
+
+def encode_json(value) -> bytes:
+    """JSON con el mismo formato que JSONResponse (compacto, UTF-8)"""
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Si el ETag está en el encabezado If-None-Match (comparación débil)"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    return '*' in candidates or any(candidate.removeprefix('W/') == etag for candidate in candidates)
+
+
+class StaticPayload:
+    """Cuerpo precalculado con su ETag y su Cache-Control"""
+
+    def __init__(self, body: bytes, media_type: str, cache_control: str, status_code: int = 200):
+        self.body = body
+        self.media_type = media_type
+        self.status_code = status_code
+        self.headers = {
+            "ETag": f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            "Cache-Control": cache_control,
+        }
+
+    def response(self, request: Request) -> Response:
+        if self.status_code == 200 and etag_matches(request.headers.get('if-none-match'), self.headers["ETag"]):
+            return Response(status_code=304, headers=self.headers)
+        return Response(self.body, status_code=self.status_code, media_type=self.media_type, headers=self.headers)
+
+
+class JsonTemplate:
+    """Objeto JSON precodificado cuyos valores None se completan en cada request.
+
+    render() solo codifica los valores variables y los une con las partes fijas.
+    """
+
+    def __init__(self, payload: dict):
+        self.parts: List[bytes] = []
+        current = b'{'
+        for index, (key, value) in enumerate(payload.items()):
+            current += (b',' if index else b'') + encode_json(key) + b':'
+            if value is None:
+                self.parts.append(current)
+                current = b''
+            else:
+                current += encode_json(value)
+        self.parts.append(current + b'}')
+
+    def render(self, *values) -> bytes:
+        chunks = [self.parts[0]]
+        for value, part in zip(values, self.parts[1:]):
+            chunks.append(encode_json(value))
+            chunks.append(part)
+        return b''.join(chunks)
@@ -1,13 +1,18 @@
 import bcrypt
+import hmac
 import os
+from time import perf_counter
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from fastapi import HTTPException, Depends, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
 import jwt
 from pathlib import Path
+from monitoring.request_context import current_request
+from config import METRICS_PUBLIC, METRICS_TOKEN
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -29,6 +34,9 @@ PUBLIC_ROUTES = [
     "/favicon.ico",
 ]
 
+# Métricas: privadas salvo METRICS_PUBLIC=true; con METRICS_TOKEN se aceptan sin JWT
+METRICS_PATH = "/metrics"
+
 # Rutas que requieren métodos específicos sin autenticación
 PUBLIC_METHODS = {
     "/users": ["POST"],  # Permitir registro de usuarios sin autenticación
@@ -78,24 +86,12 @@ def verify_jwt_token(token: str) -> dict:
 class AuthMiddleware(BaseHTTPMiddleware):
     """Middleware de autenticación y autorización para verificar tokens JWT y permisos"""
     
-    def __init__(self, app):
-        super().__init__(app)
-        # Importación lazy para evitar circular imports
-        self._permission_service = None
-    
-    def get_permission_service(self):
-        """Obtener servicio de permisos con lazy loading"""
-        try:
-            from config.cnx import SessionLocal
-            from permisos.services import PermisoService
-            db = SessionLocal()
-            return PermisoService(db)
-        except Exception as e:
-            print(f"Error creating permission service: {e}")
-            return None
-    
     async def dispatch(self, request: Request, call_next):
         path = request.url.path
+        # Detrás de un proxy con prefijo (root_path), las rutas se comparan sin él
+        root_path = request.scope.get('root_path', '').rstrip('/')
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):] or '/'
         method = request.method
         
         # Verificar si la ruta es pública
@@ -106,6 +102,11 @@ class AuthMiddleware(BaseHTTPMiddleware):
         # Obtener el token del header Authorization
         authorization: Optional[str] = request.headers.get("Authorization")
         
+        # El scraper de métricas puede usar el token propio en lugar de un JWT
+        if path == METRICS_PATH and self.has_metrics_token(authorization):
+            response = await call_next(request)
+            return response
+        
         if not authorization:
             return JSONResponse(
                 status_code=401,
@@ -122,7 +123,13 @@ class AuthMiddleware(BaseHTTPMiddleware):
                 )
             
             # Verificar el token
-            payload = verify_jwt_token(token)
+            context = current_request.get()
+            started = perf_counter()
+            try:
+                payload = verify_jwt_token(token)
+            finally:
+                if context is not None:
+                    context.add_timing('auth', perf_counter() - started)
             
             # Agregar información del usuario al request
             request.state.user = payload
@@ -134,22 +141,22 @@ class AuthMiddleware(BaseHTTPMiddleware):
                     # Normalizar la ruta para la verificación de permisos
                     normalized_path = self.normalize_path_for_permissions(path)
                     
+                    started = perf_counter()
                     try:
-                        service = self.get_permission_service()
-                        if service:
-                            has_permission = service.user_has_permission(
-                                user_role_id, 
-                                normalized_path, 
-                                method
+                        # Importación lazy para evitar circular imports
+                        from permisos.matcher import cached_permission_matrix, get_permission_matrix
+                        # La matriz compilada responde sin consultas; solo se compila
+                        # (en el threadpool) después de un cambio de permisos o roles
+                        matrix = cached_permission_matrix() or await run_in_threadpool(get_permission_matrix)
+                        has_permission = matrix.allows(user_role_id, normalized_path, method)
+                        if context is not None:
+                            context.add_timing('perm', perf_counter() - started)
+                        
+                        if not has_permission:
+                            return JSONResponse(
+                                status_code=403,
+                                content={"detail": "No tiene permisos para acceder a este recurso"}
                             )
-                            
-                            if not has_permission:
-                                return JSONResponse(
-                                    status_code=403,
-                                    content={"detail": "No tiene permisos para acceder a este recurso"}
-                                )
-                        else:
-                            print("Warning: Permission service not available, allowing access")
                     except Exception as permission_error:
                         # En caso de error con permisos, permitir acceso pero log el error
                         print(f"Error verificando permisos: {permission_error}")
@@ -183,6 +190,9 @@ class AuthMiddleware(BaseHTTPMiddleware):
         if path in PUBLIC_ROUTES:
             return True
         
+        if path == METRICS_PATH and METRICS_PUBLIC:
+            return True
+        
         # Verificar rutas con métodos específicos públicos
         if path in PUBLIC_METHODS:
             if method in PUBLIC_METHODS[path]:
@@ -197,6 +207,12 @@ class AuthMiddleware(BaseHTTPMiddleware):
         
         return False
     
+    def has_metrics_token(self, authorization: Optional[str]) -> bool:
+        """Verificar si el header trae el token de métricas configurado"""
+        if not METRICS_TOKEN or not authorization:
+            return False
+        return hmac.compare_digest(authorization.encode('utf-8'), f"Bearer {METRICS_TOKEN}".encode('utf-8'))
+    
     def should_check_permissions(self, path: str) -> bool:
         """Determinar si se debe verificar permisos para una ruta"""
         # No verificar permisos para rutas internas o de sistema
@@ -236,11 +252,16 @@ class AuthMiddleware(BaseHTTPMiddleware):
             (r'/users/\d+', '/users/{id}'),
             
             # Rutas de tareas (nuevo módulo)
+            (r'/tasks/board/[^/]+', '/tasks/board/{state}'),
             (r'/tasks/\d+/state', '/tasks/{id}/state'),
             (r'/tasks/\d+/assign', '/tasks/{id}/assign'),
+            (r'/tasks/\d+/move', '/tasks/{id}/move'),
             (r'/tasks/\d+/unassign', '/tasks/{id}/unassign'),
             (r'/tasks/\d+', '/tasks/{id}'),
             
+            # Perfiles de requests (diagnóstico)
+            (r'/debug/profiles/[^/]+', '/debug/profiles/{id}'),
+            
             # Rutas de roles (mantenidas)
             (r'/roles/\d+', '/roles/{id}'),
             
@@ -315,6 +336,15 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         )
 
 # Dependency para obtener el usuario actual desde el middleware (para compatibilidad)
+# Rol que puede operar sobre los datos de cualquier usuario
+ADMIN_ROLE = 'administrador'
+
+
+def is_admin(user: Optional[dict]) -> bool:
+    """El payload del token pertenece al rol Administrador"""
+    return bool(user) and any(str(rol).lower() == ADMIN_ROLE for rol in user.get("roles", []))
+
+
 async def get_current_user_from_middleware(request: Request):
     """Obtener el usuario actual desde el estado del request (middleware)"""
     if hasattr(request.state, 'user'):
@@ -0,0 +1,73 @@
+"""
+Middleware ASGI de perfilado bajo demanda (header X-Profile: 1)
+
+Se ubica dentro de AuthMiddleware para conocer el usuario del token. Si el
+header no está presente, el costo es una búsqueda en la lista de headers.
+"""
+import cProfile
+from time import perf_counter
+from uuid import uuid4
+from starlette.datastructures import MutableHeaders
+
+from monitoring.profiling import ProfileReport, can_profile, profile_lock, profile_store
+from monitoring.request_context import current_request
+
+PROFILE_HEADER = b"x-profile"
+
+
+class ProfilingMiddleware:
+    """Perfilar el request con cProfile cuando un administrador lo solicita"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        context = current_request.get()
+        if context is None or not can_profile(scope.get("state", {}).get("user")):
+            await self.app(scope, receive, send)
+            return
+
+        if not profile_lock.acquire(blocking=False):
+            async def send_busy(message):
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).append("X-Profile-Status", "busy")
+                await send(message)
+            await self.app(scope, receive, send_busy)
+            return
+
+        profile_id = uuid4().hex
+        status_code = 500
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        loop_profiler = cProfile.Profile()
+        # TimedRoute agrega aquí los perfiles de los endpoints que corren en el threadpool
+        context.profilers = [loop_profiler]
+        start = perf_counter()
+        loop_profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            loop_profiler.disable()
+            seconds = perf_counter() - start
+            profilers, context.profilers = context.profilers, None
+            profile_lock.release()
+            profile_store.add(ProfileReport(
+                profile_id, scope["method"], scope["path"], status_code, seconds, profilers
+            ))
+
+
+def _profile_requested(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return value.strip() in (b"1", b"true")
+    return False
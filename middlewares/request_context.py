@@ -0,0 +1,80 @@
+"""
+Middleware ASGI que crea el contexto de diagnóstico de cada request
+
+Además, si DB_DEBUG_HEADERS está activo, agrega a la respuesta los headers
+X-DB-Queries (cantidad de consultas SQL) y X-DB-Time (milisegundos en la base),
+y si SERVER_TIMING_ENABLED está activo, el header Server-Timing. Con
+SLOW_REQUEST_TRACING activo, registra el request en el tracer de requests lentos
+(salvo los streams de eventos, que no terminan y no son requests lentos).
+"""
+from starlette.datastructures import MutableHeaders
+from config import DB_DEBUG_HEADERS, SERVER_TIMING_ENABLED, SLOW_REQUEST_TRACING
+from monitoring.request_context import RequestContext, current_request
+from monitoring.queries import record_request_queries
+from monitoring.slow_requests import tracer
+from monitoring.timing import server_timing_header
+from middlewares.metrics import UNMATCHED_ROUTE
+
+# Rutas de streams que quedan abiertas mientras el cliente esté conectado
+STREAMING_PATHS = ("/tasks/events",)
+
+
+class RequestContextMiddleware:
+    """Crear el RequestContext del request y exponer sus contadores en los headers"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestContext(scope)
+        token = current_request.set(request)
+        status_code = 500
+        traced = SLOW_REQUEST_TRACING and not _is_stream_path(scope)
+        if traced:
+            tracer.start(request)
+
+        async def send_with_headers(message):
+            nonlocal status_code, traced
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if traced and _is_event_stream(message):
+                    tracer.discard(request)
+                    traced = False
+                if DB_DEBUG_HEADERS:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("X-DB-Queries", str(request.query_count))
+                    headers.append("X-DB-Time", f"{request.query_seconds * 1000:.2f}")
+                if SERVER_TIMING_ENABLED:
+                    MutableHeaders(scope=message).append("Server-Timing", server_timing_header(request))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_request.reset(token)
+            if traced:
+                tracer.finish(request, status_code)
+            if request.query_count:
+                route = scope.get("route")
+                record_request_queries(
+                    scope["method"], route.path if route is not None else UNMATCHED_ROUTE, request
+                )
+
+
+def _is_stream_path(scope) -> bool:
+    path = scope["path"]
+    root_path = scope.get("root_path", "").rstrip("/")
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    return path in STREAMING_PATHS
+
+
+def _is_event_stream(message) -> bool:
+    for name, value in message.get("headers", []):
+        if name.lower() == b"content-type":
+            return value.startswith(b"text/event-stream")
+    return False
@@ -0,0 +1 @@
+# Monitoring module
\ No newline at end of file
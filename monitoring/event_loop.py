@@ -0,0 +1,139 @@
+"""
+Monitor de latencia del event loop y saturación del threadpool
+
+Una tarea en el event loop duerme LOOP_MONITOR_INTERVAL_MS y mide cuánto se
+atrasó al despertar (lag). En cada vuelta también toma el estado del limitador
+del threadpool de AnyIO (hilos ocupados, tareas en espera), que solo se puede
+leer desde el loop.
+
+Un hilo vigía controla que la tarea siga avanzando: si el loop deja de
+responder por más de LOOP_BLOCK_WARN_MS, captura el stack del hilo del loop
+(la llamada bloqueante, por ejemplo un endpoint async def que usa el ORM) y
+al recuperarse se registra una advertencia con la duración y ese stack.
+"""
+import asyncio
+import logging
+import sys
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Optional
+
+from anyio import to_thread
+
+from config import LOOP_MONITOR_INTERVAL_MS, LOOP_BLOCK_WARN_MS
+from .metrics import registry, family, LATENCY_BUCKETS
+from .slow_requests import format_stack
+
+event_loop_logger = logging.getLogger('monitoring.event_loop')
+
+# Nombre que AnyIO les da a los hilos de su threadpool
+WORKER_THREAD_NAME = 'AnyIO worker thread'
+
+
+class EventLoopMonitor:
+    """Lag del event loop, bloqueos detectados y estado del threadpool"""
+
+    def __init__(self, interval_ms: float, block_warn_ms: float):
+        self.interval = interval_ms / 1000
+        self.block_threshold = block_warn_ms / 1000
+        self.lag_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.lag_sum = 0.0
+        self.last_lag = 0.0
+        self.blocked_total = 0
+        self.threadpool = {"limit": 0, "active": 0, "queued": 0}
+        self._heartbeat = perf_counter()
+        self._loop_thread: Optional[int] = None
+        self._blocked_stack: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Iniciar la tarea de medición en el loop actual y el hilo vigía"""
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = perf_counter()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        threading.Thread(target=self._watch, name='event-loop-watchdog', daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _measure(self):
+        while True:
+            start = perf_counter()
+            await asyncio.sleep(self.interval)
+            now = perf_counter()
+            self._heartbeat = now
+            lag = max(0.0, now - start - self.interval)
+            self.last_lag = lag
+            self.lag_sum += lag
+            self.lag_buckets[bisect_left(LATENCY_BUCKETS, lag)] += 1
+            self._sample_threadpool()
+            if lag >= self.block_threshold:
+                self._report_block(lag)
+
+    def _sample_threadpool(self):
+        limiter = to_thread.current_default_thread_limiter()
+        self.threadpool = {
+            "limit": limiter.total_tokens,
+            "active": limiter.borrowed_tokens,
+            "queued": limiter.statistics().tasks_waiting,
+        }
+
+    def _report_block(self, lag: float):
+        self.blocked_total += 1
+        stack, self._blocked_stack = self._blocked_stack, None
+        event_loop_logger.warning(
+            f"Event loop bloqueado {lag * 1000:.0f} ms"
+            + (f" en: {stack}" if stack else "")
+        )
+
+    def _watch(self):
+        """Capturar el stack del loop mientras está bloqueado (corre en otro hilo)"""
+        while not self._stopped.wait(self.interval):
+            blocked_for = perf_counter() - self._heartbeat - self.interval
+            if blocked_for >= self.block_threshold and self._blocked_stack is None:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    self._blocked_stack = format_stack(frame)
+
+
+def _worker_threads() -> int:
+    return sum(1 for thread in threading.enumerate() if thread.name == WORKER_THREAD_NAME)
+
+
+monitor = EventLoopMonitor(LOOP_MONITOR_INTERVAL_MS, LOOP_BLOCK_WARN_MS)
+
+
+def _event_loop_metrics() -> dict:
+    lag = family('histogram', 'Atraso del event loop respecto del intervalo de medición (segundos)')
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), monitor.lag_buckets):
+        cumulative += count
+        lag["samples"].append(['_bucket', {"le": '+Inf' if bound == float('inf') else repr(bound)}, cumulative])
+    lag["samples"].append(['_sum', {}, monitor.lag_sum])
+    lag["samples"].append(['_count', {}, cumulative])
+
+    families = {
+        "event_loop_lag_seconds": lag,
+        "event_loop_last_lag_seconds": family('gauge', 'Último atraso medido del event loop (segundos)'),
+        "event_loop_blocked_total": family('counter', f'Bloqueos del event loop de más de {LOOP_BLOCK_WARN_MS:g} ms'),
+        "threadpool_limit": family('gauge', 'Hilos máximos del threadpool de AnyIO'),
+        "threadpool_active_threads": family('gauge', 'Hilos del threadpool ejecutando tareas'),
+        "threadpool_queued_tasks": family('gauge', 'Tareas esperando un hilo libre del threadpool'),
+        "threadpool_worker_threads": family('gauge', 'Hilos del threadpool creados (ocupados y ociosos)'),
+    }
+    families["event_loop_last_lag_seconds"]["samples"].append(['', {}, monitor.last_lag])
+    families["event_loop_blocked_total"]["samples"].append(['', {}, monitor.blocked_total])
+    families["threadpool_limit"]["samples"].append(['', {}, monitor.threadpool["limit"]])
+    families["threadpool_active_threads"]["samples"].append(['', {}, monitor.threadpool["active"]])
+    families["threadpool_queued_tasks"]["samples"].append(['', {}, monitor.threadpool["queued"]])
+    families["threadpool_worker_threads"]["samples"].append(['', {}, _worker_threads()])
+    return families
+
+
+registry.add_collector(_event_loop_metrics)
@@ -0,0 +1,257 @@
+"""
+Registro de métricas en proceso con exportación en formato de texto de Prometheus
+
+Las métricas HTTP (conteo, clases de estado, histogramas de latencia y
+solicitudes en curso) las registra middlewares.metrics.MetricsMiddleware.
+Otros módulos pueden aportar métricas propias con add_collector.
+
+Con varios workers de uvicorn, si METRICS_MULTIPROC_DIR está configurado, cada
+proceso vuelca periódicamente su snapshot a ese directorio y /metrics suma los
+snapshots de todos los procesos.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional
+
+from config import METRICS_MULTIPROC_DIR, METRICS_FLUSH_SECONDS
+
+# Límites superiores de los buckets de latencia (segundos)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUANTILES = (0.5, 0.95, 0.99)
+STATUS_CLASSES = ('1xx', '2xx', '3xx', '4xx', '5xx')
+
+
+class RouteStats:
+    """Contadores de una combinación método + plantilla de ruta"""
+    __slots__ = ('statuses', 'buckets', 'total_seconds')
+
+    def __init__(self):
+        self.statuses = [0, 0, 0, 0, 0]
+        # Un bucket extra para +Inf; los conteos no son acumulativos hasta exportar
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total_seconds = 0.0
+
+
+class MetricsRegistry:
+    """Métricas del proceso actual.
+
+    Las actualizaciones ocurren en el event loop (un solo hilo), por lo que no
+    se usan locks en el camino de cada request.
+    """
+
+    def __init__(self):
+        self.routes: Dict[tuple, RouteStats] = {}
+        self.in_flight: Dict[str, int] = {}
+        self._collectors: List[Callable[[], dict]] = []
+
+    def request_started(self, method: str):
+        self.in_flight[method] = self.in_flight.get(method, 0) + 1
+
+    def request_finished(self, method: str, route: str, status_code: int, seconds: float):
+        self.in_flight[method] -= 1
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteStats()
+        status_index = status_code // 100 - 1
+        if 0 <= status_index < 5:
+            stats.statuses[status_index] += 1
+        stats.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        stats.total_seconds += seconds
+
+    def add_collector(self, collector: Callable[[], dict]):
+        """Registrar una función que devuelve familias de métricas adicionales.
+
+        El formato es el mismo que el de snapshot():
+        {nombre: {"type": ..., "help": ..., "samples": [[sufijo, etiquetas, valor], ...]}}
+        """
+        self._collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        """Familias de métricas del proceso en un formato serializable a JSON"""
+        requests_total = family('counter', 'Cantidad de requests HTTP por ruta, método y clase de estado')
+        duration = family('histogram', 'Latencia de los requests HTTP en segundos')
+        in_flight = family('gauge', 'Requests HTTP en curso')
+
+        for (method, route), stats in list(self.routes.items()):
+            labels = {"method": method, "route": route}
+            for status_class, count in zip(STATUS_CLASSES, stats.statuses):
+                if count:
+                    requests_total["samples"].append(['', {**labels, "status": status_class}, count])
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), stats.buckets):
+                cumulative += count
+                duration["samples"].append(['_bucket', {**labels, "le": _format_bound(bound)}, cumulative])
+            duration["samples"].append(['_sum', labels, stats.total_seconds])
+            duration["samples"].append(['_count', labels, cumulative])
+
+        for method, count in list(self.in_flight.items()):
+            in_flight["samples"].append(['', {"method": method}, count])
+
+        families = {
+            "http_requests_total": requests_total,
+            "http_request_duration_seconds": duration,
+            "http_requests_in_flight": in_flight,
+        }
+        for collector in self._collectors:
+            families.update(collector())
+        return families
+
+
+def family(metric_type: str, help_text: str) -> dict:
+    return {"type": metric_type, "help": help_text, "samples": []}
+
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def merge_snapshots(snapshots: List[dict]) -> dict:
+    """Sumar muestras con el mismo nombre y etiquetas de varios procesos"""
+    merged: Dict[str, dict] = {}
+    for snapshot in snapshots:
+        for name, data in snapshot.items():
+            target = merged.setdefault(name, {"type": data["type"], "help": data["help"], "index": {}})
+            for suffix, labels, value in data["samples"]:
+                key = (suffix, tuple(sorted(labels.items())))
+                target["index"][key] = target["index"].get(key, 0) + value
+    return {
+        name: {
+            "type": data["type"],
+            "help": data["help"],
+            "samples": [[suffix, dict(labels), value] for (suffix, labels), value in data["index"].items()]
+        }
+        for name, data in merged.items()
+    }
+
+
+def estimate_quantile(buckets: List[tuple], quantile: float) -> Optional[float]:
+    """Estimar un cuantil interpolando linealmente dentro de buckets acumulativos [(le, conteo)]"""
+    total = buckets[-1][1] if buckets else 0
+    if not total:
+        return None
+    rank = quantile * total
+    previous_bound, previous_count = 0.0, 0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float('inf'):
+                return previous_bound
+            if count == previous_count:
+                return bound
+            return previous_bound + (bound - previous_bound) * (rank - previous_count) / (count - previous_count)
+        previous_bound, previous_count = bound, count
+    return previous_bound
+
+
+def _quantile_family(duration: dict) -> dict:
+    """Cuantiles p50/p95/p99 estimados a partir del histograma de latencia"""
+    quantiles = family('gauge', 'Latencia estimada por cuantil a partir del histograma (segundos)')
+    series: Dict[tuple, List[tuple]] = {}
+    for suffix, labels, value in duration["samples"]:
+        if suffix != '_bucket':
+            continue
+        key = (labels["method"], labels["route"])
+        bound = float('inf') if labels["le"] == '+Inf' else float(labels["le"])
+        series.setdefault(key, []).append((bound, value))
+    for (method, route), buckets in series.items():
+        buckets.sort()
+        for quantile in QUANTILES:
+            value = estimate_quantile(buckets, quantile)
+            if value is not None:
+                quantiles["samples"].append(
+                    ['', {"method": method, "route": route, "quantile": str(quantile)}, value]
+                )
+    return quantiles
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def render_prometheus(families: dict) -> str:
+    """Serializar las familias en formato de texto de Prometheus 0.0.4"""
+    if "http_request_duration_seconds" in families:
+        families = {
+            **families,
+            "http_request_duration_quantile_seconds": _quantile_family(families["http_request_duration_seconds"])
+        }
+
+    lines = []
+    for name in sorted(families):
+        data = families[name]
+        lines.append(f"# HELP {name} {data['help']}")
+        lines.append(f"# TYPE {name} {data['type']}")
+        for suffix, labels, value in data["samples"]:
+            if labels:
+                rendered = ','.join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                lines.append(f"{name}{suffix}{{{rendered}}} {value}")
+            else:
+                lines.append(f"{name}{suffix} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+# === Agregación entre procesos (varios workers) ===
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(METRICS_MULTIPROC_DIR, f"metrics_{pid}.json")
+
+
+def flush_snapshot():
+    """Volcar el snapshot del proceso al directorio compartido (escritura atómica)"""
+    if not METRICS_MULTIPROC_DIR:
+        return
+    path = _snapshot_path(os.getpid())
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w') as snapshot_file:
+        json.dump(registry.snapshot(), snapshot_file)
+    os.replace(temporary, path)
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            flush_snapshot()
+        except Exception:
+            pass
+
+
+_flusher_started = False
+
+
+def start_multiprocess_flusher():
+    """Iniciar el volcado periódico (una vez por proceso) si hay varios workers configurados"""
+    global _flusher_started
+    if _flusher_started or not METRICS_MULTIPROC_DIR:
+        return
+    _flusher_started = True
+    os.makedirs(METRICS_MULTIPROC_DIR, exist_ok=True)
+    threading.Thread(target=_flush_periodically, name='metrics-flusher', daemon=True).start()
+    atexit.register(flush_snapshot)
+
+
+def collect_all() -> dict:
+    """Métricas del proceso actual más las volcadas por los demás workers"""
+    snapshots = [registry.snapshot()]
+    if METRICS_MULTIPROC_DIR and os.path.isdir(METRICS_MULTIPROC_DIR):
+        own_path = _snapshot_path(os.getpid())
+        stale_after = 3 * METRICS_FLUSH_SECONDS
+        for entry in os.scandir(METRICS_MULTIPROC_DIR):
+            if not entry.name.endswith('.json') or entry.path == own_path:
+                continue
+            try:
+                with open(entry.path) as snapshot_file:
+                    snapshot = json.load(snapshot_file)
+            except (OSError, ValueError):
+                continue
+            # Los gauges de un worker que dejó de volcar ya no representan el presente
+            if time.time() - entry.stat().st_mtime > stale_after:
+                snapshot = {name: data for name, data in snapshot.items() if data["type"] != 'gauge'}
+            snapshots.append(snapshot)
+    return merge_snapshots(snapshots) if len(snapshots) > 1 else snapshots[0]
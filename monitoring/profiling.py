@@ -0,0 +1,119 @@
+"""
+Perfilado bajo demanda de requests individuales con cProfile
+
+Un usuario con un rol de PROFILING_ROLES puede enviar el header X-Profile: 1 en
+cualquier request. ProfilingMiddleware perfila el event loop mientras dura el
+request y TimedRoute perfila el endpoint cuando corre en el threadpool; ambos
+perfiles se combinan y se guardan en memoria con un id que se devuelve en el
+header X-Profile-Id. El reporte se consulta en GET /debug/profiles/{id}.
+
+Solo se perfila un request a la vez por proceso: cProfile sobre el event loop
+también registra lo que hacen otros requests concurrentes en ese lapso.
+
+Desde Python 3.12 cProfile usa sys.monitoring, que admite un solo perfilador
+activo por intérprete (un segundo enable() lanza ValueError) y registra todos
+los hilos. Ahí el perfilador del event loop es el único y también cubre el
+endpoint en el threadpool; TimedRoute no crea uno propio.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from config import PROFILING_ROLES, PROFILE_STORE_SIZE
+
+# Cantidad de funciones incluidas en el reporte de texto
+REPORT_LINES = 40
+
+
+class ProfileReport:
+    """Resultado del perfilado de un request"""
+
+    def __init__(self, profile_id: str, method: str, path: str, status_code: int,
+                 seconds: float, profilers: List[cProfile.Profile]):
+        self.profile_id = profile_id
+        self.method = method
+        self.path = path
+        self.status_code = status_code
+        self.seconds = seconds
+        self.created_at = datetime.now(timezone.utc)
+
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        # Formato de archivo de pstats (compatible con snakeviz, pstats.Stats(archivo))
+        self.pstats_data = marshal.dumps(stats.stats)
+
+        output = io.StringIO()
+        stats.stream = output
+        stats.sort_stats('cumulative').print_stats(REPORT_LINES)
+        self.text = output.getvalue()
+
+    def summary(self) -> dict:
+        return {
+            "profile_id": self.profile_id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "duration_ms": round(self.seconds * 1000, 2),
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+class ProfileStore:
+    """Últimos PROFILE_STORE_SIZE reportes del proceso"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._reports: "OrderedDict[str, ProfileReport]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, report: ProfileReport):
+        with self._lock:
+            self._reports[report.profile_id] = report
+            while len(self._reports) > self.size:
+                self._reports.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[ProfileReport]:
+        with self._lock:
+            return self._reports.get(profile_id)
+
+    def list(self) -> List[ProfileReport]:
+        with self._lock:
+            return list(reversed(self._reports.values()))
+
+
+profile_store = ProfileStore(PROFILE_STORE_SIZE)
+
+# Un solo request perfilado a la vez (cProfile admite un perfilador activo por hilo)
+profile_lock = threading.Lock()
+
+
+def can_profile(user: Optional[dict]) -> bool:
+    """El payload del token pertenece a un rol habilitado para perfilar"""
+    if not user:
+        return False
+    return any(str(rol).lower() in PROFILING_ROLES for rol in user.get("roles", []))
+
+
+# Antes de 3.12 cada hilo tiene su perfilador (sys.setprofile es por hilo)
+PER_THREAD_PROFILERS = sys.version_info < (3, 12)
+
+
+def profile_call(profilers: List[cProfile.Profile], function, *args, **kwargs):
+    """Ejecutar una función sincrónica bajo un perfilador propio del hilo actual"""
+    if not PER_THREAD_PROFILERS:
+        # El perfilador del request ya registra este hilo
+        return function(*args, **kwargs)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return function(*args, **kwargs)
+    finally:
+        profiler.disable()
+        profilers.append(profiler)
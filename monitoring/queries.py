@@ -0,0 +1,126 @@
+"""
+Conteo y tiempo de consultas SQL por request mediante eventos de SQLAlchemy
+
+Los eventos before/after_cursor_execute del engine de config.cnx acumulan
+cantidad y duración de consultas en el RequestContext actual, registran las
+consultas lentas (más de SLOW_QUERY_MS) con sus parámetros y la ruta, y
+alimentan las métricas db_queries_total / db_query_seconds_total por ruta.
+El inicio de cada consulta se guarda en su contexto de ejecución; handle_error
+cuenta también las que fallan. En el log, los textos de los parámetros se
+reemplazan por su largo (pueden ser emails o hashes de contraseñas).
+
+Los totales por ruta se acumulan al terminar cada request (en el event loop),
+porque las consultas de AuthMiddleware ocurren antes de que se conozca la ruta.
+"""
+import logging
+from time import perf_counter
+from typing import Dict
+from datetime import date, datetime
+from sqlalchemy import event
+
+from config import SLOW_QUERY_MS
+from config.cnx import engine
+from .metrics import registry, family
+from .request_context import RequestContext, current_request
+
+slow_query_logger = logging.getLogger('monitoring.slow_queries')
+
+# Largo máximo de los parámetros en el log de consultas lentas
+MAX_LOGGED_PARAMS = 500
+
+# Consultas guardadas por request para la captura de requests lentos
+MAX_TRACED_QUERIES = 200
+
+_slow_query_seconds = SLOW_QUERY_MS / 1000
+
+# Totales por (método, ruta): [consultas, segundos, consultas lentas]
+_route_totals: Dict[tuple, list] = {}
+
+
+@event.listens_for(engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start_time = perf_counter()
+
+
+@event.listens_for(engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_query(context, statement, parameters)
+
+
+@event.listens_for(engine, 'handle_error')
+def _handle_error(exception_context):
+    # after_cursor_execute no se dispara si la consulta falla
+    context = exception_context.execution_context
+    if context is not None:
+        _record_query(context, exception_context.statement, exception_context.parameters)
+
+
+def _record_query(context, statement, parameters):
+    started = getattr(context, '_query_start_time', None)
+    if started is None:
+        return
+    # Una sola vez por consulta (un error al leer resultados también llega a handle_error)
+    context._query_start_time = None
+    elapsed = perf_counter() - started
+    request = current_request.get()
+    if request is None:
+        return
+
+    request.query_count += 1
+    request.query_seconds += elapsed
+    if request.queries is not None and len(request.queries) < MAX_TRACED_QUERIES:
+        request.queries.append((statement, elapsed))
+
+    if elapsed >= _slow_query_seconds:
+        request.slow_query_count += 1
+        params = repr(_redact(parameters))
+        if len(params) > MAX_LOGGED_PARAMS:
+            params = params[:MAX_LOGGED_PARAMS] + '...'
+        slow_query_logger.warning(
+            f"Consulta lenta ({elapsed * 1000:.1f} ms) en {request.scope.get('method')} {request.route}: "
+            f"{' '.join(statement.split())} | parámetros: {params}"
+        )
+
+
+def _redact(value):
+    """Parámetros para el log: números, fechas y nulos tal cual; textos solo con su largo"""
+    if isinstance(value, dict):
+        return {key: _redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_redact(item) for item in value]
+    if value is None or isinstance(value, (bool, int, float, date, datetime)):
+        return value
+    if isinstance(value, (str, bytes)):
+        return f"<{len(value)} caracteres>"
+    return f"<{type(value).__name__}>"
+
+
+def record_request_queries(method: str, route: str, request: RequestContext):
+    """Sumar las consultas de un request terminado a los totales de su ruta"""
+    totals = _route_totals.get((method, route))
+    if totals is None:
+        totals = _route_totals[(method, route)] = [0, 0.0, 0]
+    totals[0] += request.query_count
+    totals[1] += request.query_seconds
+    totals[2] += request.slow_query_count
+
+
+def _query_metrics() -> dict:
+    queries = family('counter', 'Consultas SQL ejecutadas por ruta')
+    seconds = family('counter', 'Tiempo total en consultas SQL por ruta (segundos)')
+    slow = family('counter', f'Consultas SQL de más de {SLOW_QUERY_MS:g} ms por ruta')
+    for (method, route), (count, total_seconds, slow_count) in list(_route_totals.items()):
+        labels = {"method": method, "route": route}
+        queries["samples"].append(['', labels, count])
+        seconds["samples"].append(['', labels, total_seconds])
+        if slow_count:
+            slow["samples"].append(['', labels, slow_count])
+    return {
+        "db_queries_total": queries,
+        "db_query_seconds_total": seconds,
+        "db_slow_queries_total": slow,
+    }
+
+
+registry.add_collector(_query_metrics)
@@ -0,0 +1,47 @@
+"""
+Contexto de diagnóstico por request
+
+RequestContextMiddleware crea un RequestContext y lo guarda en una ContextVar.
+Los servicios corren en el threadpool con una copia del contexto, por lo que
+comparten el mismo objeto y pueden acumular datos en él (consultas SQL, tiempos).
+"""
+from contextvars import ContextVar
+from collections import Counter
+from time import perf_counter
+from typing import Dict, List, Optional
+
+
+class RequestContext:
+    """Datos de diagnóstico acumulados durante un request"""
+    __slots__ = ('scope', 'started', 'query_count', 'query_seconds', 'slow_query_count',
+                 'timings', 'endpoint_finished', 'profilers', 'queries', 'loop_thread',
+                 'worker_thread', 'stack_samples')
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.started = perf_counter()
+        self.query_count = 0
+        self.query_seconds = 0.0
+        self.slow_query_count = 0
+        # Segundos por etapa para el header Server-Timing
+        self.timings: Dict[str, float] = {}
+        self.endpoint_finished: Optional[float] = None
+        # Perfiles de cProfile cuando el request se está perfilando (X-Profile)
+        self.profilers: Optional[list] = None
+        # Datos para la captura de requests lentos (monitoring.slow_requests)
+        self.queries: Optional[List[tuple]] = None
+        self.loop_thread: Optional[int] = None
+        self.worker_thread: Optional[int] = None
+        self.stack_samples: Optional[Counter] = None
+
+    def add_timing(self, name: str, seconds: float):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    @property
+    def route(self) -> str:
+        """Plantilla de ruta si ya se enrutó el request, si no la URL"""
+        route = self.scope.get("route")
+        return route.path if route is not None else self.scope.get("path", "")
+
+
+current_request: ContextVar[Optional[RequestContext]] = ContextVar('current_request', default=None)
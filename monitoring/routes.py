@@ -0,0 +1,66 @@
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from .timing import TimedRoute
+from .metrics import collect_all, render_prometheus
+from .profiling import can_profile, profile_store
+from .slow_requests import tracer
+
+monitoring = APIRouter(route_class=TimedRoute)
+
+@monitoring.get('/metrics', include_in_schema=False)
+def metrics():
+    """Métricas en formato de texto de Prometheus"""
+    return Response(
+        content=render_prometheus(collect_all()),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def _require_profiling_role(request: Request):
+    if not can_profile(getattr(request.state, 'user', None)):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tiene permisos para acceder al diagnóstico"
+        )
+
+
+@monitoring.get('/debug/slow', status_code=status.HTTP_200_OK)
+def list_slow_requests(request: Request, route: str = Query(None), limit: int = Query(20, ge=1, le=1000)):
+    """Requests que superaron SLOW_REQUEST_MS en este proceso (más recientes primero)
+
+    Cada entrada incluye ruta, parámetros, consultas SQL, tiempos por etapa y
+    muestras de stack tomadas mientras el request estaba en curso.
+    """
+    _require_profiling_role(request)
+    records = tracer.records()
+    if route:
+        records = [record for record in records if record["route"] == route]
+    return records[:limit]
+
+
+@monitoring.get('/debug/profiles', status_code=status.HTTP_200_OK)
+def list_profiles(request: Request):
+    """Listar los perfiles guardados en este proceso (más recientes primero)"""
+    _require_profiling_role(request)
+    return [report.summary() for report in profile_store.list()]
+
+
+@monitoring.get('/debug/profiles/{profile_id}', status_code=status.HTTP_200_OK)
+def get_profile(request: Request, profile_id: str, format: str = Query('text', pattern='^(text|pstats)$')):
+    """Obtener el reporte de un request perfilado con X-Profile: 1
+
+    - **format=text**: funciones ordenadas por tiempo acumulado
+    - **format=pstats**: archivo binario para pstats o snakeviz
+    """
+    _require_profiling_role(request)
+    report = profile_store.get(profile_id)
+    if report is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Perfil no encontrado")
+    if format == 'pstats':
+        return Response(
+            content=report.pstats_data,
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
+        )
+    summary = report.summary()
+    header = f"{summary['method']} {summary['path']} -> {summary['status_code']} en {summary['duration_ms']} ms\n\n"
+    return Response(content=header + report.text, media_type="text/plain; charset=utf-8")
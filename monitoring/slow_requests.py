@@ -0,0 +1,151 @@
+"""
+Captura de requests lentos con consultas, tiempos y muestras de stack
+
+RequestContextMiddleware registra cada request en curso en el tracer. Un hilo
+muestreador revisa los requests en curso cada SLOW_REQUEST_SAMPLE_MS y, para
+los que ya superaron la mitad de SLOW_REQUEST_MS, guarda el stack del hilo que
+los está atendiendo (el del endpoint en el threadpool o, si no hay, el del
+event loop). Cada hilo se muestrea una vez por vuelta, y los requests rápidos
+no pagan el costo de las muestras. Los streams (text/event-stream, como
+/tasks/events) no se siguen: duran lo que dure la conexión.
+
+Al terminar, los requests que superaron SLOW_REQUEST_MS se guardan con su ruta,
+parámetros, consultas, tiempos y stacks en un buffer circular de
+SLOW_REQUEST_BUFFER_SIZE entradas, expuesto en GET /debug/slow.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import List, Set
+
+from config import SLOW_REQUEST_MS, SLOW_REQUEST_BUFFER_SIZE, SLOW_REQUEST_SAMPLE_MS
+from .request_context import RequestContext
+
+# Profundidad máxima de los stacks muestreados y cantidad de stacks por request
+MAX_STACK_DEPTH = 40
+MAX_STACKS = 20
+# Largo máximo de cada consulta guardada
+MAX_STATEMENT_LENGTH = 1000
+
+_slow_seconds = SLOW_REQUEST_MS / 1000
+_sample_after_seconds = _slow_seconds / 2
+
+
+def format_stack(frame) -> str:
+    """Stack en formato colapsado (raíz;...;hoja) como el que usan los flame graphs"""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SlowRequestTracer:
+    """Requests en curso, hilo muestreador y buffer de requests lentos"""
+
+    def __init__(self, size: int):
+        self._lock = threading.Lock()
+        self._in_flight: Set[RequestContext] = set()
+        self._slow = deque(maxlen=size)
+        self._sampler_started = False
+
+    def start(self, request: RequestContext):
+        request.queries = []
+        request.loop_thread = threading.get_ident()
+        with self._lock:
+            self._in_flight.add(request)
+        if not self._sampler_started:
+            self._start_sampler()
+
+    def discard(self, request: RequestContext):
+        """Dejar de seguir un request sin registrarlo (por ejemplo, un stream)"""
+        with self._lock:
+            self._in_flight.discard(request)
+
+    def finish(self, request: RequestContext, status_code: int):
+        with self._lock:
+            self._in_flight.discard(request)
+            samples = request.stack_samples
+        seconds = perf_counter() - request.started
+        if seconds >= _slow_seconds:
+            self._slow.append(_build_record(request, status_code, seconds, samples))
+
+    def records(self) -> List[dict]:
+        """Requests lentos guardados, más recientes primero"""
+        return list(reversed(self._slow))
+
+    def _start_sampler(self):
+        with self._lock:
+            if self._sampler_started:
+                return
+            self._sampler_started = True
+        threading.Thread(target=self._sample_forever, name='slow-request-sampler', daemon=True).start()
+
+    def _sample_forever(self):
+        interval = SLOW_REQUEST_SAMPLE_MS / 1000
+        while True:
+            time.sleep(interval)
+            try:
+                self._sample()
+            except Exception:
+                pass
+
+    def _sample(self):
+        now = perf_counter()
+        with self._lock:
+            candidates = [r for r in self._in_flight if now - r.started >= _sample_after_seconds]
+        if not candidates:
+            return
+        # Un stack por hilo y por muestra, armado fuera del lock: los requests
+        # que esperan en el event loop comparten el mismo stack
+        frames = sys._current_frames()
+        stacks = {}
+        sampled = []
+        for request in candidates:
+            thread_id = request.worker_thread or request.loop_thread
+            if thread_id not in stacks:
+                frame = frames.get(thread_id)
+                stacks[thread_id] = format_stack(frame) if frame is not None else None
+            if stacks[thread_id] is not None:
+                sampled.append((request, stacks[thread_id]))
+        del frames
+        with self._lock:
+            for request, stack in sampled:
+                if request not in self._in_flight:
+                    continue
+                if request.stack_samples is None:
+                    request.stack_samples = Counter()
+                request.stack_samples[stack] += 1
+
+def _build_record(request: RequestContext, status_code: int, seconds: float, samples) -> dict:
+    scope = request.scope
+    timings = {name: round(value * 1000, 2) for name, value in request.timings.items()}
+    timings['db'] = round(request.query_seconds * 1000, 2)
+    return {
+        "captured_at": datetime.now(timezone.utc).isoformat(),
+        "method": scope.get("method"),
+        "route": request.route,
+        "path": scope.get("path"),
+        "path_params": {key: str(value) for key, value in scope.get("path_params", {}).items()},
+        "query_string": scope.get("query_string", b"").decode("latin-1"),
+        "status_code": status_code,
+        "duration_ms": round(seconds * 1000, 2),
+        "timings_ms": timings,
+        "query_count": request.query_count,
+        "queries": [
+            {"sql": ' '.join(statement.split())[:MAX_STATEMENT_LENGTH], "duration_ms": round(elapsed * 1000, 3)}
+            for statement, elapsed in request.queries or []
+        ],
+        "stack_samples": [
+            {"stack": stack, "count": count}
+            for stack, count in (samples.most_common(MAX_STACKS) if samples else [])
+        ],
+    }
+
+
+tracer = SlowRequestTracer(SLOW_REQUEST_BUFFER_SIZE)
@@ -0,0 +1,104 @@
+"""
+Desglose de tiempos por request para el header Server-Timing
+
+Etapas:
+    auth       Decodificación del token (AuthMiddleware)
+    perm       Búsqueda de permisos (AuthMiddleware)
+    db         Tiempo total en consultas SQL (se superpone con perm y handler)
+    handler    Ejecución de la función del endpoint
+    serialize  Validación del response_model y serialización de la respuesta
+    total      Desde que el request entra a la aplicación hasta que empieza la respuesta
+
+Las etapas handler y serialize las mide TimedRoute, la clase de ruta de todos
+los routers. TimedRoute también perfila los endpoints sincrónicos en el hilo del
+threadpool cuando el request se está perfilando (monitoring.profiling) y anota
+el hilo del endpoint para las muestras de stack de monitoring.slow_requests.
+Con SERVER_TIMING_ENABLED, PROFILING_ENABLED y SLOW_REQUEST_TRACING desactivados,
+se comporta exactamente como APIRoute.
+"""
+from functools import wraps
+from inspect import iscoroutinefunction
+from time import perf_counter
+from fastapi.routing import APIRoute
+
+from threading import get_ident
+from config import SERVER_TIMING_ENABLED, PROFILING_ENABLED, SLOW_REQUEST_TRACING
+from .profiling import profile_call
+from .request_context import RequestContext, current_request
+
+# Orden y descripción de las etapas en el header (los headers solo admiten ASCII)
+TIMING_STAGES = (
+    ('auth', 'Token'),
+    ('perm', 'Permisos'),
+    ('db', 'Base de datos'),
+    ('handler', 'Handler'),
+    ('serialize', 'Serializacion'),
+)
+
+
+def _timed_endpoint(endpoint):
+    """Envolver el endpoint para medir su duración y el momento en que termina"""
+    if iscoroutinefunction(endpoint):
+        @wraps(endpoint)
+        async def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _endpoint_finished(start)
+    else:
+        # Los endpoints sincrónicos corren en el threadpool con una copia del contexto
+        @wraps(endpoint)
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            request = current_request.get()
+            try:
+                if request is not None:
+                    request.worker_thread = get_ident()
+                    if request.profilers is not None:
+                        return profile_call(request.profilers, endpoint, *args, **kwargs)
+                return endpoint(*args, **kwargs)
+            finally:
+                if request is not None:
+                    request.worker_thread = None
+                _endpoint_finished(start)
+    return timed
+
+
+def _endpoint_finished(start: float):
+    request = current_request.get()
+    if request is not None:
+        request.endpoint_finished = perf_counter()
+        request.add_timing('handler', request.endpoint_finished - start)
+
+
+class TimedRoute(APIRoute):
+    """APIRoute que separa el tiempo del endpoint del de la serialización"""
+
+    def get_route_handler(self):
+        if not (SERVER_TIMING_ENABLED or PROFILING_ENABLED or SLOW_REQUEST_TRACING):
+            return super().get_route_handler()
+
+        self.dependant.call = _timed_endpoint(self.dependant.call)
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            try:
+                return await handler(request)
+            finally:
+                context = current_request.get()
+                if context is not None and context.endpoint_finished is not None:
+                    context.add_timing('serialize', perf_counter() - context.endpoint_finished)
+        return timed_handler
+
+
+def server_timing_header(request: RequestContext) -> str:
+    """Armar el valor del header Server-Timing (duraciones en milisegundos)"""
+    timings = request.timings
+    parts = []
+    for name, description in TIMING_STAGES:
+        seconds = request.query_seconds if name == 'db' else timings.get(name)
+        if seconds is not None:
+            parts.append(f'{name};dur={seconds * 1000:.2f};desc="{description}"')
+    parts.append(f'total;dur={(perf_counter() - request.started) * 1000:.2f}')
+    return ', '.join(parts)
@@ -3,23 +3,35 @@ from typing import Optional, List, Literal
 from datetime import datetime
 import re
 
+def validar_comodines(ruta: Optional[str]) -> Optional[str]:
+    """El comodín "*" solo puede ocupar un segmento completo de la ruta"""
+    if ruta is not None and any('*' in segment and segment != '*' for segment in ruta.split('/')):
+        raise ValueError('El comodín "*" debe ocupar un segmento completo (por ejemplo /tasks/*)')
+    return ruta
+
 class PermisoBase(BaseModel):
     permiso_nombre: str = Field(..., min_length=1, max_length=100, description="Nombre único del permiso")
-    permiso_ruta: str = Field(..., min_length=1, max_length=255, description="Ruta del endpoint")
-    permiso_metodo: Literal["GET", "POST", "PUT", "DELETE", "PATCH"] = Field(..., description="Método HTTP")
+    permiso_ruta: str = Field(..., min_length=1, max_length=255,
+                              description="Ruta del endpoint; admite '*' como segmento (/tasks/*)")
+    permiso_metodo: Literal["GET", "POST", "PUT", "DELETE", "PATCH", "*"] = Field(
+        ..., description="Método HTTP o '*' para cualquiera")
     permiso_descripcion: Optional[str] = Field(None, max_length=500, description="Descripción del permiso")
     permiso_activo: bool = Field(True, description="Estado del permiso")
 
+    _validar_ruta = field_validator('permiso_ruta')(validar_comodines)
+
 class PermisoCreate(PermisoBase):
     pass
 
 class PermisoUpdate(BaseModel):
     permiso_nombre: Optional[str] = Field(None, min_length=1, max_length=100)
     permiso_ruta: Optional[str] = Field(None, min_length=1, max_length=255)
-    permiso_metodo: Optional[Literal["GET", "POST", "PUT", "DELETE", "PATCH"]] = None
+    permiso_metodo: Optional[Literal["GET", "POST", "PUT", "DELETE", "PATCH", "*"]] = None
     permiso_descripcion: Optional[str] = Field(None, max_length=500)
     permiso_activo: Optional[bool] = None
 
+    _validar_ruta = field_validator('permiso_ruta')(validar_comodines)
+
 class PermisoResponse(PermisoBase):
     permiso_id: int
     created_at: datetime
@@ -36,6 +48,14 @@ class RolPermisoRemove(BaseModel):
     rol_id: int = Field(..., description="ID del rol")
     permiso_ids: List[int] = Field(..., description="Lista de IDs de permisos a remover")
 
+class PermisoCheck(BaseModel):
+    ruta: str = Field(..., min_length=1, max_length=255, description="Ruta del endpoint")
+    metodo: Literal["GET", "POST", "PUT", "DELETE", "PATCH"] = Field(..., description="Método HTTP")
+
+class PermisoVerifyBatch(BaseModel):
+    user_rol_id: int = Field(..., description="ID del rol del usuario")
+    checks: List[PermisoCheck] = Field(..., min_length=1, max_length=200, description="Rutas y métodos a verificar")
+
 class PermisoWithRoles(PermisoResponse):
     roles: List[dict] = Field(default=[], description="Lista de roles que tienen este permiso")
 
@@ -0,0 +1,223 @@
+"""
+Matriz compilada de permisos por rol
+
+Para cada rol compila en memoria sus permisos activos más los heredados de sus
+roles padre (Rol.rol_padre_id). Los permisos admiten comodines:
+
+- Método "*": cualquier método HTTP.
+- Segmento "*" en medio de la ruta: un segmento cualquiera (/tasks/*/assign).
+- "*" al final de la ruta: el resto de la ruta, incluso vacío (/tasks/* cubre
+  /tasks, /tasks/{id} y /tasks/{id}/assign; "*" sola cubre todas las rutas).
+
+Los permisos exactos se resuelven con un lookup en un set. Los comodines se
+compilan en un árbol de segmentos por rol y el resultado de cada ruta
+consultada se memoriza, así que una verificación cuesta un lookup sin importar
+cuántos patrones tenga el rol.
+
+Los datos de origen (roles con su padre y permisos activos asignados) se
+guardan en la caché de la aplicación (namespace "permisos"), compartida entre
+workers con CACHE_BACKEND=redis: un worker que recompila la matriz no vuelve a
+consultar la base si otro ya lo hizo.
+
+La matriz y su origen cacheado se descartan con cada cambio hecho por
+PermisoService o roles.services (on_permissions_changed) y la matriz se vuelve
+a compilar en la siguiente verificación. Los demás workers la descartan al ver
+el cambio en cache_versions (cache/versions.py).
+"""
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from cache import CacheNamespace
+from cache.versions import on_version_change
+from config.cnx import SessionLocal
+from config.associations import rol_permiso_association
+from permisos.model import Permiso
+from roles.model import Rol
+
+WILDCARD = '*'
+# Rutas memorizadas por rol antes de vaciar la memoria (acota rutas arbitrarias)
+MAX_MEMO_ENTRIES = 10000
+
+
+def _segments(ruta: str) -> List[str]:
+    return [segment for segment in ruta.split('/') if segment]
+
+
+def _allowed(methods: set, metodo: str) -> bool:
+    return metodo in methods or WILDCARD in methods
+
+
+class _Node:
+    """Nodo del árbol de segmentos de los permisos con comodines"""
+    __slots__ = ('children', 'any_segment', 'methods', 'rest_methods')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.any_segment: Optional['_Node'] = None
+        self.methods = set()       # métodos permitidos si la ruta termina en este nodo
+        self.rest_methods = set()  # métodos permitidos para todo lo que sigue ("*" final)
+
+
+class RolMatcher:
+    """Permisos compilados de un rol (propios y heredados)"""
+
+    def __init__(self, permisos: Iterable[Tuple[str, str]]):
+        self.exact = set()
+        self.root: Optional[_Node] = None
+        self._memo: Dict[Tuple[str, str], bool] = {}
+        for ruta, metodo in permisos:
+            segments = _segments(ruta)
+            if metodo != WILDCARD and WILDCARD not in segments:
+                self.exact.add((ruta, metodo))
+                continue
+            if self.root is None:
+                self.root = _Node()
+            node = self.root
+            for position, segment in enumerate(segments):
+                if segment == WILDCARD and position == len(segments) - 1:
+                    node.rest_methods.add(metodo)
+                    break
+                if segment == WILDCARD:
+                    if node.any_segment is None:
+                        node.any_segment = _Node()
+                    node = node.any_segment
+                else:
+                    node = node.children.setdefault(segment, _Node())
+            else:
+                node.methods.add(metodo)
+
+    def allows(self, ruta: str, metodo: str) -> bool:
+        key = (ruta, metodo)
+        if key in self.exact:
+            return True
+        if self.root is None:
+            return False
+        result = self._memo.get(key)
+        if result is None:
+            result = self._match(ruta, metodo)
+            if len(self._memo) >= MAX_MEMO_ENTRIES:
+                self._memo.clear()
+            self._memo[key] = result
+        return result
+
+    def _match(self, ruta: str, metodo: str) -> bool:
+        nodes = [self.root]
+        for segment in _segments(ruta):
+            next_nodes = []
+            for node in nodes:
+                if _allowed(node.rest_methods, metodo):
+                    return True
+                child = node.children.get(segment)
+                if child is not None:
+                    next_nodes.append(child)
+                if node.any_segment is not None:
+                    next_nodes.append(node.any_segment)
+            if not next_nodes:
+                return False
+            nodes = next_nodes
+        return any(_allowed(node.methods, metodo) or _allowed(node.rest_methods, metodo) for node in nodes)
+
+
+class PermissionMatrix:
+    """Permisos compilados de todos los roles"""
+
+    def __init__(self, parents: Dict[int, Optional[int]], permisos: Iterable[Tuple[int, str, str]]):
+        own = defaultdict(list)
+        for rol_id, ruta, metodo in permisos:
+            own[rol_id].append((ruta, metodo))
+        self._roles = {
+            rol_id: RolMatcher(
+                permiso for ancestor in self.lineage(rol_id, parents) for permiso in own[ancestor]
+            )
+            for rol_id in parents
+        }
+
+    @staticmethod
+    def lineage(rol_id: int, parents: Dict[int, Optional[int]]) -> List[int]:
+        """El rol y sus ancestros, cortando en roles inexistentes o ciclos"""
+        chain = []
+        while rol_id is not None and rol_id in parents and rol_id not in chain:
+            chain.append(rol_id)
+            rol_id = parents[rol_id]
+        return chain
+
+    def allows(self, rol_id: int, ruta: str, metodo: str) -> bool:
+        matcher = self._roles.get(rol_id)
+        return matcher is not None and matcher.allows(ruta, metodo)
+
+
+_source = CacheNamespace('permisos')
+
+
+def _load_source(db: Session) -> dict:
+    """Roles con su padre y permisos activos asignados (dos consultas)"""
+    permisos = db.query(
+        rol_permiso_association.c.rol_id, Permiso.permiso_ruta, Permiso.permiso_metodo
+    ).join(
+        Permiso, Permiso.permiso_id == rol_permiso_association.c.permiso_id
+    ).filter(Permiso.permiso_activo == True).all()
+    return {
+        "roles": [list(row) for row in db.query(Rol.rol_id, Rol.rol_padre_id).all()],
+        "permisos": [list(row) for row in permisos],
+    }
+
+
+def load_permission_matrix(db: Session) -> PermissionMatrix:
+    """Compilar la matriz desde la caché, o desde la base si no está cacheada"""
+    source = _source.get_or_load('matriz', lambda: _load_source(db))
+    return PermissionMatrix(dict(source["roles"]), source["permisos"])
+
+
+_matrix: Optional[PermissionMatrix] = None
+_generation = 0
+_lock = threading.Lock()
+
+
+def invalidate_permission_matrix(local_only: bool = False):
+    """Descartar la matriz compilada y su origen cacheado; se recompila en la
+    siguiente verificación. local_only: el cambio lo hizo otro worker, que ya
+    invalidó el origen si la caché es compartida."""
+    global _matrix, _generation
+    if local_only:
+        _source.invalidate_local()
+    else:
+        _source.invalidate()
+    with _lock:
+        _generation += 1
+        _matrix = None
+
+
+for _nombre in ('permisos', 'roles'):
+    on_version_change(_nombre, lambda: invalidate_permission_matrix(local_only=True))
+
+
+def cached_permission_matrix() -> Optional[PermissionMatrix]:
+    """Matriz compilada vigente, o None si hay que compilarla"""
+    return _matrix
+
+
+def get_permission_matrix(db: Optional[Session] = None) -> PermissionMatrix:
+    """Matriz vigente, compilándola si hace falta (con db o con una sesión propia)"""
+    global _matrix
+    matrix = _matrix
+    if matrix is not None:
+        return matrix
+
+    with _lock:
+        generation = _generation
+    if db is not None:
+        matrix = load_permission_matrix(db)
+    else:
+        session = SessionLocal()
+        try:
+            matrix = load_permission_matrix(session)
+        finally:
+            session.close()
+
+    # Si hubo cambios mientras se compilaba, la matriz sirve para esta verificación
+    # pero no se guarda
+    with _lock:
+        if _generation == generation:
+            _matrix = matrix
+    return matrix
@@ -10,7 +10,7 @@ class Permiso(Base):
     permiso_id = Column(Integer, primary_key=True, autoincrement=True)
     permiso_nombre = Column(String(100), nullable=False, unique=True)
     permiso_ruta = Column(String(255), nullable=False)
-    permiso_metodo = Column(String(10), nullable=False)  # GET, POST, PUT, DELETE, PATCH
+    permiso_metodo = Column(String(10), nullable=False)  # GET, POST, PUT, DELETE, PATCH o * (cualquiera)
     permiso_descripcion = Column(String(500))
     permiso_activo = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from monitoring.timing import TimedRoute
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from config.cnx import get_db
@@ -9,12 +10,17 @@ from permisos.dto import (
     PermisoResponse, 
     RolPermisoAssign, 
     RolPermisoRemove,
+    PermisoVerifyBatch,
     PermisoWithRoles,
     RolWithPermisos
 )
 from middlewares.auth import get_current_user
+from cache.responses import cached_json_response
+from pydantic import TypeAdapter
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+_permiso_list = TypeAdapter(List[PermisoResponse])
 
 @router.get("/", response_model=List[PermisoResponse])
 async def get_permisos(
@@ -26,8 +32,10 @@ async def get_permisos(
 ):
     """Obtener lista de permisos con paginación"""
     service = PermisoService(db)
-    permisos = service.get_all_permisos(skip=skip, limit=limit, activo=activo)
-    return permisos
+    return cached_json_response(
+        '/permisos', {"skip": skip, "limit": limit, "activo": activo}, ('permisos',),
+        lambda: service.get_all_permisos(skip=skip, limit=limit, activo=activo), _permiso_list
+    )
 
 @router.get("/{permiso_id}", response_model=PermisoWithRoles)
 async def get_permiso(
@@ -156,4 +164,21 @@ async def verify_user_permission(
         "user_rol_id": user_rol_id,
         "ruta": ruta,
         "metodo": metodo
-    }
\ No newline at end of file
+    }
+
+@router.post("/usuario/verify/batch")
+async def verify_user_permissions_batch(
+    verify_data: PermisoVerifyBatch,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Verificar varias rutas y métodos de una vez (por ejemplo, las acciones de un menú)"""
+    service = PermisoService(db)
+    permisos = service.user_has_permissions(
+        verify_data.user_rol_id,
+        [(check.ruta, check.metodo) for check in verify_data.checks]
+    )
+    return {
+        "user_rol_id": verify_data.user_rol_id,
+        "permisos": permisos
+    }
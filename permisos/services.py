@@ -1,26 +1,60 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import text
-from typing import List, Optional
+from sqlalchemy import and_, insert, delete, select
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
+from functools import partial
 from fastapi import HTTPException
 from permisos.model import Permiso
-from permisos.dto import PermisoCreate, PermisoUpdate, RolPermisoAssign, RolPermisoRemove
+from permisos.dto import PermisoCreate, PermisoUpdate, PermisoResponse, RolPermisoAssign, RolPermisoRemove
 from roles.model import Rol
+from config.associations import rol_permiso_association
+from permisos.matcher import get_permission_matrix, invalidate_permission_matrix
+from cache import CacheNamespace
+from cache.responses import response_cache
+from cache.versions import bump_cache_versions, on_version_change
+
+# Funciones que invalidan cachés derivados de permisos y asignaciones rol-permiso.
+# Se llaman una sola vez por operación, después del commit.
+_change_listeners: List[Callable[[], None]] = []
+
+def on_permissions_changed(listener: Callable[[], None]):
+    """Registrar una función a llamar cuando cambian los permisos (usable como decorador)"""
+    _change_listeners.append(listener)
+    return listener
+
+def notify_permissions_changed():
+    """Avisar a los listeners; también lo usan roles.services (herencia de roles)"""
+    for listener in _change_listeners:
+        listener()
+
+# Catálogo de permisos para GET /permisos (compartido entre workers con Redis)
+_catalogo = CacheNamespace('catalogo_permisos')
+
+on_permissions_changed(invalidate_permission_matrix)
+on_permissions_changed(_catalogo.invalidate)
+on_permissions_changed(partial(response_cache.invalidate, 'permisos'))
+on_version_change('permisos', _catalogo.invalidate_local)
 
 class PermisoService:
     
     def __init__(self, db: Session):
         self.db = db
     
-    def get_all_permisos(self, skip: int = 0, limit: int = 100, activo: Optional[bool] = None) -> List[Permiso]:
-        """Obtener todos los permisos con paginación"""
-        query = self.db.query(Permiso)
-        
-        if activo is not None:
-            query = query.filter(Permiso.permiso_activo == activo)
+    def get_all_permisos(self, skip: int = 0, limit: int = 100, activo: Optional[bool] = None) -> List[dict]:
+        """Obtener todos los permisos con paginación (desde la caché del catálogo si está vigente)"""
+        def load():
+            query = self.db.query(Permiso)
             
-        return query.offset(skip).limit(limit).all()
+            if activo is not None:
+                query = query.filter(Permiso.permiso_activo == activo)
+            
+            return [
+                PermisoResponse.model_validate(permiso).model_dump(mode='json')
+                for permiso in query.offset(skip).limit(limit).all()
+            ]
+        
+        return _catalogo.get_or_load(f"lista:{skip}:{limit}:{activo}", load)
     
     def get_permiso_by_id(self, permiso_id: int) -> Optional[Permiso]:
         """Obtener permiso por ID"""
@@ -52,7 +86,9 @@ class PermisoService:
             
             permiso = Permiso(**permiso_data.model_dump())
             self.db.add(permiso)
+            bump_cache_versions(self.db, 'permisos')
             self.db.commit()
+            notify_permissions_changed()
             self.db.refresh(permiso)
             return permiso
         except IntegrityError as e:
@@ -84,7 +120,9 @@ class PermisoService:
             for field, value in permiso_data.model_dump(exclude_unset=True).items():
                 setattr(permiso, field, value)
             
+            bump_cache_versions(self.db, 'permisos')
             self.db.commit()
+            notify_permissions_changed()
             self.db.refresh(permiso)
             return permiso
         except IntegrityError:
@@ -99,134 +137,150 @@ class PermisoService:
         
         try:
             self.db.delete(permiso)
+            bump_cache_versions(self.db, 'permisos')
             self.db.commit()
+            notify_permissions_changed()
             return True
         except IntegrityError:
             self.db.rollback()
             raise HTTPException(status_code=400, detail="No se puede eliminar el permiso porque está en uso")
     
+    def _assigned_permiso_ids(self, rol_id: int) -> set:
+        return {
+            permiso_id for (permiso_id,) in self.db.query(rol_permiso_association.c.permiso_id).filter(
+                rol_permiso_association.c.rol_id == rol_id
+            )
+        }
+    
     def assign_permisos_to_rol(self, assign_data: RolPermisoAssign) -> dict:
-        """Asignar permisos a un rol"""
+        """Asignar permisos a un rol (reemplaza los existentes aplicando solo las diferencias)"""
         rol = self.db.query(Rol).filter(Rol.rol_id == assign_data.rol_id).first()
         if not rol:
             raise HTTPException(status_code=404, detail="Rol no encontrado")
         
         # Verificar que todos los permisos existen
-        permisos = self.db.query(Permiso).filter(
-            Permiso.permiso_id.in_(assign_data.permiso_ids),
+        requested = set(assign_data.permiso_ids)
+        found = self.db.query(Permiso.permiso_id).filter(
+            Permiso.permiso_id.in_(requested),
             Permiso.permiso_activo == True
-        ).all()
+        ).count() if requested else 0
         
-        if len(permisos) != len(assign_data.permiso_ids):
+        if found != len(requested):
             raise HTTPException(status_code=404, detail="Algunos permisos no fueron encontrados")
         
+        current = self._assigned_permiso_ids(assign_data.rol_id)
+        to_add = sorted(requested - current)
+        to_remove = sorted(current - requested)
+        
         try:
-            # Eliminar asignaciones existentes
-            delete_sql = text("DELETE FROM rol_permisos WHERE rol_id = :rol_id")
-            self.db.execute(delete_sql, {"rol_id": assign_data.rol_id})
-            
-            # Insertar nuevas asignaciones
-            for permiso_id in assign_data.permiso_ids:
-                insert_sql = text("""
-                    INSERT INTO rol_permisos (rol_id, permiso_id, created_at) 
-                    VALUES (:rol_id, :permiso_id, :created_at)
-                """)
-                self.db.execute(insert_sql, {
-                    "rol_id": assign_data.rol_id,
-                    "permiso_id": permiso_id,
-                    "created_at": datetime.utcnow()
-                })
+            if to_remove:
+                self.db.execute(delete(rol_permiso_association).where(
+                    rol_permiso_association.c.rol_id == assign_data.rol_id,
+                    rol_permiso_association.c.permiso_id.in_(to_remove)
+                ))
+            if to_add:
+                created_at = datetime.utcnow()
+                self.db.execute(insert(rol_permiso_association), [
+                    {"rol_id": assign_data.rol_id, "permiso_id": permiso_id, "created_at": created_at}
+                    for permiso_id in to_add
+                ])
+            if to_add or to_remove:
+                bump_cache_versions(self.db, 'permisos')
             
             self.db.commit()
-            return {"message": "Permisos asignados correctamente", "rol_id": assign_data.rol_id}
         except IntegrityError:
             self.db.rollback()
             raise HTTPException(status_code=400, detail="Error al asignar permisos")
+        
+        if to_add or to_remove:
+            notify_permissions_changed()
+        return {
+            "message": "Permisos asignados correctamente",
+            "rol_id": assign_data.rol_id,
+            "agregados": len(to_add),
+            "removidos": len(to_remove)
+        }
     
     def remove_permisos_from_rol(self, remove_data: RolPermisoRemove) -> dict:
-        """Remover permisos específicos de un rol"""
+        """Remover permisos específicos de un rol con un solo DELETE"""
         rol = self.db.query(Rol).filter(Rol.rol_id == remove_data.rol_id).first()
         if not rol:
             raise HTTPException(status_code=404, detail="Rol no encontrado")
         
+        removed = 0
         try:
-            # Remover permisos específicos
-            for permiso_id in remove_data.permiso_ids:
-                delete_sql = text("""
-                    DELETE FROM rol_permisos 
-                    WHERE rol_id = :rol_id AND permiso_id = :permiso_id
-                """)
-                self.db.execute(delete_sql, {
-                    "rol_id": remove_data.rol_id,
-                    "permiso_id": permiso_id
-                })
+            if remove_data.permiso_ids:
+                removed = self.db.execute(delete(rol_permiso_association).where(
+                    rol_permiso_association.c.rol_id == remove_data.rol_id,
+                    rol_permiso_association.c.permiso_id.in_(set(remove_data.permiso_ids))
+                )).rowcount
+            if removed:
+                bump_cache_versions(self.db, 'permisos')
             
             self.db.commit()
-            return {"message": "Permisos removidos correctamente", "rol_id": remove_data.rol_id}
         except Exception:
             self.db.rollback()
             raise HTTPException(status_code=400, detail="Error al remover permisos")
+        
+        if removed:
+            notify_permissions_changed()
+        return {
+            "message": "Permisos removidos correctamente",
+            "rol_id": remove_data.rol_id,
+            "removidos": removed
+        }
     
     def get_rol_permisos(self, rol_id: int) -> Optional[dict]:
-        """Obtener rol con sus permisos"""
-        rol = self.db.query(Rol).filter(Rol.rol_id == rol_id).first()
-        if not rol:
-            return None
-            
-        # Usar SQL directo para evitar problemas con joins
-        permisos_sql = text("""
-            SELECT p.* FROM permisos p 
-            INNER JOIN rol_permisos rp ON p.permiso_id = rp.permiso_id 
-            WHERE rp.rol_id = :rol_id AND p.permiso_activo = 1
-        """)
-        result = self.db.execute(permisos_sql, {"rol_id": rol_id})
+        """Obtener rol con sus permisos activos en una sola consulta"""
+        # LEFT JOIN para devolver el rol aunque no tenga permisos (Permiso queda en None)
+        rows = self.db.query(Rol, Permiso).outerjoin(
+            rol_permiso_association, rol_permiso_association.c.rol_id == Rol.rol_id
+        ).outerjoin(
+            Permiso, and_(
+                Permiso.permiso_id == rol_permiso_association.c.permiso_id,
+                Permiso.permiso_activo == True
+            )
+        ).filter(Rol.rol_id == rol_id).order_by(Permiso.permiso_id).all()
         
-        permisos = []
-        for row in result:
-            permiso = self.db.query(Permiso).filter(Permiso.permiso_id == row.permiso_id).first()
-            if permiso:
-                permisos.append(permiso)
+        if not rows:
+            return None
         
+        rol = rows[0][0]
         return {
             "rol_id": rol.rol_id,
             "rol_nombre": rol.rol_nombre,
-            "permisos": permisos
+            "permisos": [permiso for _, permiso in rows if permiso is not None]
         }
     
     def user_has_permission(self, user_rol_id: int, ruta: str, metodo: str) -> bool:
-        """Verificar si un usuario tiene permiso para una ruta y método específico"""
-        # Verificar si existe el permiso usando SQL directo
-        permission_sql = text("""
-            SELECT COUNT(*) as count FROM permisos p 
-            INNER JOIN rol_permiso rp ON p.permiso_id = rp.permiso_id 
-            WHERE rp.rol_id = :rol_id 
-            AND p.permiso_ruta = :ruta 
-            AND p.permiso_metodo = :metodo 
-            AND p.permiso_activo = 1
-        """)
-        result = self.db.execute(permission_sql, {
-            "rol_id": user_rol_id,
-            "ruta": ruta,
-            "metodo": metodo
-        })
-        
-        count = result.fetchone()
-        return count[0] > 0 if count else False
+        """Verificar si un usuario tiene permiso para una ruta y método específico.
+
+        Usa la matriz compilada (comodines y roles heredados); sin consultas
+        salvo cuando hay que recompilarla.
+        """
+        return get_permission_matrix(self.db).allows(user_rol_id, ruta, metodo)
+    
+    def user_has_permissions(self, user_rol_id: int, checks: List[Tuple[str, str]]) -> Dict[str, bool]:
+        """Verificar varias rutas y métodos contra la matriz compilada.
+
+        Devuelve un mapa {"METODO ruta": bool} con una entrada por cada par.
+        """
+        matrix = get_permission_matrix(self.db)
+        return {f"{metodo} {ruta}": matrix.allows(user_rol_id, ruta, metodo) for ruta, metodo in checks}
     
     def get_user_permissions(self, user_rol_id: int) -> List[Permiso]:
-        """Obtener todos los permisos de un usuario basado en su rol"""
-        # Obtener permisos usando SQL directo
-        permisos_sql = text("""
-            SELECT p.* FROM permisos p 
-            INNER JOIN rol_permiso rp ON p.permiso_id = rp.permiso_id 
-            WHERE rp.rol_id = :rol_id AND p.permiso_activo = 1
-        """)
-        result = self.db.execute(permisos_sql, {"rol_id": user_rol_id})
-        
-        permisos = []
-        for row in result:
-            permiso = self.db.query(Permiso).filter(Permiso.permiso_id == row.permiso_id).first()
-            if permiso:
-                permisos.append(permiso)
-        
-        return permisos
\ No newline at end of file
+        """Obtener todos los permisos de un usuario basado en su rol, incluidos los
+        heredados de los roles padre (una sola consulta recursiva)"""
+        linaje = self.db.query(Rol.rol_id, Rol.rol_padre_id).filter(
+            Rol.rol_id == user_rol_id
+        ).cte(name="linaje", recursive=True)
+        # UNION (no UNION ALL) corta los ciclos de herencia
+        linaje = linaje.union(
+            self.db.query(Rol.rol_id, Rol.rol_padre_id).join(linaje, Rol.rol_id == linaje.c.rol_padre_id)
+        )
+        return self.db.query(Permiso).join(
+            rol_permiso_association, rol_permiso_association.c.permiso_id == Permiso.permiso_id
+        ).filter(
+            rol_permiso_association.c.rol_id.in_(select(linaje.c.rol_id)),
+            Permiso.permiso_activo == True
+        ).distinct().order_by(Permiso.permiso_id).all()
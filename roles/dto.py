@@ -5,6 +5,7 @@ from typing import Optional
 class RolBase(BaseModel):
     rol_nombre: str
     rol_permisos: Optional[str] = None
+    rol_padre_id: Optional[int] = None
 
 
 class RolCreate(RolBase):
@@ -22,12 +23,14 @@ class RolUpdate(BaseModel):
     """DTO para actualizar un rol"""
     rol_nombre: Optional[str] = None
     rol_permisos: Optional[str] = None
+    rol_padre_id: Optional[int] = None
 
     class Config:
         json_schema_extra = {
             "example": {
                 "rol_nombre": "Editor",
-                "rol_permisos": "editar,ver"
+                "rol_permisos": "editar,ver",
+                "rol_padre_id": 3
             }
         }
 
@@ -42,6 +45,7 @@ class RolOut(RolBase):
             "example": {
                 "rol_id": 1,
                 "rol_nombre": "Administrador",
-                "rol_permisos": "crear,editar,eliminar,ver"
+                "rol_permisos": "crear,editar,eliminar,ver",
+                "rol_padre_id": None
             }
         }
\ No newline at end of file
@@ -9,6 +9,8 @@ class Rol(Base):
     rol_id = Column (Integer, primary_key=True, autoincrement=True)
     rol_nombre = Column (String (50), nullable=False, unique=True)
     rol_permisos = Column (String (200))  # Ampliado y mantenido por compatibilidad
+    # Rol del que hereda permisos (por ejemplo, Gerente hereda de Empleado)
+    rol_padre_id = Column (Integer, ForeignKey('roles.rol_id', ondelete='SET NULL'), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     
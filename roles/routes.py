@@ -1,17 +1,22 @@
 from fastapi import APIRouter, HTTPException, status
+from monitoring.timing import TimedRoute
 from typing import List
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from .dto import RolCreate, RolOut, RolUpdate
 from .services import get_all_roles, get_rol_by_id, create_rol, update_rol, delete_rol
+from cache.responses import cached_json_response
+from pydantic import TypeAdapter
 
-roles = APIRouter()
+roles = APIRouter(route_class=TimedRoute)
+
+_rol_list = TypeAdapter(List[RolOut])
 
 
 @roles.get('', response_model=List[RolOut], status_code=status.HTTP_200_OK)
 def get_roles():
     """Obtener todos los roles"""
     try:
-        return get_all_roles()
+        return cached_json_response('/roles', {}, ('roles',), get_all_roles, _rol_list)
     except SQLAlchemyError:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -110,7 +115,8 @@ def patch_rol(rol_id: int, update_data: RolUpdate):
         raise
     except ValueError as e:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
+            # Un rol padre inválido es un error del cliente, no un rol inexistente
+            status_code=status.HTTP_404_NOT_FOUND if str(e) == "Rol no encontrado" else status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
     except SQLAlchemyError:
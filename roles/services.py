@@ -1,19 +1,58 @@
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from config.cnx import SessionLocal
 from .model import Rol
-from .dto import RolCreate, RolUpdate
+from .dto import RolCreate, RolUpdate, RolOut
+from cache import CacheNamespace
+from cache.responses import response_cache
+from cache.singleflight import SingleFlight
+from cache.versions import bump_cache_versions, on_version_change
+from permisos.services import notify_permissions_changed
+from users.cache import invalidate_all_profiles
 import logging
 
 # Obtener logger para este módulo
 logger = logging.getLogger(__name__)
 
+# Catálogo de roles (compartido entre workers con Redis); se invalida en cada cambio
+_catalogo = CacheNamespace('roles')
+on_version_change('roles', _catalogo.invalidate_local)
+_cargas = SingleFlight('roles')
+
+
+def _validate_parent(db, rol_id, rol_padre_id):
+    """Verificar que el rol padre exista y que la herencia no forme un ciclo"""
+    parents = dict(db.query(Rol.rol_id, Rol.rol_padre_id).all())
+    if rol_padre_id not in parents:
+        raise ValueError("Rol padre no encontrado")
+    ancestor = rol_padre_id
+    while ancestor is not None:
+        if ancestor == rol_id:
+            raise ValueError("La herencia de roles no puede formar un ciclo")
+        ancestor = parents.get(ancestor)
+
 
 def get_all_roles():
-    """Obtener todos los roles"""
+    """Obtener todos los roles (desde la caché del catálogo si está vigente).
+
+    Si la caché no tiene la lista, las llamadas simultáneas comparten una sola
+    consulta; la clave lleva la versión, así una carga empezada antes de un
+    cambio no se comparte con las lecturas posteriores.
+    """
+    version = _catalogo.version()
+    roles = _catalogo.get('todos', version=version)
+    if roles is not None:
+        return roles
+    return _cargas.do(f"todos:v{version}", lambda: _load_all_roles(version))
+
+
+def _load_all_roles(version: int):
+    """Consultar todos los roles y guardarlos en la caché del catálogo"""
     db = None
     try:
         db = SessionLocal()
-        roles = db.query(Rol).all()
+        roles = [RolOut.model_validate(rol).model_dump() for rol in db.query(Rol).all()]
+        # También cada rol por ID, para GET /roles/{id}
+        _catalogo.set_many({'todos': roles, **{f"rol:{rol['rol_id']}": rol for rol in roles}}, version=version)
         return roles
     except SQLAlchemyError as e:
         logger.error(f"Error de base de datos al obtener roles: {str(e)}")
@@ -30,6 +69,11 @@ def get_rol_by_id(rol_id: int):
         if rol_id <= 0:
             raise ValueError("ID de rol inválido")
 
+        version = _catalogo.version()
+        rol = _catalogo.get(f"rol:{rol_id}", version=version)
+        if rol is not None:
+            return rol
+
         db = SessionLocal()
         rol = db.query(Rol).filter(Rol.rol_id == rol_id).first()
 
@@ -37,6 +81,8 @@ def get_rol_by_id(rol_id: int):
             logger.warning(f"Rol {rol_id} no encontrado")
             raise ValueError("Rol no encontrado")
 
+        rol = RolOut.model_validate(rol).model_dump()
+        _catalogo.set(f"rol:{rol_id}", rol, version=version)
         return rol
     except ValueError:
         raise
@@ -54,13 +100,21 @@ def create_rol(rol_data: RolCreate):
     try:
         db = SessionLocal()
 
+        if rol_data.rol_padre_id is not None:
+            _validate_parent(db, None, rol_data.rol_padre_id)
+
         rol = Rol(
             rol_nombre=rol_data.rol_nombre,
-            rol_permisos=rol_data.rol_permisos
+            rol_permisos=rol_data.rol_permisos,
+            rol_padre_id=rol_data.rol_padre_id
         )
 
         db.add(rol)
+        bump_cache_versions(db, 'roles')
         db.commit()
+        _catalogo.invalidate()
+        response_cache.invalidate('roles')
+        notify_permissions_changed()
         db.refresh(rol)
 
         return rol
@@ -94,10 +148,22 @@ def update_rol(rol_id: int, update_data: RolUpdate):
             logger.warning(f"Intento de actualizar rol inexistente: {rol_id}")
             raise ValueError("Rol no encontrado")
 
-        for key, value in update_data.dict(exclude_unset=True).items():
+        changes = update_data.dict(exclude_unset=True)
+        if changes.get('rol_padre_id') is not None:
+            _validate_parent(db, rol_id, changes['rol_padre_id'])
+
+        for key, value in changes.items():
             setattr(rol, key, value)
 
+        bump_cache_versions(db, 'roles')
         db.commit()
+        _catalogo.invalidate()
+        response_cache.invalidate('roles')
+        if 'rol_nombre' in changes:
+            # Los perfiles muestran el nombre de los roles
+            invalidate_all_profiles()
+        if 'rol_padre_id' in changes:
+            notify_permissions_changed()
         db.refresh(rol)
 
         return rol
@@ -128,8 +194,15 @@ def delete_rol(rol_id: int):
         if not rol:
             raise ValueError("Rol no encontrado")
 
+        # Los roles hijos dejan de heredar (SQLite no aplica ON DELETE sin PRAGMA foreign_keys)
+        db.query(Rol).filter(Rol.rol_padre_id == rol_id).update({Rol.rol_padre_id: None})
         db.delete(rol)
+        bump_cache_versions(db, 'roles')
         db.commit()
+        _catalogo.invalidate()
+        response_cache.invalidate('roles')
+        invalidate_all_profiles()
+        notify_permissions_changed()
 
         return True
     except ValueError:
@@ -27,6 +27,7 @@ from seed_usuarios import seed_usuarios, create_users_table
 from seed_permisos import seed_permisos, create_permissions_table
 from seed_rol_permisos import seed_rol_permisos
 from seed_tasks import seed_tasks, create_tasks_table
+from seed_scale import seed_scale, SCALE_PASSWORD
 
 # Configurar logging silencioso para seeders
 logging.basicConfig(
@@ -165,6 +166,29 @@ def run_individual_seeder(seeder_name):
         print(f"❌ Error en seeder '{seeder_name}': {e}")
         raise
 
+def run_scale_seeder(scale, tasks_per_user=10, seed=42):
+    """Cargar roles y permisos del sistema y generar datos sintéticos a escala"""
+    
+    print("\n" + "="*60)
+    print(f"📈 GENERANDO DATOS A ESCALA: {scale} usuarios, {scale * tasks_per_user} tareas (semilla {seed})")
+    print("="*60)
+    
+    try:
+        create_all_tables()
+        seed_roles()
+        seed_permisos()
+        seed_rol_permisos()
+        
+        print("\n" + "="*40)
+        print("📈 Generando usuarios, tareas y asignaciones")
+        print("="*40)
+        seed_scale(scale, tasks_per_user=tasks_per_user, seed=seed)
+        print(f"\n🔑 Todos los usuarios generados usan la contraseña: {SCALE_PASSWORD}")
+    except Exception as e:
+        print(f"\n❌ ERROR DURANTE LA GENERACIÓN A ESCALA: {e}")
+        logger.error(f"❌ Error durante la generación a escala: {e}")
+        raise
+
 def show_help():
     """Mostrar ayuda de uso"""
     print("""
@@ -181,11 +205,15 @@ COMANDOS:
     rol-permisos           Asignar permisos a roles
     tasks                  Cargar tareas de ejemplo
     help                   Mostrar esta ayuda
+    --scale N              Generar N usuarios sintéticos con sus tareas y roles
+        [--tasks-per-user T]   Tareas por usuario (por defecto 10)
+        [--seed S]             Semilla para datos reproducibles (por defecto 42)
 
 EJEMPLOS:
     python seed_main.py all           # Seeding completo
     python seed_main.py roles         # Solo roles
     python seed_main.py permisos      # Solo permisos
+    python seed_main.py --scale 100000  # 100.000 usuarios y 1.000.000 de tareas
 
 ORDEN RECOMENDADO (para ejecución individual):
     1. roles
@@ -201,7 +229,15 @@ if __name__ == "__main__":
     if len(sys.argv) > 1:
         command = sys.argv[1].lower()
         
-        if command == 'all':
+        if command == '--scale':
+            import argparse
+            parser = argparse.ArgumentParser(prog='seed_main.py', description='Generar datos sintéticos a escala')
+            parser.add_argument('--scale', type=int, required=True, help='Cantidad de usuarios a generar')
+            parser.add_argument('--tasks-per-user', type=int, default=10, help='Tareas por usuario')
+            parser.add_argument('--seed', type=int, default=42, help='Semilla de los datos generados')
+            args = parser.parse_args()
+            run_scale_seeder(args.scale, args.tasks_per_user, args.seed)
+        elif command == 'all':
             run_all_seeders()
         elif command == 'help':
             show_help()
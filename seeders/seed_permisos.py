@@ -98,6 +98,36 @@ def seed_permisos():
                 "permiso_metodo": "GET",
                 "permiso_descripcion": "Listar todas las tareas"
             },
+            {
+                "permiso_nombre": "tasks.estadisticas",
+                "permiso_ruta": "/tasks/stats",
+                "permiso_metodo": "GET",
+                "permiso_descripcion": "Ver estadísticas de tareas por estado y usuario"
+            },
+            {
+                "permiso_nombre": "tasks.tablero",
+                "permiso_ruta": "/tasks/board",
+                "permiso_metodo": "GET",
+                "permiso_descripcion": "Ver el tablero de tareas por estado"
+            },
+            {
+                "permiso_nombre": "tasks.tablero_columna",
+                "permiso_ruta": "/tasks/board/{state}",
+                "permiso_metodo": "GET",
+                "permiso_descripcion": "Cargar más tareas de una columna del tablero"
+            },
+            {
+                "permiso_nombre": "tasks.cambios",
+                "permiso_ruta": "/tasks/changes",
+                "permiso_metodo": "GET",
+                "permiso_descripcion": "Sincronizar cambios de tareas desde un cursor"
+            },
+            {
+                "permiso_nombre": "tasks.eventos",
+                "permiso_ruta": "/tasks/events",
+                "permiso_metodo": "GET",
+                "permiso_descripcion": "Recibir cambios de tareas en vivo (SSE)"
+            },
             {
                 "permiso_nombre": "tasks.ver",
                 "permiso_ruta": "/tasks/{id}",
@@ -122,6 +152,18 @@ def seed_permisos():
                 "permiso_metodo": "POST",
                 "permiso_descripcion": "Asignar usuario a una tarea"
             },
+            {
+                "permiso_nombre": "tasks.eliminar",
+                "permiso_ruta": "/tasks/{id}",
+                "permiso_metodo": "DELETE",
+                "permiso_descripcion": "Eliminar una tarea (soft delete)"
+            },
+            {
+                "permiso_nombre": "tasks.mover",
+                "permiso_ruta": "/tasks/{id}/move",
+                "permiso_metodo": "PATCH",
+                "permiso_descripcion": "Reordenar una tarea en la lista de un usuario"
+            },
             {
                 "permiso_nombre": "tasks.desasignar_usuario",
                 "permiso_ruta": "/tasks/{id}/unassign",
@@ -181,6 +223,30 @@ def seed_permisos():
                 "permiso_metodo": "GET",
                 "permiso_descripcion": "Acceder a documentación de la API"
             },
+            {
+                "permiso_nombre": "system.perfiles",
+                "permiso_ruta": "/debug/profiles",
+                "permiso_metodo": "GET",
+                "permiso_descripcion": "Listar perfiles de requests (X-Profile)"
+            },
+            {
+                "permiso_nombre": "system.perfil",
+                "permiso_ruta": "/debug/profiles/{id}",
+                "permiso_metodo": "GET",
+                "permiso_descripcion": "Ver el reporte de un request perfilado"
+            },
+            {
+                "permiso_nombre": "system.requests_lentos",
+                "permiso_ruta": "/debug/slow",
+                "permiso_metodo": "GET",
+                "permiso_descripcion": "Ver requests lentos capturados con muestras de stack"
+            },
+            {
+                "permiso_nombre": "system.metricas",
+                "permiso_ruta": "/metrics",
+                "permiso_metodo": "GET",
+                "permiso_descripcion": "Leer las métricas de Prometheus"
+            },
             
             # === PERMISOS DE PERMISOS (META-PERMISOS) ===
             {
@@ -224,6 +290,12 @@ def seed_permisos():
                 "permiso_ruta": "/permisos/remove",
                 "permiso_metodo": "POST",
                 "permiso_descripcion": "Remover permisos de roles"
+            },
+            {
+                "permiso_nombre": "permisos.verificar_lote",
+                "permiso_ruta": "/permisos/usuario/verify/batch",
+                "permiso_metodo": "POST",
+                "permiso_descripcion": "Verificar varias rutas y métodos de una vez"
             }
         ]
         
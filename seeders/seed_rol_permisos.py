@@ -37,18 +37,22 @@ def seed_rol_permisos():
                 # === PERMISOS COMPLETOS DE ADMINISTRADOR ===
                 # Sistema
                 "system.home", "system.health", "system.docs",
+                "system.perfiles", "system.perfil", "system.requests_lentos", "system.metricas",
                 # Usuarios
                 "users.listar", "users.listar_eliminados", "users.crear", "users.insertar", 
                 "users.ver_perfil", "users.ver", "users.actualizar", "users.eliminar", 
                 "users.restaurar", "users.login",
                 # Tareas
                 "tasks.listar", "tasks.ver", "tasks.crear", "tasks.actualizar_estado",
-                "tasks.asignar_usuario", "tasks.desasignar_usuario",
+                "tasks.asignar_usuario", "tasks.desasignar_usuario", "tasks.estadisticas",
+                "tasks.tablero", "tasks.tablero_columna", "tasks.mover",
+                "tasks.cambios", "tasks.eventos", "tasks.eliminar",
                 # Roles
                 "roles.listar", "roles.crear", "roles.ver", "roles.actualizar", "roles.eliminar",
                 # Permisos (meta-administración)
                 "permisos.listar", "permisos.crear", "permisos.ver", "permisos.actualizar", 
-                "permisos.eliminar", "permisos.asignar_rol", "permisos.remover_rol"
+                "permisos.eliminar", "permisos.asignar_rol", "permisos.remover_rol",
+                "permisos.verificar_lote"
             ],
             "gerente": [
                 # === PERMISOS DE GESTIÓN PARA GERENTE ===
@@ -58,11 +62,13 @@ def seed_rol_permisos():
                 "users.listar", "users.ver_perfil", "users.ver", "users.actualizar", "users.login",
                 # Tareas (gestión completa)
                 "tasks.listar", "tasks.ver", "tasks.crear", "tasks.actualizar_estado",
-                "tasks.asignar_usuario", "tasks.desasignar_usuario",
+                "tasks.asignar_usuario", "tasks.desasignar_usuario", "tasks.estadisticas",
+                "tasks.tablero", "tasks.tablero_columna", "tasks.mover",
+                "tasks.cambios", "tasks.eventos", "tasks.eliminar",
                 # Roles (solo lectura)
                 "roles.listar", "roles.ver",
                 # Permisos (solo lectura)
-                "permisos.listar", "permisos.ver"
+                "permisos.listar", "permisos.ver", "permisos.verificar_lote"
             ],
             "empleado": [
                 # === PERMISOS BÁSICOS PARA EMPLEADO ===
@@ -71,7 +77,11 @@ def seed_rol_permisos():
                 # Usuarios (solo perfil propio)
                 "users.ver_perfil", "users.login",
                 # Tareas (lectura y gestión limitada)
-                "tasks.listar", "tasks.ver", "tasks.actualizar_estado"
+                "tasks.listar", "tasks.ver", "tasks.actualizar_estado",
+                "tasks.tablero", "tasks.tablero_columna", "tasks.mover",
+                "tasks.cambios", "tasks.eventos",
+                # Permisos (acciones disponibles en el menú)
+                "permisos.verificar_lote"
             ],
             "cliente": [
                 # === PERMISOS PARA CLIENTE ===
@@ -80,7 +90,9 @@ def seed_rol_permisos():
                 # Usuarios (perfil propio)
                 "users.ver_perfil", "users.actualizar", "users.login",
                 # Tareas (solo ver las asignadas)
-                "tasks.listar", "tasks.ver", "tasks.actualizar_estado"
+                "tasks.listar", "tasks.ver", "tasks.actualizar_estado",
+                # Permisos (acciones disponibles en el menú)
+                "permisos.verificar_lote"
             ]
         }
         
@@ -79,6 +79,18 @@ def seed_roles():
         
         db.commit()
         
+        # Herencia de permisos entre roles del sistema (hijo: padre)
+        herencias = {"Gerente": "Empleado"}
+        roles_sistema = {
+            rol.rol_nombre: rol
+            for rol in db.query(Rol).filter(Rol.rol_nombre.in_(set(herencias) | set(herencias.values())))
+        }
+        for hijo, padre in herencias.items():
+            if hijo in roles_sistema and padre in roles_sistema and roles_sistema[hijo].rol_padre_id is None:
+                roles_sistema[hijo].rol_padre_id = roles_sistema[padre].rol_id
+                print(f"✓ {hijo} hereda los permisos de {padre}")
+        db.commit()
+        
         if roles_creados > 0:
             print(f"✓ Se crearon {roles_creados} roles exitosamente")
             logger.info(f"✅ Se crearon {roles_creados} roles exitosamente")
@@ -0,0 +1,230 @@
+"""
+Seeder de datos sintéticos a escala para pruebas de rendimiento
+
+Genera N usuarios, N * tasks_per_user tareas, sus asignaciones y roles
+adicionales con Faker, de forma determinista a partir de una semilla.
+
+- Todas las filas se insertan con executemany por lotes en una sola transacción.
+- Las contraseñas no se hashean por usuario: se precalcula en paralelo un
+  conjunto pequeño de hashes bcrypt de SCALE_PASSWORD y se reparten entre los
+  usuarios (bcrypt es intencionalmente lento: ~0,3 s por hash). Las sales
+  también salen de la semilla.
+- Las fechas se cuentan desde BASE_DATE, no desde la hora actual: con la misma
+  semilla, la base generada es la misma.
+- Textos (títulos, descripciones) salen de un banco generado una vez con Faker.
+
+Requiere que existan los roles del sistema (seed_roles).
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import base64
+import bcrypt
+import random
+import time
+import unicodedata
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from faker import Faker
+from sqlalchemy import func, insert
+from config.cnx import SessionLocal
+from config.associations import user_task_association, user_rol_association
+from roles.model import Rol
+from users.model import User
+from tasks.model import Task
+from tasks.stats import rebuild_task_counters
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Contraseña de todos los usuarios generados
+SCALE_PASSWORD = 'scale123'
+SCALE_EMAIL_DOMAIN = 'scale.local'
+
+TASK_STATES = ('pending', 'in-progress', 'completed')
+TASK_STATE_WEIGHTS = (5, 3, 2)
+# Proporción de tareas con un segundo usuario asignado
+SHARED_TASK_RATIO = 0.2
+# Roles del sistema para los usuarios generados (el primero siempre es Administrador)
+SYSTEM_ROLE_WEIGHTS = {'Gerente': 5, 'Empleado': 70, 'Cliente': 10}
+# Un rol sintético adicional cada USERS_PER_EXTRA_ROLE usuarios
+USERS_PER_EXTRA_ROLE = 1000
+# Fecha fija desde la que se cuentan las fechas generadas
+BASE_DATE = datetime(2025, 1, 1)
+
+PASSWORD_HASH_POOL = 16
+TEXT_BANK_SIZE = 2000
+BATCH_SIZE = 50000
+# Alfabeto base64 de bcrypt, para armar sales a partir de bytes
+_BCRYPT_BASE64 = bytes.maketrans(
+    b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/',
+    b'./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+)
+
+
+def _ascii_slug(value: str) -> str:
+    normalized = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode('ascii')
+    return ''.join(char for char in normalized.lower() if char.isalnum())
+
+
+def _insert_batches(db, table, rows):
+    """Insertar filas por lotes con executemany (rows puede ser un generador)"""
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            db.execute(insert(table), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        db.execute(insert(table), batch)
+        total += len(batch)
+    return total
+
+
+def _password_hashes(count: int, seed: int):
+    """Hashes bcrypt de SCALE_PASSWORD calculados en paralelo (bcrypt libera el GIL).
+
+    Igual que hash_password, pero con sales derivadas de la semilla.
+    """
+    rng = random.Random(f"{seed}:sales")
+    prefix = bcrypt.gensalt()[:7]  # $2b$<costo>$ por defecto, como hash_password
+    salts = [prefix + base64.b64encode(rng.randbytes(16)).translate(_BCRYPT_BASE64)[:22] for _ in range(count)]
+    password = SCALE_PASSWORD.encode('utf-8')
+    with ThreadPoolExecutor(max_workers=min(count, os.cpu_count() or 1)) as executor:
+        return [hashed.decode('utf-8') for hashed in executor.map(lambda salt: bcrypt.hashpw(password, salt), salts)]
+
+
+def seed_scale(scale: int, tasks_per_user: int = 10, seed: int = 42) -> dict:
+    """Generar scale usuarios con sus tareas, asignaciones y roles en una transacción"""
+    rng = random.Random(seed)
+    fake = Faker('es_ES')
+    fake.seed_instance(seed)
+    started = time.perf_counter()
+
+    db = SessionLocal()
+    try:
+        if db.query(User.id).filter(User.emails == f"user0@{SCALE_EMAIL_DOMAIN}").first():
+            raise ValueError("La base ya contiene usuarios generados a escala")
+
+        # Escrituras más rápidas en SQLite; solo afecta a esta conexión
+        if db.get_bind().dialect.name == 'sqlite':
+            db.connection().exec_driver_sql("PRAGMA synchronous=OFF")
+
+        roles = {rol.rol_nombre: rol.rol_id for rol in db.query(Rol).all()}
+        if 'Administrador' not in roles:
+            raise ValueError("No hay roles en el sistema. Ejecute primero el seeder de roles.")
+
+        # Roles sintéticos
+        extra_roles = scale // USERS_PER_EXTRA_ROLE
+        existing_names = set(roles)
+        role_rows = []
+        for i in range(extra_roles):
+            name = f"{fake.job()[:60]} {i}"
+            if name not in existing_names:
+                role_rows.append({"rol_nombre": name, "rol_permisos": "", "created_at": BASE_DATE, "updated_at": BASE_DATE})
+        _insert_batches(db, Rol.__table__, role_rows)
+        extra_role_ids = [
+            rol_id for (rol_id,) in db.query(Rol.rol_id).filter(
+                Rol.rol_nombre.in_([row["rol_nombre"] for row in role_rows])
+            ).all()
+        ] if role_rows else []
+        print(f"✓ {len(role_rows)} roles sintéticos")
+
+        # Usuarios
+        password_hashes = _password_hashes(min(PASSWORD_HASH_POOL, scale) or 1, seed)
+        weighted_roles = [roles[name] for name in SYSTEM_ROLE_WEIGHTS if name in roles]
+        weights = [SYSTEM_ROLE_WEIGHTS[name] for name in SYSTEM_ROLE_WEIGHTS if name in roles]
+        if extra_role_ids:
+            weighted_roles.append(None)
+            weights.append(15)
+
+        base_date = BASE_DATE
+        user_ids = []
+        user_rows = []
+        user_role_rows = []
+        for i in range(scale):
+            user_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            first_name, last_name = fake.first_name(), fake.last_name()
+            user_ids.append(user_id)
+            user_rows.append({
+                "id": user_id,
+                "firstName": first_name[:50],
+                "lastName": last_name[:50],
+                "emails": f"user{i}@{SCALE_EMAIL_DOMAIN}" if i == 0 else
+                          f"{_ascii_slug(first_name)}.{_ascii_slug(last_name)}{i}@{SCALE_EMAIL_DOMAIN}",
+                "password": password_hashes[i % len(password_hashes)],
+                "ages": rng.randint(18, 70),
+                "create_at": base_date + timedelta(minutes=i),
+            })
+            if i == 0:
+                rol_id = roles['Administrador']
+            else:
+                rol_id = rng.choices(weighted_roles, weights)[0] if weighted_roles else roles['Administrador']
+                if rol_id is None:
+                    rol_id = rng.choice(extra_role_ids)
+            user_role_rows.append({"user_id": user_id, "rol_id": rol_id, "assigned_at": base_date})
+        _insert_batches(db, User.__table__, user_rows)
+        _insert_batches(db, user_rol_association, user_role_rows)
+        del user_rows, user_role_rows
+        print(f"✓ {scale} usuarios con sus roles")
+
+        # Tareas y asignaciones (ids explícitos para no tener que releerlos)
+        titles = [fake.sentence(nb_words=5)[:100] for _ in range(TEXT_BANK_SIZE)]
+        descriptions = [fake.paragraph(nb_sentences=2) for _ in range(TEXT_BANK_SIZE)]
+        first_task_id = (db.query(func.max(Task.id)).scalar() or 0) + 1
+        total_tasks = scale * tasks_per_user
+        states = rng.choices(TASK_STATES, TASK_STATE_WEIGHTS, k=total_tasks)
+
+        def task_rows():
+            for offset in range(total_tasks):
+                yield {
+                    "id": first_task_id + offset,
+                    "title": titles[rng.randrange(TEXT_BANK_SIZE)],
+                    "description": descriptions[rng.randrange(TEXT_BANK_SIZE)],
+                    "state": states[offset],
+                    "create_at": base_date + timedelta(seconds=offset),
+                }
+
+        def assignment_rows():
+            for offset in range(total_tasks):
+                task_id = first_task_id + offset
+                owner = user_ids[offset // tasks_per_user]
+                yield {"user_id": owner, "task_id": task_id}
+                if scale > 1 and rng.random() < SHARED_TASK_RATIO:
+                    other = rng.choice(user_ids)
+                    if other != owner:
+                        yield {"user_id": other, "task_id": task_id}
+
+        _insert_batches(db, Task.__table__, task_rows())
+        assignments = _insert_batches(db, user_task_association, assignment_rows())
+        print(f"✓ {total_tasks} tareas y {assignments} asignaciones")
+
+        rebuild_task_counters(db)
+        db.commit()
+
+        summary = {
+            "users": scale,
+            "tasks": total_tasks,
+            "assignments": assignments,
+            "extra_roles": len(role_rows),
+            "seconds": round(time.perf_counter() - started, 1),
+        }
+        print(f"✓ Datos a escala cargados en {summary['seconds']} s (contraseña de todos los usuarios: {SCALE_PASSWORD})")
+        logger.info(f"✅ Datos a escala cargados: {summary}")
+        return summary
+    except Exception as e:
+        db.rollback()
+        print(f"✗ Error al generar datos a escala: {e}")
+        logger.error(f"❌ Error al generar datos a escala: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("=== Seeder de datos a escala ===")
+    seed_scale(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -9,6 +9,7 @@ from sqlite3 import IntegrityError
 from config.cnx import SessionLocal, engine
 from config.basemodel import Base
 from tasks.model import Task
+from tasks.stats import rebuild_task_counters
 from users.model import User
 from datetime import datetime
 import logging
@@ -119,6 +120,8 @@ def seed_tasks():
                 print(f"- Tarea '{task_info['title']}' ya existe, omitiendo...")
                 logger.info(f"⚠️  Tarea '{task_info['title']}' ya existe, omitiendo...")
         
+        # Las tareas se insertan sin pasar por los servicios: recalcular los contadores
+        rebuild_task_counters(db)
         db.commit()
         
         if tasks_creadas > 0:
@@ -0,0 +1,85 @@
+"""
+Feed de cambios de tareas
+
+Cada función que modifica tareas registra una fila en task_changes dentro de
+su transacción. Los clientes guardan el último seq recibido y piden solo lo
+que cambió desde entonces. Los mismos cambios se publican en vivo al hub de
+eventos (SSE) una vez confirmada la transacción; seq es el id del evento.
+
+Para que un cliente en since=N no saltee un cambio que se confirma tarde, seq
+debe crecer en orden de confirmación. SQLite lo garantiza al serializar las
+escrituras; en otros motores el seq sale de la fila de task_change_counter,
+que queda bloqueada hasta el commit de la transacción que la incrementó.
+"""
+from typing import Iterable, Optional
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+from .model import TaskChange, TaskChangeCounter
+from .events import queue_event
+
+# Operaciones registradas en el feed
+CREATED = 'created'
+UPDATED = 'updated'
+ASSIGNED = 'assigned'
+UNASSIGNED = 'unassigned'
+MOVED = 'moved'
+DELETED = 'deleted'
+
+# Motores donde el autoincremento ya sigue el orden de confirmación
+SERIALIZED_WRITERS = ('sqlite',)
+
+
+def record_change(db: Session, task_id: int, op: str, user_id: Optional[str] = None,
+                  user_ids: Iterable[str] = ()):
+    """Registrar un cambio de tarea (se confirma junto con la transacción del servicio).
+
+    user_ids son los usuarios asignados a la tarea, usados para filtrar el stream por usuario.
+    """
+    change = TaskChange(seq=_next_seq(db), task_id=task_id, op=op, user_id=user_id)
+    db.add(change)
+    db.flush()  # Para obtener el seq antes de confirmar
+
+    interested = set(user_ids)
+    if user_id:
+        interested.add(user_id)
+    queue_event(db, {
+        "seq": change.seq,
+        "op": op,
+        "task_id": task_id,
+        "user_id": user_id,
+        "user_ids": sorted(interested),
+        "changed_at": change.changed_at.isoformat()
+    })
+
+
+def _next_seq(db: Session) -> Optional[int]:
+    """Seq del cambio nuevo, o None si alcanza con el autoincremento"""
+    if db.get_bind().dialect.name in SERIALIZED_WRITERS:
+        return None
+    result = db.execute(
+        update(TaskChangeCounter)
+        .where(TaskChangeCounter.id == 1)
+        .values(seq=TaskChangeCounter.seq + 1)
+    )
+    if result.rowcount == 0:
+        ensure_change_counter(db)
+        return _next_seq(db)
+    return db.query(TaskChangeCounter.seq).filter(TaskChangeCounter.id == 1).scalar()
+
+
+def ensure_change_counter(db: Session):
+    """Crear la fila del contador a partir del último seq registrado"""
+    if db.get_bind().dialect.name in SERIALIZED_WRITERS:
+        return
+    if db.get(TaskChangeCounter, 1) is None:
+        last_seq = db.query(func.coalesce(func.max(TaskChange.seq), 0)).scalar()
+        db.add(TaskChangeCounter(id=1, seq=last_seq))
+        db.flush()
+
+
+def read_changes(db: Session, since: int, limit: int):
+    """Leer hasta limit cambios posteriores a since, en orden de seq"""
+    rows = db.query(TaskChange).filter(
+        TaskChange.seq > since
+    ).order_by(TaskChange.seq).limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
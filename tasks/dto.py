@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict
+from datetime import datetime
 
 # DTO simple para usuario sin tareas (evita referencia circular)
 class UserSimple(BaseModel):
@@ -64,6 +65,18 @@ class TaskAssignUser(BaseModel):
             }
         }
 
+class TaskMove(BaseModel):
+    user_id: str
+    after_task_id: Optional[int] = None
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "user_id": "fb2e3fd3-12f2-4173-b9a2-ec57e4d39c36",
+                "after_task_id": 3
+            }
+        }
+
 class TaskOut(TaskBase):
     id: int
     users: List[UserSimple] = []
@@ -86,4 +99,102 @@ class TaskOut(TaskBase):
                     }
                 ]
             }
+        }
+
+class TaskStatsOut(BaseModel):
+    total: int = 0
+    by_state: Dict[str, int] = {}
+    by_user: Dict[str, int] = {}
+    by_user_state: Dict[str, Dict[str, int]] = {}
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "total": 3,
+                "by_state": {"pending": 2, "completed": 1},
+                "by_user": {"fb2e3fd3-12f2-4173-b9a2-ec57e4d39c36": 3},
+                "by_user_state": {
+                    "fb2e3fd3-12f2-4173-b9a2-ec57e4d39c36": {"pending": 2, "completed": 1}
+                }
+            }
+        }
+
+class TaskBoardColumn(BaseModel):
+    state: str
+    total: int
+    tasks: List[TaskOut] = []
+    next_cursor: Optional[str] = None
+
+class TaskBoardOut(BaseModel):
+    columns: List[TaskBoardColumn] = []
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "columns": [
+                    {
+                        "state": "pending",
+                        "total": 42,
+                        "tasks": [
+                            {
+                                "id": 1,
+                                "title": "Implementar autenticación",
+                                "description": "Desarrollar sistema de login con JWT",
+                                "state": "pending",
+                                "users": []
+                            }
+                        ],
+                        "next_cursor": "WyIyMDI1LTAxLTAxVDEwOjAwOjAwIiwgMV0"
+                    }
+                ]
+            }
+        }
+
+class TaskChangeOut(BaseModel):
+    seq: int
+    task_id: int
+    op: str
+    user_id: Optional[str] = None
+    changed_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class TaskChangesOut(BaseModel):
+    changes: List[TaskChangeOut] = []
+    tasks: List[TaskOut] = []
+    next_cursor: int
+    has_more: bool = False
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "changes": [
+                    {
+                        "seq": 41,
+                        "task_id": 1,
+                        "op": "updated",
+                        "user_id": None,
+                        "changed_at": "2025-01-01T10:00:00"
+                    },
+                    {
+                        "seq": 42,
+                        "task_id": 7,
+                        "op": "deleted",
+                        "user_id": None,
+                        "changed_at": "2025-01-01T10:05:00"
+                    }
+                ],
+                "tasks": [
+                    {
+                        "id": 1,
+                        "title": "Implementar autenticación",
+                        "description": "Desarrollar sistema de login con JWT",
+                        "state": "completed",
+                        "users": []
+                    }
+                ],
+                "next_cursor": 42,
+                "has_more": False
+            }
         }
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+Hub de eventos en proceso para el stream de cambios de tareas (SSE)
+
+Los servicios registran los cambios con tasks.changes.record_change; cuando la
+transacción se confirma, los eventos se publican a los suscriptores conectados.
+Los servicios corren en el threadpool, así que la entrega a cada event loop se
+hace con una única llamada call_soon_threadsafe por loop y por evento.
+"""
+import asyncio
+import threading
+from typing import Dict, Optional, Set
+from sqlalchemy import event
+from config.cnx import SessionLocal
+
+# Clave en Session.info donde se acumulan los eventos pendientes de confirmar
+PENDING_EVENTS_KEY = 'task_events'
+
+# Eventos en cola por suscriptor antes de considerarlo lento y desconectarlo
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class Subscription:
+    """Suscripción de un cliente al hub, opcionalmente filtrada por usuario"""
+
+    def __init__(self, user_id: Optional[str], loop: asyncio.AbstractEventLoop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        # Se marca cuando la cola se llena: el cliente debe reconectar con su cursor
+        self.overflowed = False
+
+    def accepts(self, task_event: dict) -> bool:
+        return self.user_id is None or self.user_id in task_event['user_ids']
+
+    def push(self, task_event: dict):
+        """Encolar un evento (se ejecuta en el loop del suscriptor)"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(task_event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            # Despertar al consumidor para que cierre el stream
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class TaskEventHub:
+    """Difusión de eventos de tareas a los suscriptores del proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[asyncio.AbstractEventLoop, Set[Subscription]] = {}
+
+    def subscribe(self, user_id: Optional[str] = None) -> Subscription:
+        """Registrar un suscriptor en el event loop actual"""
+        subscription = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(subscription.loop, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.loop)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.loop]
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def publish(self, task_event: dict):
+        """Publicar un evento a todos los suscriptores interesados (seguro entre hilos)"""
+        with self._lock:
+            targets = [(loop, list(subscribers)) for loop, subscribers in self._subscribers.items()]
+        for loop, subscribers in targets:
+            try:
+                loop.call_soon_threadsafe(_deliver, subscribers, task_event)
+            except RuntimeError:
+                # El loop ya se cerró
+                pass
+
+
+def _deliver(subscribers, task_event: dict):
+    for subscription in subscribers:
+        if subscription.accepts(task_event):
+            subscription.push(task_event)
+
+
+hub = TaskEventHub()
+
+
+def queue_event(db, task_event: dict):
+    """Dejar un evento pendiente hasta que la sesión confirme la transacción"""
+    db.info.setdefault(PENDING_EVENTS_KEY, []).append(task_event)
+
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _publish_pending_events(session):
+    for task_event in session.info.pop(PENDING_EVENTS_KEY, []):
+        hub.publish(task_event)
+
+
+@event.listens_for(SessionLocal, 'after_rollback')
+def _discard_pending_events(session):
+    session.info.pop(PENDING_EVENTS_KEY, None)
@@ -1,5 +1,5 @@
 from config.basemodel import Base
-from sqlalchemy import String, Text, DateTime
+from sqlalchemy import String, Text, DateTime, Index, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import List, Optional
 from sqlalchemy.dialects.sqlite import INTEGER
@@ -17,6 +17,10 @@ if TYPE_CHECKING:
 
 class Task(Base):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # Índice para el tablero: columnas por estado ordenadas por fecha de creación
+        Index('ix_tasks_state_create_at_id', 'state', 'create_at', 'id'),
+    )
     id: Mapped[int] = mapped_column(INTEGER, primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(100), nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=True)
@@ -26,4 +30,59 @@ class Task(Base):
     update_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     delete_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
-    users: Mapped[List["User"]] = relationship('User', secondary=user_task_association, back_populates='tasks')
\ No newline at end of file
+    users: Mapped[List["User"]] = relationship('User', secondary=user_task_association, back_populates='tasks')
+
+class TaskStat(Base):
+    """Contadores de tareas mantenidos incrementalmente por los servicios.
+
+    Cada fila es un contador para la combinación (usuario, estado). El valor
+    '*' en cualquiera de las dos columnas representa el total de esa dimensión:
+    ('*', estado) cuenta tareas por estado, (usuario, '*') tareas por usuario
+    y ('*', '*') el total general.
+    """
+    __tablename__ = 'task_stats'
+    user_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    state: Mapped[str] = mapped_column(String(20), primary_key=True)
+    total: Mapped[int] = mapped_column(INTEGER, nullable=False, default=0)
+
+
+class TaskPosition(Base):
+    """Posición de una tarea dentro de la lista de un usuario (índice fraccionario).
+
+    Se guarda aparte de user_task_association para que mover una tarea
+    actualice una sola fila y las bases existentes no necesiten migración.
+    """
+    __tablename__ = 'task_positions'
+    __table_args__ = (
+        Index('ix_task_positions_user_position', 'user_id', 'position'),
+    )
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey('users.id'), primary_key=True)
+    task_id: Mapped[int] = mapped_column(INTEGER, ForeignKey('tasks.id'), primary_key=True)
+    position: Mapped[str] = mapped_column(String(64), nullable=False)
+
+
+class TaskChange(Base):
+    """Registro secuencial de cambios de tareas para la sincronización incremental.
+
+    seq crece en orden de confirmación, por lo que sirve directamente como
+    cursor del feed de cambios. En SQLite alcanza con el autoincremento (las
+    escrituras se serializan); en MySQL y PostgreSQL el autoincremento se
+    asigna al insertar, así que record_change toma el seq de TaskChangeCounter.
+    """
+    __tablename__ = 'task_changes'
+    seq: Mapped[int] = mapped_column(INTEGER, primary_key=True, autoincrement=True)
+    task_id: Mapped[int] = mapped_column(INTEGER, nullable=False)
+    op: Mapped[str] = mapped_column(String(20), nullable=False)
+    user_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, nullable=False)
+
+
+class TaskChangeCounter(Base):
+    """Último seq asignado en task_changes (una sola fila, id = 1).
+
+    Incrementarla bloquea la fila hasta el commit: la siguiente transacción que
+    registra un cambio espera, y los seq se confirman en orden.
+    """
+    __tablename__ = 'task_change_counter'
+    id: Mapped[int] = mapped_column(INTEGER, primary_key=True)
+    seq: Mapped[int] = mapped_column(INTEGER, nullable=False, default=0)
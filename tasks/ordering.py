@@ -0,0 +1,78 @@
+"""
+Índices fraccionarios para ordenar tareas sin renumerar
+
+Cada posición es una cadena en base 62 que se compara lexicográficamente.
+Entre dos claves siempre existe otra, así que mover una tarea solo requiere
+escribir una fila. Las claves nunca están vacías ni terminan en '0'.
+
+Agregar al final usa la clave más corta mayor que la última (se incrementa su
+primer dígito que no es el máximo): la clave crece un carácter cada ~61 altas
+en lugar de uno cada ~6 que daba el punto medio. Las claves de más de
+MAX_KEY_LENGTH se corrigen reequilibrando la lista (tasks.services).
+"""
+from typing import List, Optional
+
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+
+# Longitud a partir de la cual conviene reequilibrar las claves de una lista
+MAX_KEY_LENGTH = 16
+
+
+def _midpoint(a: str, b: Optional[str]) -> str:
+    """Clave estrictamente entre a y b ('' representa el mínimo, None el máximo)"""
+    if b is not None:
+        # Conservar el prefijo común
+        n = 0
+        while (a[n] if n < len(a) else '0') == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else BASE
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+
+    # Dígitos consecutivos: extender la clave
+    if b is not None and len(b) > 1:
+        return b[:1]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def _after(a: str) -> str:
+    """Clave más corta estrictamente mayor que a"""
+    for i, char in enumerate(a):
+        if char != DIGITS[-1]:
+            return a[:i] + DIGITS[DIGITS.index(char) + 1]
+    return a + DIGITS[1]
+
+
+def key_between(before: Optional[str], after: Optional[str]) -> str:
+    """Generar una clave que ordene entre before y after (None = extremo de la lista)"""
+    if before is not None and after is not None and before >= after:
+        raise ValueError("Las claves de posición no están ordenadas")
+    for key in (before, after):
+        if key is not None and (not key or key.endswith('0')):
+            raise ValueError(f"Clave de posición inválida: {key!r}")
+    if before and after is None:
+        return _after(before)
+    return _midpoint(before or '', after)
+
+
+def spaced_keys(count: int) -> List[str]:
+    """Generar count claves cortas y equiespaciadas (para reequilibrar una lista)"""
+    length = 1
+    while BASE ** length <= count:
+        length += 1
+    step = BASE ** length // (count + 1)
+
+    keys = []
+    for i in range(1, count + 1):
+        value = i * step
+        digits = []
+        for _ in range(length):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        keys.append(''.join(reversed(digits)).rstrip('0'))
+    return keys
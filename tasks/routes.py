@@ -1,9 +1,17 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Request
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Query, BackgroundTasks, Header
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from monitoring.timing import TimedRoute
+from typing import List, Optional
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-from .dto import TaskCreate, TaskOut, TaskUpdateState, TaskUpdate, TaskAssignUser
-from .services import get_all_tasks, get_tasks_by_user, create_task, update_task_state, update_task_full, get_task_by_id, assign_user_to_task, unassign_user_from_task
-from middlewares.auth import get_current_user
+from .dto import TaskCreate, TaskOut, TaskUpdateState, TaskUpdate, TaskAssignUser, TaskStatsOut, TaskBoardOut, TaskBoardColumn, TaskMove, TaskChangesOut
+from .services import get_all_tasks, get_tasks_by_user, create_task, update_task_state, update_task_full, get_task_by_id, assign_user_to_task, unassign_user_from_task, get_task_stats, get_task_board, get_task_board_column, move_task, rebalance_task_positions, get_task_changes, soft_delete_task
+from .events import hub
+from middlewares.auth import get_current_user, is_admin
+from cache.responses import cached_json_response
+from pydantic import TypeAdapter
+import asyncio
+import json
 import time
 import logging
 
@@ -36,13 +44,73 @@ async def log_read_operation(request: Request):
         "start_time": start_time
     }
 
-tasks = APIRouter()
+tasks = APIRouter(route_class=TimedRoute)
+
+_task_list = TypeAdapter(List[TaskOut])
+
+# Intervalo de comentarios keep-alive en el stream SSE (segundos)
+SSE_KEEPALIVE_SECONDS = 15
+
+def _sse_message(task_event: dict) -> str:
+    """Formatear un evento de tarea como mensaje SSE"""
+    return f"id: {task_event['seq']}\nevent: {task_event['op']}\ndata: {json.dumps(task_event)}\n\n"
+
+async def _replay_changes(since: int, user_id: Optional[str]):
+    """Eventos confirmados después de since, leídos del feed de cambios"""
+    replayed = []
+    while True:
+        page = await run_in_threadpool(get_task_changes, since, 500)
+        assigned = {task.id: {u.id for u in task.users} for task in page["tasks"]}
+        for change in page["changes"]:
+            user_ids = assigned.get(change.task_id, set())
+            if change.user_id:
+                user_ids = user_ids | {change.user_id}
+            # Las tareas eliminadas ya no tienen asignaciones: se envían a todos
+            if user_id and user_id not in user_ids and change.op != 'deleted':
+                continue
+            replayed.append({
+                "seq": change.seq,
+                "op": change.op,
+                "task_id": change.task_id,
+                "user_id": change.user_id,
+                "user_ids": sorted(user_ids),
+                "changed_at": change.changed_at.isoformat()
+            })
+        since = page["next_cursor"]
+        if not page["has_more"]:
+            return replayed, since
+
+async def _task_event_stream(user_id: Optional[str], since: Optional[int]):
+    # Suscribirse antes de leer el historial para no perder eventos intermedios
+    subscription = hub.subscribe(user_id)
+    try:
+        last_seq = 0
+        if since is not None:
+            replayed, last_seq = await _replay_changes(since, user_id)
+            for task_event in replayed:
+                yield _sse_message(task_event)
+        
+        while True:
+            try:
+                task_event = await asyncio.wait_for(subscription.queue.get(), SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if task_event is None:
+                # Cliente demasiado lento: debe reconectar con Last-Event-ID
+                return
+            if task_event["seq"] <= last_seq:
+                continue
+            yield _sse_message(task_event)
+    finally:
+        hub.unsubscribe(subscription)
 
 @tasks.get('', response_model=List[TaskOut], status_code=status.HTTP_200_OK)
 def get_tasks(log_info: dict = Depends(log_read_operation)):
     """Obtener todas las tareas - CON middleware de lectura"""
     try:
-        return get_all_tasks()
+        # Los usuarios asignados forman parte de la respuesta
+        return cached_json_response('/tasks', {}, ('tareas', 'usuarios'), get_all_tasks, _task_list)
     except SQLAlchemyError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -54,6 +122,116 @@ def get_tasks(log_info: dict = Depends(log_read_operation)):
             detail="Error inesperado al obtener las tareas"
         )
 
+@tasks.get('/stats', response_model=TaskStatsOut, status_code=status.HTTP_200_OK)
+def get_tasks_stats(log_info: dict = Depends(log_read_operation)):
+    """Obtener cantidad de tareas por estado, por usuario y por usuario×estado"""
+    try:
+        return get_task_stats()
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor al obtener las estadísticas de tareas"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error inesperado al obtener las estadísticas de tareas"
+        )
+
+@tasks.get('/changes', response_model=TaskChangesOut, status_code=status.HTTP_200_OK)
+def get_changes(
+    since: int = Query(0, ge=0, description="Último cursor recibido (0 para sincronizar desde el principio)"),
+    limit: int = Query(100, ge=1, le=500, description="Cantidad máxima de cambios a devolver"),
+    log_info: dict = Depends(log_read_operation)
+):
+    """Obtener tareas creadas, actualizadas, (des)asignadas o eliminadas desde el cursor"""
+    try:
+        return get_task_changes(since, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor al obtener los cambios de tareas"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error inesperado al obtener los cambios de tareas"
+        )
+
+@tasks.get('/events', status_code=status.HTTP_200_OK)
+async def stream_task_events(
+    user_id: Optional[str] = Query(None, description="Recibir solo eventos de tareas de este usuario"),
+    since: Optional[int] = Query(None, ge=0, description="Reenviar los cambios posteriores a este cursor"),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    log_info: dict = Depends(log_read_operation)
+):
+    """Stream SSE de creación, actualización, asignación y desasignación de tareas"""
+    if last_event_id:
+        # Reconexión del EventSource: retomar desde el último evento recibido
+        try:
+            since = int(last_event_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Last-Event-ID inválido"
+            )
+    
+    return StreamingResponse(
+        _task_event_stream(user_id, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@tasks.get('/board', response_model=TaskBoardOut, status_code=status.HTTP_200_OK)
+def get_board(
+    limit: int = Query(20, ge=1, le=100, description="Cantidad de tareas por columna"),
+    log_info: dict = Depends(log_read_operation)
+):
+    """Obtener el tablero: primeras tareas y total de cada estado"""
+    try:
+        return get_task_board(limit)
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor al obtener el tablero"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error inesperado al obtener el tablero"
+        )
+
+@tasks.get('/board/{state}', response_model=TaskBoardColumn, status_code=status.HTTP_200_OK)
+def get_board_column(
+    state: str,
+    cursor: Optional[str] = Query(None, description="Cursor devuelto como next_cursor por la página anterior"),
+    limit: int = Query(20, ge=1, le=100, description="Cantidad de tareas a devolver"),
+    log_info: dict = Depends(log_read_operation)
+):
+    """Cargar más tareas de una columna del tablero"""
+    try:
+        return get_task_board_column(state, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor al obtener la columna del tablero"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error inesperado al obtener la columna del tablero"
+        )
+
 @tasks.get('/{task_id}', response_model=TaskOut, status_code=status.HTTP_200_OK)
 def get_task(task_id: int, log_info: dict = Depends(log_read_operation)):
     """Obtener una tarea por ID - CON middleware de lectura"""
@@ -102,8 +280,10 @@ def get_user_tasks(user_id: str, log_info: dict = Depends(log_read_operation)):
                 detail="ID de usuario no puede estar vacío"
             )
         
-        tasks = get_tasks_by_user(user_id)
-        return tasks
+        return cached_json_response(
+            '/tasks/user', {"user_id": user_id}, ('tareas', 'usuarios'),
+            lambda: get_tasks_by_user(user_id), _task_list
+        )
         
     except ValueError as e:
         raise HTTPException(
@@ -196,6 +376,78 @@ def update_task_full_endpoint(task_id: int, task: TaskUpdate, log_info: dict = D
             detail="Error inesperado al actualizar la tarea"
         )
 
+@tasks.delete('/{task_id}', status_code=status.HTTP_200_OK)
+def delete_task_endpoint(task_id: int, log_info: dict = Depends(log_sensitive_operation)):
+    """Eliminar una tarea (soft delete) - CON middleware de operación sensible"""
+    try:
+        if task_id <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="ID de tarea debe ser un número positivo"
+            )
+        soft_delete_task(task_id)
+        return {"detail": f"Tarea {task_id} eliminada exitosamente"}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor al eliminar la tarea"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error inesperado al eliminar la tarea"
+        )
+
+@tasks.patch('/{task_id}/move', response_model=TaskOut, status_code=status.HTTP_200_OK)
+def move_task_endpoint(task_id: int, move_data: TaskMove, background_tasks: BackgroundTasks,
+                       log_info: dict = Depends(log_sensitive_operation),
+                       current_user: dict = Depends(get_current_user)):
+    """Reordenar una tarea en la lista de un usuario (after_task_id nulo = al principio).
+
+    Cada usuario reordena su propia lista; solo un administrador puede reordenar la de otro.
+    """
+    try:
+        if task_id <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="ID de tarea debe ser un número positivo"
+            )
+        
+        if move_data.user_id != current_user["user_id"] and not is_admin(current_user):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Solo puede reordenar su propia lista de tareas"
+            )
+        
+        task, needs_rebalance = move_task(task_id, move_data)
+        if needs_rebalance:
+            background_tasks.add_task(rebalance_task_positions, move_data.user_id)
+        return task
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor al mover la tarea"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error inesperado al mover la tarea"
+        )
+
 @tasks.post('/{task_id}/assign', response_model=TaskOut, status_code=status.HTTP_200_OK)
 def assign_user(task_id: int, assign_data: TaskAssignUser, log_info: dict = Depends(log_sensitive_operation)):
     """Endpoint para asignar un usuario a una tarea existente - CON middleware de operación sensible"""
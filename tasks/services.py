@@ -1,11 +1,20 @@
-from .model import Task
+from .model import Task, TaskStat, TaskPosition
+from .ordering import key_between, spaced_keys, MAX_KEY_LENGTH
+from .changes import record_change, read_changes, CREATED, UPDATED, ASSIGNED, UNASSIGNED, MOVED, DELETED
+from .stats import ALL, bump_task_counters, bump_user_counters, move_task_counters, read_task_stats
 from users.model import User
+from users.cache import invalidate_profiles
+from cache.versions import bump_cache_versions
+from cache.responses import response_cache
 from config.associations import user_task_association
 from config.cnx import SessionLocal
-from .dto import TaskCreate, TaskUpdateState, TaskUpdate, TaskAssignUser
-from sqlalchemy.orm import joinedload
+from .dto import TaskCreate, TaskUpdateState, TaskUpdate, TaskAssignUser, TaskMove
+from sqlalchemy import func, and_, or_, select, union_all
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from datetime import datetime
+import base64
+import json
 import logging
 
 # Obtener logger para este módulo
@@ -16,7 +25,7 @@ def get_all_tasks():
     db = None
     try:
         db = SessionLocal()
-        tasks = db.query(Task).options(joinedload(Task.users)).all()
+        tasks = db.query(Task).options(joinedload(Task.users)).filter(Task.delete_at == None).all()
         return tasks
     except SQLAlchemyError as e:
         logger.error(f"Error de base de datos al obtener tareas: {str(e)}")
@@ -40,11 +49,16 @@ def get_tasks_by_user(user_id: str):
             logger.warning(f"Usuario no encontrado: {user_id}")
             raise ValueError("Usuario no encontrado")
         
-        # Obtener tareas asignadas al usuario
-        tasks = db.query(Task).options(joinedload(Task.users)).join(
+        # Obtener tareas asignadas al usuario en el orden elegido por el usuario
+        tasks = db.query(Task).options(selectinload(Task.users)).join(
             user_task_association
+        ).outerjoin(
+            TaskPosition, and_(TaskPosition.task_id == Task.id, TaskPosition.user_id == user_id)
         ).filter(
-            user_task_association.c.user_id == user_id
+            user_task_association.c.user_id == user_id,
+            Task.delete_at == None
+        ).order_by(
+            TaskPosition.position.is_(None), TaskPosition.position, Task.id
         ).all()
         
         return tasks
@@ -61,6 +75,211 @@ def get_tasks_by_user(user_id: str):
         if db:
             db.close()
 
+def get_task_stats():
+    """Obtener los contadores de tareas por estado, por usuario y por usuario×estado"""
+    db = None
+    try:
+        db = SessionLocal()
+        return read_task_stats(db)
+    except SQLAlchemyError as e:
+        logger.error(f"Error de base de datos al obtener estadísticas de tareas: {str(e)}")
+        raise SQLAlchemyError("Error al acceder a la base de datos")
+    except Exception as e:
+        logger.error(f"Error inesperado al obtener estadísticas de tareas: {str(e)}")
+        raise Exception("Error interno al obtener las estadísticas de tareas")
+    finally:
+        if db:
+            db.close()
+
+def _invalidate_task_reads(user_ids):
+    """Después del commit: perfiles de los usuarios afectados y listados de tareas cacheados"""
+    invalidate_profiles(user_ids)
+    response_cache.invalidate('tareas')
+
+def _append_position(db, user_id: str, task_id: int) -> bool:
+    """Ubicar una tarea al final de la lista del usuario.
+
+    La tarea ya debe estar asignada. Si la clave nueva supera MAX_KEY_LENGTH se
+    reequilibra toda la lista en la misma transacción (incluida esta tarea) y
+    se devuelve True, así las listas que solo crecen no acumulan claves largas.
+    """
+    last_key = db.query(func.max(TaskPosition.position)).filter(
+        TaskPosition.user_id == user_id
+    ).scalar()
+    key = key_between(last_key, None)
+    if len(key) > MAX_KEY_LENGTH:
+        _respace_positions(db, user_id)
+        return True
+    db.add(TaskPosition(user_id=user_id, task_id=task_id, position=key))
+    return False
+
+def _respace_positions(db, user_id: str):
+    """Reescribir las posiciones del usuario con claves cortas y equiespaciadas, sin cambiar el orden"""
+    ordered = db.query(user_task_association.c.task_id).outerjoin(
+        TaskPosition, and_(
+            TaskPosition.task_id == user_task_association.c.task_id,
+            TaskPosition.user_id == user_id
+        )
+    ).filter(
+        user_task_association.c.user_id == user_id
+    ).order_by(
+        TaskPosition.position.is_(None), TaskPosition.position, user_task_association.c.task_id
+    ).all()
+    
+    db.query(TaskPosition).filter(TaskPosition.user_id == user_id).delete()
+    db.add_all([
+        TaskPosition(user_id=user_id, task_id=task_id, position=key)
+        for (task_id,), key in zip(ordered, spaced_keys(len(ordered)))
+    ])
+
+def _fill_missing_positions(db, user_id: str):
+    """Asignar posición a las tareas del usuario que aún no tienen (asignaciones previas al orden)"""
+    missing = db.query(user_task_association.c.task_id).outerjoin(
+        TaskPosition, and_(
+            TaskPosition.task_id == user_task_association.c.task_id,
+            TaskPosition.user_id == user_id
+        )
+    ).filter(
+        user_task_association.c.user_id == user_id,
+        TaskPosition.task_id == None
+    ).order_by(user_task_association.c.task_id).all()
+    for (task_id,) in missing:
+        if _append_position(db, user_id, task_id):
+            # El reequilibrio ya ubicó todas las tareas que faltaban
+            break
+        db.flush()
+
+def _encode_board_cursor(task: Task) -> str:
+    """Cursor opaco con la posición (create_at, id) de la última tarea entregada"""
+    create_at = task.create_at.isoformat() if task.create_at else None
+    raw = json.dumps([create_at, task.id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def _decode_board_cursor(cursor: str):
+    """Decodificar un cursor de columna del tablero"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        create_at, task_id = json.loads(raw)
+        return (datetime.fromisoformat(create_at) if create_at else None), int(task_id)
+    except Exception:
+        raise ValueError("Cursor inválido")
+
+def _create_at_order(db):
+    """create_at ascendente con los NULL primero, igual que compara el cursor del tablero.
+
+    PostgreSQL los ordena al final si no se indica; MySQL ya los pone primero
+    y no admite NULLS FIRST.
+    """
+    if db.get_bind().dialect.name in ('mysql', 'mariadb'):
+        return Task.create_at.asc()
+    return Task.create_at.asc().nulls_first()
+
+def _board_column(state: str, total: int, tasks: list, has_more: bool) -> dict:
+    """Armar una columna del tablero con el cursor para la siguiente página"""
+    return {
+        "state": state,
+        "total": total,
+        "tasks": tasks,
+        "next_cursor": _encode_board_cursor(tasks[-1]) if has_more and tasks else None
+    }
+
+def get_task_board(limit: int):
+    """Obtener las primeras tareas de cada estado y el total por estado"""
+    db = None
+    try:
+        db = SessionLocal()
+        
+        # Los totales por estado salen de los contadores incrementales
+        totals = {
+            stat.state: stat.total
+            for stat in db.query(TaskStat).filter(
+                TaskStat.user_id == ALL, TaskStat.state != ALL, TaskStat.total > 0
+            )
+        }
+        if not totals:
+            return {"columns": []}
+        
+        # Un LIMIT por estado sobre el índice (state, create_at, id): numerar todas las
+        # tareas con una función de ventana recorre la tabla completa
+        create_at_order = _create_at_order(db)
+        pages = [
+            db.query(Task.id).filter(Task.state == state, Task.delete_at == None).order_by(
+                create_at_order, Task.id
+            ).limit(limit).subquery()
+            for state in totals
+        ]
+        page_ids = union_all(*[select(page.c.id) for page in pages])
+        tasks = db.query(Task).options(selectinload(Task.users)).filter(
+            Task.id.in_(page_ids)
+        ).order_by(Task.state, create_at_order, Task.id).all()
+        
+        columns = {}
+        for task in tasks:
+            columns.setdefault(task.state, []).append(task)
+        
+        return {
+            "columns": [
+                _board_column(state, totals[state], column_tasks, totals[state] > len(column_tasks))
+                for state, column_tasks in columns.items()
+            ]
+        }
+    except SQLAlchemyError as e:
+        logger.error(f"Error de base de datos al obtener el tablero de tareas: {str(e)}")
+        raise SQLAlchemyError("Error al acceder a la base de datos")
+    except Exception as e:
+        logger.error(f"Error inesperado al obtener el tablero de tareas: {str(e)}")
+        raise Exception("Error interno al obtener el tablero de tareas")
+    finally:
+        if db:
+            db.close()
+
+def get_task_board_column(state: str, cursor: str = None, limit: int = 20):
+    """Obtener la siguiente página de una columna del tablero a partir de un cursor"""
+    db = None
+    try:
+        query_filters = [Task.state == state, Task.delete_at == None]
+        if cursor:
+            create_at, task_id = _decode_board_cursor(cursor)
+            # El orden pone los NULL primero (_create_at_order): las tareas sin fecha preceden al resto
+            if create_at is None:
+                query_filters.append(or_(
+                    and_(Task.create_at == None, Task.id > task_id),
+                    Task.create_at != None
+                ))
+            else:
+                query_filters.append(or_(
+                    Task.create_at > create_at,
+                    and_(Task.create_at == create_at, Task.id > task_id)
+                ))
+        
+        db = SessionLocal()
+        
+        # Seleccionar los ids por el índice (state, create_at, id) y cargar los usuarios después del LIMIT.
+        # Se pide una tarea extra para saber si la columna continúa.
+        create_at_order = _create_at_order(db)
+        page = db.query(Task.id).filter(*query_filters).order_by(
+            create_at_order, Task.id
+        ).limit(limit + 1).subquery()
+        tasks = db.query(Task).options(selectinload(Task.users)).filter(
+            Task.id.in_(db.query(page.c.id))
+        ).order_by(create_at_order, Task.id).all()
+        
+        # El total de la columna sale de los contadores incrementales
+        counter = db.get(TaskStat, (ALL, state))
+        
+        return _board_column(state, counter.total if counter else 0, tasks[:limit], len(tasks) > limit)
+    except ValueError:
+        raise
+    except SQLAlchemyError as e:
+        logger.error(f"Error de base de datos al obtener la columna {state} del tablero: {str(e)}")
+        raise SQLAlchemyError("Error al acceder a la base de datos")
+    except Exception as e:
+        logger.error(f"Error inesperado al obtener la columna {state} del tablero: {str(e)}")
+        raise Exception("Error interno al obtener la columna del tablero")
+    finally:
+        if db:
+            db.close()
+
 def create_task(task_data: TaskCreate):
     """Crear una nueva tarea y asignar el usuario creador"""
     db = None
@@ -85,11 +304,16 @@ def create_task(task_data: TaskCreate):
         
         # Asociar el usuario creador con la tarea
         task.users.append(user)
+        bump_task_counters(db, task.state, [user.id], 1)
+        _append_position(db, user.id, task.id)
+        record_change(db, task.id, CREATED, user.id)
+        bump_cache_versions(db, 'tareas')
         db.commit()
+        _invalidate_task_reads([task_data.user_id])
         db.refresh(task)
         
         # Cargar explícitamente la relación users antes de cerrar la sesión
-        task_with_users = db.query(Task).options(joinedload(Task.users)).filter(Task.id == task.id).first()
+        task_with_users = db.query(Task).options(selectinload(Task.users)).filter(Task.id == task.id).first()
         
         return task_with_users
         
@@ -125,12 +349,14 @@ def update_task_full(task_id: int, task_data: TaskUpdate):
             raise ValueError("ID de tarea inválido")
             
         db = SessionLocal()
-        task = db.query(Task).filter(Task.id == task_id).first()
+        task = db.query(Task).filter(Task.id == task_id, Task.delete_at == None).first()
         
         if not task:
             logger.warning(f"Tarea {task_id} no encontrada para actualizar")
             raise ValueError("Tarea no encontrada")
         
+        old_state = task.state
+        
         # Actualizar solo los campos que se proporcionaron
         if task_data.title is not None:
             task.title = task_data.title.strip()
@@ -140,11 +366,16 @@ def update_task_full(task_id: int, task_data: TaskUpdate):
             task.state = task_data.state
             
         task.update_at = datetime.now()
+        user_ids = [u.id for u in task.users]
+        move_task_counters(db, old_state, task.state, user_ids)
+        record_change(db, task.id, UPDATED, user_ids=user_ids)
+        bump_cache_versions(db, 'tareas')
         db.commit()
+        _invalidate_task_reads(user_ids)
         db.refresh(task)
         
         # Cargar explícitamente la relación users antes de cerrar la sesión
-        task_with_users = db.query(Task).options(joinedload(Task.users)).filter(Task.id == task_id).first()
+        task_with_users = db.query(Task).options(selectinload(Task.users)).filter(Task.id == task_id).first()
         
         return task_with_users
         
@@ -175,19 +406,25 @@ def update_task_state(task_id: int, state_data: TaskUpdateState):
             raise ValueError("ID de tarea inválido")
             
         db = SessionLocal()
-        task = db.query(Task).filter(Task.id == task_id).first()
+        task = db.query(Task).filter(Task.id == task_id, Task.delete_at == None).first()
         
         if not task:
             logger.warning(f"Tarea {task_id} no encontrada para actualizar")
             raise ValueError("Tarea no encontrada")
         
+        old_state = task.state
         task.state = state_data.state
         task.update_at = datetime.now()
+        user_ids = [u.id for u in task.users]
+        move_task_counters(db, old_state, task.state, user_ids)
+        record_change(db, task.id, UPDATED, user_ids=user_ids)
+        bump_cache_versions(db, 'tareas')
         db.commit()
+        _invalidate_task_reads(user_ids)
         db.refresh(task)
         
         # Cargar explícitamente la relación users antes de cerrar la sesión
-        task_with_users = db.query(Task).options(joinedload(Task.users)).filter(Task.id == task_id).first()
+        task_with_users = db.query(Task).options(selectinload(Task.users)).filter(Task.id == task_id).first()
         
         return task_with_users
         
@@ -209,6 +446,84 @@ def update_task_state(task_id: int, state_data: TaskUpdateState):
         if db:
             db.close()
 
+def soft_delete_task(task_id: int):
+    """Eliminación lógica de una tarea (soft delete)"""
+    db = None
+    try:
+        if task_id <= 0:
+            raise ValueError("ID de tarea inválido")
+            
+        db = SessionLocal()
+        task = db.query(Task).filter(Task.id == task_id, Task.delete_at == None).first()
+        
+        if not task:
+            logger.warning(f"Tarea {task_id} no encontrada para eliminar")
+            raise ValueError("Tarea no encontrada")
+        
+        task.delete_at = datetime.now()
+        task.update_at = datetime.now()
+        user_ids = [u.id for u in task.users]
+        bump_task_counters(db, task.state, user_ids, -1)
+        record_change(db, task.id, DELETED, user_ids=user_ids)
+        bump_cache_versions(db, 'tareas')
+        db.commit()
+        _invalidate_task_reads(user_ids)
+        
+        return True
+        
+    except ValueError:
+        if db:
+            db.rollback()
+        raise
+    except SQLAlchemyError as e:
+        if db:
+            db.rollback()
+        logger.error(f"Error de base de datos al eliminar tarea: {str(e)}")
+        raise SQLAlchemyError("Error al acceder a la base de datos")
+    except Exception as e:
+        if db:
+            db.rollback()
+        logger.error(f"Error inesperado al eliminar tarea: {str(e)}")
+        raise Exception("Error interno al eliminar la tarea")
+    finally:
+        if db:
+            db.close()
+
+def get_task_changes(since: int = 0, limit: int = 100):
+    """Obtener los cambios de tareas posteriores al cursor, con el estado actual de cada tarea"""
+    db = None
+    try:
+        if since < 0:
+            raise ValueError("Cursor inválido")
+            
+        db = SessionLocal()
+        changes, has_more = read_changes(db, since, limit)
+        
+        # Estado actual de las tareas tocadas (las eliminadas solo aparecen como cambio)
+        task_ids = {change.task_id for change in changes}
+        tasks = db.query(Task).options(selectinload(Task.users)).filter(
+            Task.id.in_(task_ids), Task.delete_at == None
+        ).order_by(Task.id).all() if task_ids else []
+        
+        return {
+            "changes": changes,
+            "tasks": tasks,
+            "next_cursor": changes[-1].seq if changes else since,
+            "has_more": has_more
+        }
+        
+    except ValueError:
+        raise
+    except SQLAlchemyError as e:
+        logger.error(f"Error de base de datos al obtener cambios de tareas: {str(e)}")
+        raise SQLAlchemyError("Error al acceder a la base de datos")
+    except Exception as e:
+        logger.error(f"Error inesperado al obtener cambios de tareas: {str(e)}")
+        raise Exception("Error interno al obtener los cambios de tareas")
+    finally:
+        if db:
+            db.close()
+
 def get_task_by_id(task_id: int):
     """Obtener una tarea por su ID con usuarios asignados"""
     db = None
@@ -218,7 +533,7 @@ def get_task_by_id(task_id: int):
             raise ValueError("ID de tarea inválido")
             
         db = SessionLocal()
-        task = db.query(Task).options(joinedload(Task.users)).filter(Task.id == task_id).first()
+        task = db.query(Task).options(selectinload(Task.users)).filter(Task.id == task_id, Task.delete_at == None).first()
             
         return task
         
@@ -248,7 +563,7 @@ def assign_user_to_task(task_id: int, assign_data: TaskAssignUser):
         db = SessionLocal()
         
         # Verificar que la tarea existe
-        task = db.query(Task).filter(Task.id == task_id).first()
+        task = db.query(Task).filter(Task.id == task_id, Task.delete_at == None).first()
         if not task:
             logger.warning(f"Intento de asignar usuario a tarea inexistente: {task_id}")
             raise ValueError("Tarea no encontrada")
@@ -266,10 +581,15 @@ def assign_user_to_task(task_id: int, assign_data: TaskAssignUser):
         
         # Asignar el usuario a la tarea
         task.users.append(user)
+        bump_user_counters(db, user.id, task.state, 1)
+        _append_position(db, user.id, task.id)
+        record_change(db, task.id, ASSIGNED, user.id, [u.id for u in task.users])
+        bump_cache_versions(db, 'tareas')
         db.commit()
+        _invalidate_task_reads([assign_data.user_id])
         
         # Recargar la tarea con eager loading para evitar problemas de sesión
-        updated_task = db.query(Task).options(joinedload(Task.users)).filter(Task.id == task_id).first()
+        updated_task = db.query(Task).options(selectinload(Task.users)).filter(Task.id == task_id).first()
         
         return updated_task
         
@@ -310,7 +630,7 @@ def unassign_user_from_task(task_id: int, user_id: str):
         db = SessionLocal()
         
         # Verificar que la tarea existe
-        task = db.query(Task).filter(Task.id == task_id).first()
+        task = db.query(Task).filter(Task.id == task_id, Task.delete_at == None).first()
         if not task:
             logger.warning(f"Intento de desasignar usuario de tarea inexistente: {task_id}")
             raise ValueError("Tarea no encontrada")
@@ -328,10 +648,17 @@ def unassign_user_from_task(task_id: int, user_id: str):
         
         # Desasignar el usuario de la tarea
         task.users.remove(user)
+        bump_user_counters(db, user.id, task.state, -1)
+        db.query(TaskPosition).filter(
+            TaskPosition.user_id == user.id, TaskPosition.task_id == task_id
+        ).delete()
+        record_change(db, task.id, UNASSIGNED, user.id, [u.id for u in task.users])
+        bump_cache_versions(db, 'tareas')
         db.commit()
+        _invalidate_task_reads([user_id])
         
         # Recargar la tarea con eager loading para evitar problemas de sesión
-        updated_task = db.query(Task).options(joinedload(Task.users)).filter(Task.id == task_id).first()
+        updated_task = db.query(Task).options(selectinload(Task.users)).filter(Task.id == task_id).first()
         
         return updated_task
         
@@ -349,6 +676,114 @@ def unassign_user_from_task(task_id: int, user_id: str):
             db.rollback()
         logger.error(f"Error inesperado al desasignar usuario: {str(e)}")
         raise Exception("Error interno al desasignar usuario")
+    finally:
+        if db:
+            db.close()
+
+def move_task(task_id: int, move_data: TaskMove):
+    """Mover una tarea dentro de la lista de un usuario actualizando una sola posición.
+
+    Devuelve la tarea y un indicador de si las claves de la lista crecieron lo
+    suficiente como para reequilibrarlas en segundo plano.
+    """
+    db = None
+    try:
+        # Validaciones de entrada
+        if task_id <= 0:
+            raise ValueError("ID de tarea inválido")
+        
+        if not move_data.user_id or not move_data.user_id.strip():
+            raise ValueError("ID de usuario requerido")
+        
+        if move_data.after_task_id == task_id:
+            raise ValueError("Una tarea no puede ubicarse después de sí misma")
+            
+        db = SessionLocal()
+        
+        # Verificar que la tarea existe
+        task = db.query(Task).filter(Task.id == task_id, Task.delete_at == None).first()
+        if not task:
+            logger.warning(f"Intento de mover tarea inexistente: {task_id}")
+            raise ValueError("Tarea no encontrada")
+        
+        # Verificar que la tarea está en la lista del usuario
+        assigned = db.query(user_task_association).filter(
+            user_task_association.c.user_id == move_data.user_id,
+            user_task_association.c.task_id == task_id
+        ).first()
+        if not assigned:
+            raise ValueError("El usuario no está asignado a esta tarea")
+        
+        # Clave de la tarea que debe quedar inmediatamente antes (None = principio de la lista)
+        previous_key = None
+        if move_data.after_task_id is not None:
+            anchor = db.get(TaskPosition, (move_data.user_id, move_data.after_task_id))
+            if not anchor:
+                _fill_missing_positions(db, move_data.user_id)
+                anchor = db.get(TaskPosition, (move_data.user_id, move_data.after_task_id))
+            if not anchor:
+                raise ValueError("La tarea de referencia no está asignada al usuario")
+            previous_key = anchor.position
+        
+        # Clave de la tarea que hoy sigue a la referencia (sin contar la que se mueve)
+        next_query = db.query(func.min(TaskPosition.position)).filter(
+            TaskPosition.user_id == move_data.user_id,
+            TaskPosition.task_id != task_id
+        )
+        if previous_key is not None:
+            next_query = next_query.filter(TaskPosition.position > previous_key)
+        next_key = next_query.scalar()
+        
+        new_key = key_between(previous_key, next_key)
+        
+        position = db.get(TaskPosition, (move_data.user_id, task_id))
+        if position:
+            position.position = new_key
+        else:
+            db.add(TaskPosition(user_id=move_data.user_id, task_id=task_id, position=new_key))
+        record_change(db, task_id, MOVED, move_data.user_id)
+        bump_cache_versions(db, 'tareas')
+        db.commit()
+        # Cambia el orden de GET /tasks/user/{id}; los perfiles no muestran posiciones
+        response_cache.invalidate('tareas')
+        
+        # Recargar la tarea con eager loading para evitar problemas de sesión
+        moved_task = db.query(Task).options(selectinload(Task.users)).filter(Task.id == task_id).first()
+        
+        return moved_task, len(new_key) > MAX_KEY_LENGTH
+        
+    except ValueError:
+        if db:
+            db.rollback()
+        raise
+    except SQLAlchemyError as e:
+        if db:
+            db.rollback()
+        logger.error(f"Error de base de datos al mover tarea: {str(e)}")
+        raise SQLAlchemyError("Error al acceder a la base de datos")
+    except Exception as e:
+        if db:
+            db.rollback()
+        logger.error(f"Error inesperado al mover tarea: {str(e)}")
+        raise Exception("Error interno al mover la tarea")
+    finally:
+        if db:
+            db.close()
+
+def rebalance_task_positions(user_id: str):
+    """Reescribir las posiciones de la lista de un usuario con claves cortas y equiespaciadas.
+
+    No registra cambios en el feed: el orden relativo de la lista no cambia.
+    """
+    db = None
+    try:
+        db = SessionLocal()
+        _respace_positions(db, user_id)
+        db.commit()
+    except SQLAlchemyError as e:
+        if db:
+            db.rollback()
+        logger.error(f"Error de base de datos al reequilibrar posiciones del usuario {user_id}: {str(e)}")
     finally:
         if db:
             db.close()
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+Contadores incrementales de tareas (por estado, por usuario y por usuario×estado)
+
+Los servicios de tareas actualizan la tabla task_stats dentro de la misma
+transacción que modifica las tareas, de modo que la lectura de estadísticas
+no necesita recorrer la tabla de tareas.
+
+Uso como comando para verificar o reconstruir los contadores:
+    python -m tasks.stats verify
+    python -m tasks.stats rebuild
+"""
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from config.associations import user_task_association
+from .model import Task, TaskStat
+
+# Valor comodín para las filas de totales
+ALL = '*'
+
+
+def _upsert(db: Session):
+    """INSERT con resolución de conflictos del dialecto de la sesión"""
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(TaskStat)
+
+
+def _bump(db: Session, user_id: str, state: str, delta: int):
+    """Sumar delta a un contador, creándolo si todavía no existe.
+
+    Es un solo upsert: dos primeras escrituras simultáneas del mismo contador
+    no pueden chocar con un IntegrityError (como pasaría con UPDATE y luego
+    INSERT cuando no había fila).
+    """
+    statement = _upsert(db).values(user_id=user_id, state=state, total=delta)
+    if hasattr(statement, 'on_conflict_do_update'):
+        statement = statement.on_conflict_do_update(
+            index_elements=[TaskStat.user_id, TaskStat.state],
+            set_={"total": TaskStat.total + statement.excluded.total}
+        )
+    else:
+        statement = statement.on_duplicate_key_update(total=TaskStat.total + statement.inserted.total)
+    db.execute(statement)
+
+
+def bump_user_counters(db: Session, user_id: str, state: str, delta: int):
+    """Actualizar los contadores de un usuario (asignación/desasignación)"""
+    _bump(db, user_id, state, delta)
+    _bump(db, user_id, ALL, delta)
+
+
+def bump_task_counters(db: Session, state: str, user_ids: Iterable[str], delta: int):
+    """Actualizar los contadores globales y de cada usuario asignado (alta/baja de tarea)"""
+    _bump(db, ALL, state, delta)
+    _bump(db, ALL, ALL, delta)
+    for user_id in user_ids:
+        bump_user_counters(db, user_id, state, delta)
+
+
+def move_task_counters(db: Session, old_state: str, new_state: str, user_ids: Iterable[str]):
+    """Mover una tarea de estado en los contadores (los totales no cambian)"""
+    if old_state == new_state:
+        return
+    _bump(db, ALL, old_state, -1)
+    _bump(db, ALL, new_state, 1)
+    for user_id in user_ids:
+        _bump(db, user_id, old_state, -1)
+        _bump(db, user_id, new_state, 1)
+
+
+def read_task_stats(db: Session) -> dict:
+    """Leer los contadores y armar la respuesta de estadísticas"""
+    stats = {"total": 0, "by_state": {}, "by_user": {}, "by_user_state": {}}
+    for row in db.query(TaskStat).filter(TaskStat.total != 0).all():
+        if row.user_id == ALL and row.state == ALL:
+            stats["total"] = row.total
+        elif row.user_id == ALL:
+            stats["by_state"][row.state] = row.total
+        elif row.state == ALL:
+            stats["by_user"][row.user_id] = row.total
+        else:
+            stats["by_user_state"].setdefault(row.user_id, {})[row.state] = row.total
+    return stats
+
+
+def compute_task_counters(db: Session) -> Dict[Tuple[str, str], int]:
+    """Calcular los contadores desde cero a partir de las tablas de tareas"""
+    counters: Dict[Tuple[str, str], int] = defaultdict(int)
+    counters[(ALL, ALL)] = 0
+
+    by_state = db.query(Task.state, func.count(Task.id)).filter(
+        Task.delete_at == None
+    ).group_by(Task.state).all()
+    for state, total in by_state:
+        counters[(ALL, state)] += total
+        counters[(ALL, ALL)] += total
+
+    by_user_state = db.query(
+        user_task_association.c.user_id, Task.state, func.count(Task.id)
+    ).join(
+        Task, Task.id == user_task_association.c.task_id
+    ).filter(
+        Task.delete_at == None
+    ).group_by(user_task_association.c.user_id, Task.state).all()
+    for user_id, state, total in by_user_state:
+        counters[(user_id, state)] += total
+        counters[(user_id, ALL)] += total
+
+    return dict(counters)
+
+
+def diff_task_counters(db: Session) -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """Comparar los contadores almacenados con el recálculo: {clave: (almacenado, esperado)}"""
+    expected = compute_task_counters(db)
+    stored = {(row.user_id, row.state): row.total for row in db.query(TaskStat).all()}
+    differences = {}
+    for key in set(expected) | set(stored):
+        if stored.get(key, 0) != expected.get(key, 0):
+            differences[key] = (stored.get(key, 0), expected.get(key, 0))
+    return differences
+
+
+def rebuild_task_counters(db: Session):
+    """Reemplazar todos los contadores por el recálculo completo (no confirma la transacción)"""
+    db.query(TaskStat).delete()
+    db.add_all([
+        TaskStat(user_id=user_id, state=state, total=total)
+        for (user_id, state), total in compute_task_counters(db).items()
+    ])
+    db.flush()
+
+
+def ensure_task_counters(db: Session):
+    """Inicializar los contadores si nunca se calcularon (por ejemplo, en una base existente)"""
+    if db.get(TaskStat, (ALL, ALL)) is None:
+        rebuild_task_counters(db)
+        db.commit()
+
+
+if __name__ == "__main__":
+    from config.cnx import SessionLocal
+    # Registrar el resto de los modelos relacionados con Task
+    from roles.model import Rol
+    from permisos.model import Permiso
+    from users.model import User
+
+    command = sys.argv[1].lower() if len(sys.argv) > 1 else 'verify'
+    db = SessionLocal()
+    try:
+        if command == 'verify':
+            differences = diff_task_counters(db)
+            if not differences:
+                print("✓ Los contadores de tareas son consistentes")
+            else:
+                print(f"✗ {len(differences)} contadores inconsistentes:")
+                for (user_id, state), (stored, expected) in sorted(differences.items()):
+                    print(f"   - usuario={user_id} estado={state}: almacenado={stored} esperado={expected}")
+                sys.exit(1)
+        elif command == 'rebuild':
+            rebuild_task_counters(db)
+            db.commit()
+            print("✓ Contadores de tareas reconstruidos")
+        else:
+            print("USO: python -m tasks.stats [verify|rebuild]")
+            sys.exit(2)
+    finally:
+        db.close()
@@ -0,0 +1,84 @@
+"""
+Caché de perfiles de usuario (GET /users/me y GET /users/{id})
+
+Cada perfil se guarda bajo el id del usuario y se invalida solo cuando cambia
+algo que muestra: los datos del usuario, sus roles o sus tareas. Los servicios
+que modifican esos datos llaman a invalidate_profiles() después del commit.
+
+Para los demás workers (caché en memoria): los cambios de usuarios incrementan
+la versión 'usuarios', que descarta todos los perfiles; los de tareas, que son
+mucho más frecuentes, solo descartan los perfiles de los usuarios afectados,
+que cada worker lee del feed task_changes en la consulta periódica de
+cache/versions.py (seq crece en orden de confirmación).
+
+GET /users no se cachea, pero las lecturas simultáneas comparten una sola
+consulta (lista_usuarios); cada cambio la olvida para que las lecturas
+siguientes vean los datos nuevos.
+"""
+from typing import Iterable, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from cache import CacheNamespace
+from cache.responses import response_cache
+from cache.singleflight import SingleFlight
+from cache.versions import on_poll, on_version_change
+from config.associations import user_task_association
+from tasks.changes import UPDATED, DELETED, MOVED
+from tasks.model import TaskChange
+
+# Cambios del feed leídos por consulta; si hay más, se descartan todos los perfiles
+MAX_FEED_ROWS = 5000
+
+perfiles = CacheNamespace('perfiles')
+lista_usuarios = SingleFlight('usuarios')
+on_version_change('usuarios', perfiles.invalidate_local)
+# Renombrar o eliminar un rol cambia los nombres de rol de cualquier perfil
+on_version_change('roles', perfiles.invalidate_local)
+
+# Último seq del feed de tareas ya aplicado a los perfiles de este worker
+_feed_seq: Optional[int] = None
+
+
+def invalidate_profiles(user_ids: Iterable[str]):
+    """Descartar los perfiles cacheados de estos usuarios"""
+    perfiles.invalidate_items(f"perfil:{user_id}" for user_id in user_ids)
+    lista_usuarios.forget()
+    # Los listados de tareas muestran a los usuarios asignados
+    response_cache.invalidate('usuarios')
+
+
+def invalidate_all_profiles():
+    """Descartar todos los perfiles (por ejemplo, al renombrar un rol)"""
+    perfiles.invalidate()
+    lista_usuarios.forget()
+
+
+@on_poll
+def invalidate_profiles_from_feed(db: Session):
+    """Descartar los perfiles de los usuarios cuyas tareas cambiaron desde la consulta anterior"""
+    global _feed_seq
+    if perfiles.backend.shared:
+        # El worker que hizo el cambio ya descartó la entrada compartida
+        return
+    if _feed_seq is None:
+        _feed_seq = db.query(func.coalesce(func.max(TaskChange.seq), 0)).scalar()
+        return
+    rows = db.query(TaskChange.seq, TaskChange.task_id, TaskChange.op, TaskChange.user_id).filter(
+        TaskChange.seq > _feed_seq
+    ).order_by(TaskChange.seq).limit(MAX_FEED_ROWS + 1).all()
+    if not rows:
+        return
+    if len(rows) > MAX_FEED_ROWS:
+        perfiles.invalidate()
+        _feed_seq = db.query(func.max(TaskChange.seq)).scalar()
+        return
+    # Altas, asignaciones y desasignaciones traen el usuario; las ediciones y
+    # bajas afectan a todos los asignados (las bajas lógicas conservan la asignación)
+    user_ids = {user_id for _, _, op, user_id in rows if user_id and op != MOVED}
+    task_ids = {task_id for _, task_id, op, _ in rows if op in (UPDATED, DELETED)}
+    if task_ids:
+        user_ids.update(user_id for (user_id,) in db.query(user_task_association.c.user_id).filter(
+            user_task_association.c.task_id.in_(task_ids)
+        ))
+    perfiles.invalidate_items(f"perfil:{user_id}" for user_id in user_ids)
+    _feed_seq = rows[-1][0]
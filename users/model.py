@@ -29,6 +29,13 @@ class User(Base):
 
     tasks: Mapped[List["Task"]] = relationship('Task', secondary=user_task_association, back_populates='users')
     roles: Mapped[List["Rol"]] = relationship('Rol', secondary=user_rol_association, back_populates='users')
+    # Solo lectura: las tareas sin eliminar, para perfiles y listados de usuarios
+    active_tasks: Mapped[List["Task"]] = relationship(
+        'Task',
+        secondary=user_task_association,
+        secondaryjoin='and_(Task.id == user_task_association.c.task_id, Task.delete_at == None)',
+        viewonly=True,
+    )
 
     def __repr__(self) -> str:
         return f"User(id={self.id!r}, firstname={self.firstName!r}, lastname={self.lastName!r})"
\ No newline at end of file
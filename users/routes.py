@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Request
+from monitoring.timing import TimedRoute
 from typing import List
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from .dto import UserCreate, UserOut, UserUpdate, UserLogin, Token, UserInsert, UserSimple, RoleAssignment
@@ -42,7 +43,7 @@ async def log_read_operation(request: Request):
         "start_time": start_time
     }
 
-users = APIRouter()
+users = APIRouter(route_class=TimedRoute)
 
 @users.get('', response_model=List[UserOut], status_code=status.HTTP_200_OK)
 def get_users(log_info: dict = Depends(log_read_operation)):
@@ -2,8 +2,10 @@ from .model import User
 from roles.model import Rol
 from config.cnx import SessionLocal
 from config.associations import user_rol_association
+from cache.versions import bump_cache_versions
+from .cache import perfiles, lista_usuarios, invalidate_profiles
 from .dto import UserCreate, UserUpdate, UserInsert
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from middlewares.auth import hash_password, compare_password, create_access_token
 from datetime import datetime
@@ -14,13 +16,20 @@ import uuid
 logger = logging.getLogger(__name__)
 
 def get_all_users():
-    """Obtener todos los usuarios activos con sus tareas y roles"""
+    """Obtener todos los usuarios activos con sus tareas y roles.
+
+    Las llamadas simultáneas comparten una sola consulta (y su resultado)
+    """
+    return lista_usuarios.do('activos', _load_all_users)
+
+def _load_all_users():
+    """Consultar todos los usuarios activos con sus tareas y roles"""
     db = None
     try:
         db = SessionLocal()
         # Usar joinedload para cargar las tareas y roles junto con los usuarios (eager loading)
         users = db.query(User).options(
-            joinedload(User.tasks),
+            joinedload(User.active_tasks),
             joinedload(User.roles)
         ).filter(User.delete_at == None).all()
         
@@ -40,8 +49,8 @@ def get_all_users():
                         'title': task.title,
                         'description': task.description,
                         'state': task.state
-                    } for task in user.tasks
-                ] if user.tasks else []
+                    } for task in user.active_tasks
+                ] if user.active_tasks else []
             }
             result_users.append(user_data)
         
@@ -96,7 +105,7 @@ def get_all_users_deleted():
         db = SessionLocal()
         # Usar joinedload para cargar las tareas y roles junto con los usuarios (eager loading)
         users = db.query(User).options(
-            joinedload(User.tasks),
+            joinedload(User.active_tasks),
             joinedload(User.roles)
         ).filter(User.delete_at != None).all()
         
@@ -116,8 +125,8 @@ def get_all_users_deleted():
                         'title': task.title,
                         'description': task.description,
                         'state': task.state
-                    } for task in user.tasks
-                ] if user.tasks else []
+                    } for task in user.active_tasks
+                ] if user.active_tasks else []
             }
             result_users.append(user_data)
         
@@ -133,14 +142,19 @@ def get_all_users_deleted():
             db.close()
 
 def get_user_by_id(user_id: str):
-    """Obtener un usuario por ID con sus tareas y roles"""
+    """Obtener un usuario por ID con sus tareas y roles (desde la caché de perfiles si está vigente)"""
+    return perfiles.get_or_load_item(f"perfil:{user_id}", lambda: _load_user_profile(user_id))
+
+def _load_user_profile(user_id: str):
+    """Consultar el perfil de un usuario con sus tareas y roles"""
     db = None
     try:
         db = SessionLocal()
-        # Usar joinedload para cargar las tareas y roles junto con el usuario (eager loading)
+        # Cargar tareas y roles con consultas aparte por IN: el joinedload de relaciones
+        # many-to-many hace que SQLite materialice la tabla de asociación completa
         user = db.query(User).options(
-            joinedload(User.tasks),
-            joinedload(User.roles)
+            selectinload(User.active_tasks),
+            selectinload(User.roles)
         ).filter(User.id == user_id, User.delete_at == None).first()
         
         if not user:
@@ -161,8 +175,8 @@ def get_user_by_id(user_id: str):
                     'title': task.title,
                     'description': task.description,
                     'state': task.state
-                } for task in user.tasks
-            ] if user.tasks else []
+                } for task in user.active_tasks
+            ] if user.active_tasks else []
         }
             
         return user_data
@@ -204,6 +218,7 @@ def create_user(user_data: UserCreate):
         
         db.add(user)
         db.commit()
+        lista_usuarios.forget()
         db.refresh(user)
         
         # Convertir a estructura de diccionario para evitar problemas con SQLAlchemy
@@ -266,6 +281,7 @@ def insert_user(user_data: UserInsert):
         
         db.add(user)
         db.commit()
+        lista_usuarios.forget()
         db.refresh(user)
         
         return user
@@ -298,8 +314,8 @@ def update_user(user_id: str, user_data: UserUpdate):
             
         db = SessionLocal()
         user = db.query(User).options(
-            joinedload(User.tasks),
-            joinedload(User.roles)
+            selectinload(User.active_tasks),
+            selectinload(User.roles)
         ).filter(User.id == user_id, User.delete_at == None).first()
         
         if not user:
@@ -327,7 +343,9 @@ def update_user(user_id: str, user_data: UserUpdate):
             user.ages = user_data.ages
             
         user.update_at = datetime.now()
+        bump_cache_versions(db, 'usuarios')
         db.commit()
+        invalidate_profiles([user_id])
         db.refresh(user)
         
         # Convertir a estructura de diccionario para evitar problemas con SQLAlchemy
@@ -344,8 +362,8 @@ def update_user(user_id: str, user_data: UserUpdate):
                     'title': task.title,
                     'description': task.description,
                     'state': task.state
-                } for task in user.tasks
-            ] if user.tasks else []
+                } for task in user.active_tasks
+            ] if user.active_tasks else []
         }
         
         return user_data
@@ -389,7 +407,9 @@ def soft_delete_user(user_id: str):
         
         user.delete_at = datetime.now()
         user.update_at = datetime.now()
+        bump_cache_versions(db, 'usuarios')
         db.commit()
+        invalidate_profiles([user_id])
         
         return True
         
@@ -420,8 +440,8 @@ def restore_user(user_id: str):
             
         db = SessionLocal()
         user = db.query(User).options(
-            joinedload(User.tasks),
-            joinedload(User.roles)
+            selectinload(User.active_tasks),
+            selectinload(User.roles)
         ).filter(User.id == user_id, User.delete_at != None).first()
         
         if not user:
@@ -430,7 +450,9 @@ def restore_user(user_id: str):
         
         user.delete_at = None
         user.update_at = datetime.now()
+        bump_cache_versions(db, 'usuarios')
         db.commit()
+        invalidate_profiles([user_id])
         db.refresh(user)
         
         # Convertir a estructura de diccionario para evitar problemas con SQLAlchemy
@@ -447,8 +469,8 @@ def restore_user(user_id: str):
                     'title': task.title,
                     'description': task.description,
                     'state': task.state
-                } for task in user.tasks
-            ] if user.tasks else []
+                } for task in user.active_tasks
+            ] if user.active_tasks else []
         }
         
         return user_data
@@ -478,7 +500,7 @@ def authenticate_user(emails: str, password: str):
         db = SessionLocal()
         # Cargar usuario con sus roles
         user = db.query(User).options(
-            joinedload(User.roles)
+            selectinload(User.roles)
         ).filter(User.emails == emails, User.delete_at == None).first()
         
         if not user:
@@ -556,7 +578,9 @@ def assign_role(user_id: str, role_name: str):
         
         # Asignar el nuevo rol (será el único)
         user.roles.append(rol)
+        bump_cache_versions(db, 'usuarios')
         db.commit()
+        invalidate_profiles([user_id])
         db.refresh(user)
         
         # Convertir a diccionario
@@ -610,7 +634,9 @@ def remove_role(user_id: str, role_name: str):
         
         # Remover el rol
         user.roles.remove(rol)
+        bump_cache_versions(db, 'usuarios')
         db.commit()
+        invalidate_profiles([user_id])
         db.refresh(user)
         
         # Convertir a diccionario